@@ -2,7 +2,13 @@
 //! A simple chained RNG implementation for mutation operations.
 //! This RNG is not cryptographically secure and is only intended for use in fuzz testing.
 
-pub static mut _STATE: u64 = 4399;
+use std::sync::atomic::{AtomicU64, Ordering};
+
+const DEFAULT_STATE: u64 = 4399;
+
+// 模块级函数共用的全局状态。原子读写保证多线程访问不是未定义行为，但交错的调用会
+// 打乱随机数序列，需要可复现的并发变异时每个线程应使用各自的 ChainRng
+static STATE: AtomicU64 = AtomicU64::new(DEFAULT_STATE);
 
 #[inline]
 fn hash64(input: u64) -> u64 {
@@ -14,20 +20,70 @@ fn hash64(input: u64) -> u64 {
     x
 }
 
-pub fn ri(max: u32) -> u32 {
-    //! Generate a random integer in [0, max)
-    if max <= 1 {
-        return 0;
+/// A random stream owning its state
+#[derive(Clone, Copy, Debug)]
+pub struct ChainRng {
+    pub state: u64,
+}
+
+impl Default for ChainRng {
+    fn default() -> Self {
+        ChainRng::new(DEFAULT_STATE)
+    }
+}
+
+impl ChainRng {
+    pub fn new(state: u64) -> Self {
+        ChainRng { state }
     }
-    unsafe {
-        let mut t1 = _STATE;
-        t1 = t1.wrapping_mul(0x5DEECE66D).wrapping_add(0xB);
+
+    #[inline]
+    pub fn ri(&mut self, max: u32) -> u32 {
+        //! Generate a random integer in [0, max)
+        if max <= 1 {
+            return 0;
+        }
+        let t1 = self.state.wrapping_mul(0x5DEECE66D).wrapping_add(0xB);
         let t2 = t1 % max as u64;
-        _STATE = hash64(_STATE);
+        self.state = hash64(self.state);
         t2 as u32
     }
 }
 
+pub fn get_state() -> u64 {
+    //! Get the state of the global stream
+    STATE.load(Ordering::Relaxed)
+}
+
+pub fn set_state(state: u64) {
+    //! Set the state of the global stream
+    STATE.store(state, Ordering::Relaxed);
+}
+
+pub fn with_global<T>(f: impl FnOnce(&mut ChainRng) -> T) -> T {
+    //! Run `f` with the global stream, e.g. a whole havoc, loading and storing its state once
+    let mut rng = ChainRng::new(get_state());
+    let result = f(&mut rng);
+    set_state(rng.state);
+    result
+}
+
+pub fn ri(max: u32) -> u32 {
+    //! Generate a random integer in [0, max) from the global stream
+    with_global(|rng| rng.ri(max))
+}
+
+pub fn batch<T, E>(n: usize, mut f: impl FnMut() -> Result<T, E>) -> Result<(Vec<T>, Vec<u64>), E> {
+    //! Call `f` n times, returning the results and the global state before each call
+    let mut values = Vec::with_capacity(n);
+    let mut states = Vec::with_capacity(n);
+    for _ in 0..n {
+        states.push(get_state());
+        values.push(f()?);
+    }
+    Ok((values, states))
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -42,6 +98,20 @@ mod tests {
         }
     }
 
+    #[test]
+    fn test_chain_rng_streams() {
+        //! Test that streams with the same state are identical and independent
+        let mut a = ChainRng::new(42);
+        let mut b = ChainRng::new(42);
+        let xs: Vec<u32> = (0..100).map(|_| a.ri(1000)).collect();
+        let ys: Vec<u32> = (0..100).map(|_| b.ri(1000)).collect();
+        assert_eq!(xs, ys);
+        assert_eq!(a.state, b.state);
+        let state = a.state;
+        assert_eq!(a.ri(1), 0);
+        assert_eq!(a.state, state);
+    }
+
     #[test]
     fn test_ri() {
         //! Test for ri function not crash
@@ -51,4 +121,18 @@ mod tests {
             assert!(r < max);
         }
     }
-}
\ No newline at end of file
+
+    #[test]
+    fn test_batch() {
+        //! Test that batch collects every result and a state for each
+        let mut i = 0;
+        let (values, states) = batch(10, || {
+            i += 1;
+            Ok::<u32, ()>(i)
+        })
+        .unwrap();
+        assert_eq!(values, (1..=10).collect::<Vec<u32>>());
+        assert_eq!(states.len(), 10);
+        assert!(batch(10, || Err::<u32, ()>(())).is_err());
+    }
+}
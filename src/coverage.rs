@@ -0,0 +1,98 @@
+//! src/coverage.rs
+//! Lock-free updates of a coverage bitmap shared by several processes.
+
+use std::sync::atomic::{AtomicU64, Ordering};
+
+pub fn atomic_or_words(map: &[AtomicU64], index: &[usize], words: &[u64]) -> u64 {
+    //! OR `words[i]` into `map[index[i]]` atomically, returning the number of
+    //! bits no other writer had set before.
+    //! 覆盖位只会被置位，不需要与其他内存访问排序，使用 Relaxed 即可
+    index
+        .iter()
+        .zip(words)
+        .map(|(&i, &word)| {
+            let old = map[i].fetch_or(word, Ordering::Relaxed);
+            (word & !old).count_ones() as u64
+        })
+        .sum()
+}
+
+/// Words of the trace checked for zero at once, small enough to stay in registers
+const CHUNK: usize = 8;
+
+pub fn atomic_or_trace(map: &[AtomicU64], trace: &[u64]) -> u64 {
+    //! OR every word of `trace` into the word of `map` at the same index
+    //! atomically, returning the number of bits no other writer had set before.
+    //! 一次执行只触及很少的字：整块为零的字直接跳过，已经全部见过的字只读不写，
+    //! 只有包含新边的字才需要原子操作
+    let mut new_bits = 0;
+    for (words, cells) in trace.chunks(CHUNK).zip(map.chunks(CHUNK)) {
+        if words.iter().fold(0, |acc, &w| acc | w) == 0 {
+            continue;
+        }
+        for (&word, cell) in words.iter().zip(cells) {
+            if word & !cell.load(Ordering::Relaxed) == 0 {
+                continue;
+            }
+            let old = cell.fetch_or(word, Ordering::Relaxed);
+            new_bits += (word & !old).count_ones() as u64;
+        }
+    }
+    new_bits
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::thread;
+
+    #[test]
+    fn test_atomic_or_words_counts_new_bits() {
+        let map: Vec<AtomicU64> = (0..4).map(|_| AtomicU64::new(0)).collect();
+        assert_eq!(atomic_or_words(&map, &[1, 3], &[0b1011, 1 << 63]), 4);
+        assert_eq!(atomic_or_words(&map, &[1], &[0b1111]), 1);
+        assert_eq!(atomic_or_words(&map, &[1, 3], &[0b1111, 1 << 63]), 0);
+        assert_eq!(map[1].load(Ordering::Relaxed), 0b1111);
+    }
+
+    #[test]
+    fn test_atomic_or_trace_skips_zero_words() {
+        let map: Vec<AtomicU64> = (0..20).map(|_| AtomicU64::new(0)).collect();
+        let mut trace = vec![0u64; 20];
+        trace[3] = 0b1011;
+        trace[17] = 1 << 63;
+        assert_eq!(atomic_or_trace(&map, &trace), 4);
+        assert_eq!(atomic_or_trace(&map, &trace), 0);
+        trace[3] = 0b1111;
+        assert_eq!(atomic_or_trace(&map, &trace), 1);
+        assert_eq!(map[3].load(Ordering::Relaxed), 0b1111);
+        assert_eq!(map[17].load(Ordering::Relaxed), 1 << 63);
+        assert!(map
+            .iter()
+            .enumerate()
+            .all(|(i, w)| i == 3 || i == 17 || w.load(Ordering::Relaxed) == 0));
+    }
+
+    #[test]
+    fn test_atomic_or_words_concurrent() {
+        //! Every bit is reported as new by exactly one of the writers
+        let map: Vec<AtomicU64> = (0..64).map(|_| AtomicU64::new(0)).collect();
+        let index: Vec<usize> = (0..64).collect();
+        let total: u64 = thread::scope(|s| {
+            let handles: Vec<_> = (0..8)
+                .map(|t| {
+                    let (map, index) = (&map, &index);
+                    s.spawn(move || {
+                        let words: Vec<u64> = (0..64)
+                            .map(|i| 0x0101_0101_0101_0101 << ((i + t) % 8))
+                            .collect();
+                        atomic_or_words(map, index, &words)
+                    })
+                })
+                .collect();
+            handles.into_iter().map(|h| h.join().unwrap()).sum()
+        });
+        assert_eq!(total, 64 * 64);
+        assert!(map.iter().all(|w| w.load(Ordering::Relaxed) == u64::MAX));
+    }
+}
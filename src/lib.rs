@@ -4,21 +4,32 @@
 //! This library contains all the semantically equivalent mutation operations for AFL.
 
 mod chain_rng;
+mod coverage;
 mod mutator;
+mod structural;
 
-use chain_rng::{ri, _STATE};
-use mutator::havoc;
+use chain_rng::{batch, get_state, ri, set_state, with_global, ChainRng};
+use coverage::{atomic_or_trace, atomic_or_words};
+use mutator::{
+    mutate_buffer_value, mutate_bytes_value, mutate_float_value, mutate_int_value,
+    mutate_str_value,
+};
 
 
-use pyo3::{prelude::*, types::{PyBytes}};
+use std::sync::atomic::AtomicU64;
+
+use pyo3::{
+    buffer::PyBuffer,
+    exceptions::{PyIndexError, PyTypeError, PyValueError},
+    prelude::*,
+    types::PyBytes,
+};
 
 #[pyfunction]
 #[pyo3(name = "set_random_state")]
 fn chain_rng_set_state(seed: u64) -> PyResult<()> {
     //! Set the internal RNG state
-    unsafe {
-        _STATE = seed;
-    }
+    set_state(seed);
     Ok(())
 }
 
@@ -26,9 +37,7 @@ fn chain_rng_set_state(seed: u64) -> PyResult<()> {
 #[pyo3(name = "get_random_state")]
 fn chain_rng_get_state() -> PyResult<u64> {
     //! Get the internal RNG state
-    unsafe {
-        Ok(_STATE)
-    }
+    Ok(get_state())
 }
 
 #[pyfunction]
@@ -43,48 +52,285 @@ fn chain_rng_randint(max: u32) -> PyResult<u32> {
 #[pyo3(name = "mutate_int")]
 fn py_int_mutate(value: i32) -> PyResult<i32> {
     //! Mutate an integer by treating it as a byte array
-    let mut byte_array = value.to_le_bytes().to_vec(); // 转换为小端字节序的字节数组
-    let mut len = byte_array.len();
-    unsafe {
-        havoc(&mut byte_array, &mut len, false);
-    }
-    Ok(i32::from_le_bytes(byte_array.as_slice().try_into().unwrap()))
+    Ok(with_global(|rng| mutate_int_value(rng, value)))
 }
 
 #[pyfunction]
 #[pyo3(name = "mutate_float")]
 fn py_float_mutate(value: f32) -> PyResult<f32> {
     //! Mutate a float by treating it as a byte array
-    let mut byte_array = value.to_le_bytes().to_vec(); // 转换为小端字节序的字节数组
-    let mut len = byte_array.len();
-    unsafe {
-        havoc(&mut byte_array, &mut len, false);
+    Ok(with_global(|rng| mutate_float_value(rng, value)))
+}
+
+// 短输入的 havoc 只需几微秒，不值得释放再重新获取 GIL
+const DETACH_MIN_LEN: usize = 4096;
+
+fn mutate_detached<T: Send>(
+    py: Python<'_>,
+    rng: &mut ChainRng,
+    len: usize,
+    f: impl FnOnce(&mut ChainRng) -> T + Send,
+) -> T {
+    //! Run a mutation with a caller-owned stream, releasing the GIL for large inputs.
+    //! The global stream is never touched here, so it cannot race with other threads
+    if len >= DETACH_MIN_LEN {
+        py.detach(|| f(rng))
+    } else {
+        f(rng)
     }
-    Ok(f32::from_le_bytes(byte_array.as_slice().try_into().unwrap()))
 }
 
 #[pyfunction]
-#[pyo3(name = "mutate_str")]
-fn py_str_mutate(value: &str) -> PyResult<String> {
-    //! Mutate a string by treating it as a byte array
-    let mut byte_array = value.as_bytes().to_vec();
-    let mut len = byte_array.len();
-    unsafe {
-        havoc(&mut byte_array, &mut len, true);
+#[pyo3(name = "mutate_str", signature = (value, rng=None))]
+fn py_str_mutate(
+    py: Python<'_>,
+    value: &str,
+    rng: Option<PyRefMut<'_, PyChainRng>>,
+) -> PyResult<String> {
+    //! Mutate a string by treating it as a byte array. With `rng` the mutation draws
+    //! from that stream and releases the GIL for large inputs
+    Ok(match rng {
+        Some(mut rng) => mutate_detached(py, &mut rng.rng, value.len(), |rng| {
+            mutate_str_value(rng, value)
+        }),
+        None => with_global(|rng| mutate_str_value(rng, value)),
+    })
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_bytes", signature = (value, rng=None))]
+fn py_bytes_mutate<'py>(
+    py: Python<'py>,
+    value: &[u8],
+    rng: Option<PyRefMut<'_, PyChainRng>>,
+) -> PyResult<Bound<'py, PyBytes>> {
+    //! Mutate a bytes object by treating it as a byte array. With `rng` the mutation
+    //! draws from that stream and releases the GIL for large inputs
+    let value = match rng {
+        Some(mut rng) => mutate_detached(py, &mut rng.rng, value.len(), |rng| {
+            mutate_bytes_value(rng, value)
+        }),
+        None => with_global(|rng| mutate_bytes_value(rng, value)),
+    };
+    Ok(PyBytes::new(py, &value))
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_int_batch")]
+fn py_int_mutate_batch(value: i32, n: usize) -> PyResult<(Vec<i32>, Vec<u64>)> {
+    //! Mutate an integer n times, returning the variants and the RNG state before each
+    batch(n, || Ok(with_global(|rng| mutate_int_value(rng, value))))
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_float_batch")]
+fn py_float_mutate_batch(value: f32, n: usize) -> PyResult<(Vec<f32>, Vec<u64>)> {
+    //! Mutate a float n times, returning the variants and the RNG state before each
+    batch(n, || Ok(with_global(|rng| mutate_float_value(rng, value))))
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_str_batch")]
+fn py_str_mutate_batch(value: &str, n: usize) -> PyResult<(Vec<String>, Vec<u64>)> {
+    //! Mutate a string n times, returning the variants and the RNG state before each
+    batch(n, || Ok(with_global(|rng| mutate_str_value(rng, value))))
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_bytes_batch")]
+fn py_bytes_mutate_batch<'py>(
+    py: Python<'py>,
+    value: &[u8],
+    n: usize,
+) -> PyResult<(Vec<Bound<'py, PyBytes>>, Vec<u64>)> {
+    //! Mutate a bytes object n times, returning the variants and the RNG state before each
+    batch(n, || {
+        let value = with_global(|rng| mutate_bytes_value(rng, value));
+        Ok(PyBytes::new(py, &value))
+    })
+}
+
+fn writable_bytes(buffer: &PyBuffer<u8>) -> PyResult<&mut [u8]> {
+    //! View a writable contiguous byte buffer as a slice, without copying it
+    if buffer.readonly() {
+        return Err(PyTypeError::new_err("buffer is read-only"));
+    }
+    if !buffer.is_c_contiguous() {
+        return Err(PyValueError::new_err("buffer is not C-contiguous"));
+    }
+    if buffer.len_bytes() == 0 {
+        return Ok(&mut []);
+    }
+    Ok(unsafe { std::slice::from_raw_parts_mut(buffer.buf_ptr() as *mut u8, buffer.len_bytes()) })
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_buffer", signature = (buffer, rng=None))]
+fn py_buffer_mutate(
+    py: Python<'_>,
+    buffer: PyBuffer<u8>,
+    rng: Option<PyRefMut<'_, PyChainRng>>,
+) -> PyResult<()> {
+    //! Mutate a writable contiguous byte buffer in place, e.g. the data of a numpy array.
+    //! With `rng` the mutation draws from that stream and releases the GIL for large buffers
+    let data = writable_bytes(&buffer)?;
+    if data.is_empty() {
+        return Ok(());
+    }
+    match rng {
+        Some(mut rng) => {
+            let len = data.len();
+            mutate_detached(py, &mut rng.rng, len, |rng| mutate_buffer_value(rng, data))
+        }
+        None => with_global(|rng| mutate_buffer_value(rng, data)),
+    }
+    Ok(())
+}
+
+#[pyfunction]
+#[pyo3(name = "atomic_or_words")]
+fn py_atomic_or_words(map: PyBuffer<u64>, index: Vec<usize>, words: Vec<u64>) -> PyResult<u64> {
+    //! OR `words` into the words `index` of a writable uint64 buffer, e.g. a coverage
+    //! bitmap in shared memory, atomically. Returns the number of newly set bits
+    if map.readonly() {
+        return Err(PyTypeError::new_err("buffer is read-only"));
+    }
+    if !map.is_c_contiguous() {
+        return Err(PyValueError::new_err("buffer is not C-contiguous"));
+    }
+    if index.len() != words.len() {
+        return Err(PyValueError::new_err("index and words differ in length"));
+    }
+    let n = map.item_count();
+    if index.iter().any(|&i| i >= n) {
+        return Err(PyIndexError::new_err("word index out of range"));
     }
-    Ok(String::from_utf8_lossy(&byte_array).to_string())
+    if index.is_empty() {
+        return Ok(0);
+    }
+    // AtomicU64 与 u64 的内存布局相同，共享内存按页对齐
+    let cells = unsafe { std::slice::from_raw_parts(map.buf_ptr() as *const AtomicU64, n) };
+    Ok(atomic_or_words(cells, &index, &words))
 }
 
 #[pyfunction]
-#[pyo3(name = "mutate_bytes")]
-fn py_bytes_mutate(py: Python, value: &[u8]) -> PyResult<Py<PyBytes>> {
-    //! Mutate a bytes object by treating it as a byte array
-    let mut byte_array = value.to_vec();
-    let mut len = byte_array.len();
-    unsafe {
-        havoc(&mut byte_array, &mut len, false);
+#[pyo3(name = "atomic_or_trace")]
+fn py_atomic_or_trace(map: PyBuffer<u64>, trace: PyBuffer<u64>) -> PyResult<u64> {
+    //! OR a whole uint64 trace bitmap into a writable uint64 buffer of at least the
+    //! same length atomically, skipping zero words. Returns the number of newly set bits
+    if map.readonly() {
+        return Err(PyTypeError::new_err("buffer is read-only"));
+    }
+    if !map.is_c_contiguous() || !trace.is_c_contiguous() {
+        return Err(PyValueError::new_err("buffer is not C-contiguous"));
+    }
+    let n = trace.item_count();
+    if n > map.item_count() {
+        return Err(PyIndexError::new_err("trace is longer than the map"));
+    }
+    // AtomicU64 与 u64 的内存布局相同，共享内存按页对齐；trace 属于已经停止执行的 worker，只读
+    let cells = unsafe { std::slice::from_raw_parts(map.buf_ptr() as *const AtomicU64, n) };
+    let words = unsafe { std::slice::from_raw_parts(trace.buf_ptr() as *const u64, n) };
+    Ok(atomic_or_trace(cells, words))
+}
+
+/// A random stream with its own state. Mutations drawn from different
+/// instances do not interfere, so each thread can own a reproducible stream.
+#[pyclass(name = "ChainRng", module = "respfuzzer.lib.fuzz.mutate")]
+struct PyChainRng {
+    rng: ChainRng,
+}
+
+#[pymethods]
+impl PyChainRng {
+    #[new]
+    #[pyo3(signature = (state=None))]
+    fn new(state: Option<u64>) -> Self {
+        PyChainRng {
+            rng: state.map(ChainRng::new).unwrap_or_default(),
+        }
+    }
+
+    #[getter]
+    fn get_state(&self) -> u64 {
+        self.rng.state
+    }
+
+    #[setter]
+    fn set_state(&mut self, state: u64) {
+        self.rng.state = state;
+    }
+
+    fn randint(&mut self, max: u32) -> u32 {
+        //! Generate a random integer in [0, max)
+        self.rng.ri(max)
+    }
+
+    fn mutate_int(&mut self, value: i32) -> i32 {
+        mutate_int_value(&mut self.rng, value)
+    }
+
+    fn mutate_float(&mut self, value: f32) -> f32 {
+        mutate_float_value(&mut self.rng, value)
+    }
+
+    fn mutate_str(&mut self, py: Python<'_>, value: &str) -> String {
+        mutate_detached(py, &mut self.rng, value.len(), |rng| {
+            mutate_str_value(rng, value)
+        })
     }
-    Ok(PyBytes::new(py, &byte_array).into())
+
+    fn mutate_bytes<'py>(&mut self, py: Python<'py>, value: &[u8]) -> Bound<'py, PyBytes> {
+        let value = mutate_detached(py, &mut self.rng, value.len(), |rng| {
+            mutate_bytes_value(rng, value)
+        });
+        PyBytes::new(py, &value)
+    }
+
+    fn mutate_buffer(&mut self, py: Python<'_>, buffer: PyBuffer<u8>) -> PyResult<()> {
+        let data = writable_bytes(&buffer)?;
+        if !data.is_empty() {
+            let len = data.len();
+            mutate_detached(py, &mut self.rng, len, |rng| mutate_buffer_value(rng, data));
+        }
+        Ok(())
+    }
+
+    fn __repr__(&self) -> String {
+        format!("ChainRng(state={})", self.rng.state)
+    }
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_auto")]
+fn py_auto_mutate<'py>(value: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    //! Mutate a value of any type, walking containers natively
+    structural::mutate_auto(value)
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_param_list")]
+fn py_param_list_mutate<'py>(value: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    //! Mutate a random subset of the parameters in a list
+    structural::mutate_param_list(value)
+}
+
+#[pyfunction]
+#[pyo3(name = "mutate_param_list_batch")]
+fn py_param_list_mutate_batch<'py>(
+    value: &Bound<'py, PyAny>,
+    n: usize,
+) -> PyResult<(Vec<Bound<'py, PyAny>>, Vec<u64>)> {
+    //! Mutate a parameter list n times, returning the variants and the RNG state before each
+    batch(n, || structural::mutate_param_list(value))
+}
+
+#[pyfunction]
+#[pyo3(name = "set_copy_on_write")]
+fn py_set_copy_on_write(enabled: bool) -> PyResult<()> {
+    //! Shallow-copy only the mutated containers instead of deep-copying them
+    structural::set_copy_on_write(enabled);
+    Ok(())
 }
 
 /// A Python module implemented in Rust. The name of this function must match
@@ -92,6 +338,7 @@ fn py_bytes_mutate(py: Python, value: &[u8]) -> PyResult<Py<PyBytes>> {
 /// import the module.
 #[pymodule]
 fn mutate(m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_class::<PyChainRng>()?;
     m.add_function(wrap_pyfunction!(chain_rng_set_state, m)?)?;
     m.add_function(wrap_pyfunction!(chain_rng_get_state, m)?)?;
     m.add_function(wrap_pyfunction!(chain_rng_randint, m)?)?;
@@ -99,5 +346,16 @@ fn mutate(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(py_float_mutate, m)?)?;
     m.add_function(wrap_pyfunction!(py_str_mutate, m)?)?;
     m.add_function(wrap_pyfunction!(py_bytes_mutate, m)?)?;
+    m.add_function(wrap_pyfunction!(py_int_mutate_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(py_float_mutate_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(py_str_mutate_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(py_bytes_mutate_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(py_buffer_mutate, m)?)?;
+    m.add_function(wrap_pyfunction!(py_atomic_or_words, m)?)?;
+    m.add_function(wrap_pyfunction!(py_atomic_or_trace, m)?)?;
+    m.add_function(wrap_pyfunction!(py_auto_mutate, m)?)?;
+    m.add_function(wrap_pyfunction!(py_param_list_mutate, m)?)?;
+    m.add_function(wrap_pyfunction!(py_param_list_mutate_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(py_set_copy_on_write, m)?)?;
     Ok(())
 }
\ No newline at end of file
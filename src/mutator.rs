@@ -2,7 +2,7 @@
 //！src/mutator.rs
 //！This module implements various mutation operations for fuzz testing,
 
-use crate::chain_rng::ri;
+use crate::chain_rng::ChainRng;
 
 use std::ptr;
 
@@ -104,12 +104,12 @@ const HAVOC_BLK_MEDIUM: usize = 128; // Medium block size for havoc
 const HAVOC_BLK_LARGE: usize = 1500; // Large block size for havoc
 const HAVOC_BLK_XL: usize = 32768; // Extra large block size for havoc
 
-fn choose_block_len(limit: u32) -> u32{
+fn choose_block_len(rng: &mut ChainRng, limit: u32) -> u32{
     //! Helper to choose random block len for block operations in fuzz_one().
     //! Doesn't return zero, provided that max_len is > 0.
     let mut min_value: u32;
     let max_value: u32;
-    match ri(3) {
+    match rng.ri(3) {
         0 => {
             min_value = 1;
             max_value = HAVOC_BLK_SMALL as u32;
@@ -119,7 +119,7 @@ fn choose_block_len(limit: u32) -> u32{
             max_value = HAVOC_BLK_MEDIUM as u32;
         }
         _ => {
-            if  ri(10)!=0 {
+            if  rng.ri(10)!=0 {
                 min_value = HAVOC_BLK_MEDIUM as u32;
                 max_value = HAVOC_BLK_LARGE as u32;
             }else {
@@ -133,88 +133,88 @@ fn choose_block_len(limit: u32) -> u32{
         min_value = 1;
     }
 
-    min_value + ri(min(max_value, limit)-min_value +1)
+    min_value + rng.ri(min(max_value, limit)-min_value +1)
 }
 
 #[inline]
-fn bitflip_1(_ar: &mut [u8], len: usize) {
+fn bitflip_1(rng: &mut ChainRng, _ar: &mut [u8], len: usize) {
     //! Randomly flip a single bit in the byte array
     if len == 0 {
         return;
     }
-    let p: usize = ri(len as u32) as usize;
+    let p: usize = rng.ri(len as u32) as usize;
     _ar[p>>3] ^= (128 >> (p & 7)) as u8;
 }
 
 #[inline]
-fn byte_intersting(_ar: &mut [u8], len: usize) {
+fn byte_intersting(rng: &mut ChainRng, _ar: &mut [u8], len: usize) {
     //! Set a random byte in the byte array to an interesting value
     if len == 0 {
         return;
     }
-    let p: usize = ri(len as u32) as usize;
-    let n = INTERSTING_8[ri(INTERSTING_8.len() as u32) as usize];
+    let p: usize = rng.ri(len as u32) as usize;
+    let n = INTERSTING_8[rng.ri(INTERSTING_8.len() as u32) as usize];
     _ar[p] = n as u8;
 }
 
 #[inline]
-unsafe fn word_intersting(_ar: &mut [u8], len: usize) {
+unsafe fn word_intersting(rng: &mut ChainRng, _ar: &mut [u8], len: usize) {
     //! Set a random word in the byte array to an interesting value
     if len < 2 {
         return;
     }
-    let p: usize = ri((len - 1) as u32) as usize;
+    let p: usize = rng.ri((len - 1) as u32) as usize;
     let p_ptr = _ar.as_mut_ptr().add(p);
-    let n = INTERSTING_16[ri(INTERSTING_16.len() as u32) as usize] as u16;
-    let n = if ri(2) != 0 { n } else { swap16(n) };
+    let n = INTERSTING_16[rng.ri(INTERSTING_16.len() as u32) as usize] as u16;
+    let n = if rng.ri(2) != 0 { n } else { swap16(n) };
     ptr::copy_nonoverlapping(&n as *const u16 as *const u8, p_ptr, 2);
 }
 
 #[inline]
-unsafe fn dword_intersting(_ar: &mut [u8], len: usize) {
+unsafe fn dword_intersting(rng: &mut ChainRng, _ar: &mut [u8], len: usize) {
     //! Set a random dword in the byte array to an interesting value
     if len < 4 { return; }
-    let p = ri((len - 3) as u32) as usize;
+    let p = rng.ri((len - 3) as u32) as usize;
     let p_ptr = _ar.as_mut_ptr().add(p);
-    let n = INTERSTING_32[ri(INTERSTING_32.len() as u32) as usize] as u32;
-    let n = if ri(2) != 0 { n } else { swap32(n) };
+    let n = INTERSTING_32[rng.ri(INTERSTING_32.len() as u32) as usize] as u32;
+    let n = if rng.ri(2) != 0 { n } else { swap32(n) };
     ptr::copy_nonoverlapping(&n as *const u32 as *const u8, p_ptr, 4);
 }
 
 #[inline]
-fn byte_arith(_ar: &mut [u8], len: usize) {
+fn byte_arith(rng: &mut ChainRng, _ar: &mut [u8], len: usize) {
     //! Perform arithmetic operations on a random byte in the byte array
     if len == 0 {
         return;
     }
-    let p: usize = ri(len as u32) as usize;
-    if ri(2)!= 0 {
-        _ar[p] = _ar[p].wrapping_sub(1 + ri(ARITH_MAX) as u8);
+    let p: usize = rng.ri(len as u32) as usize;
+    if rng.ri(2)!= 0 {
+        _ar[p] = _ar[p].wrapping_sub(1 + rng.ri(ARITH_MAX) as u8);
     }else {
-        _ar[p] = _ar[p].wrapping_add(1+ ri(ARITH_MAX) as u8);
+        _ar[p] = _ar[p].wrapping_add(1+ rng.ri(ARITH_MAX) as u8);
     }
 }
 
 #[inline]
-unsafe fn word_arith(_ar: &mut [u8], len: usize) {
+unsafe fn word_arith(rng: &mut ChainRng, _ar: &mut [u8], len: usize) {
     //! Perform arithmetic operations on a random word in the byte array
     if len < 2 {
         return;
     }
-    let p = ri((len - 1) as u32) as usize;
+    let p = rng.ri((len - 1) as u32) as usize;
     let p_ptr = _ar.as_mut_ptr().add(p);
-    let n = 1 + ri(ARITH_MAX) as u16;
+    let n = 1 + rng.ri(ARITH_MAX) as u16;
 
     let val = ptr::read_unaligned(p_ptr as *const u16);
     let mutated: u16;
-    if ri(2) != 0 {
-        if ri(2) != 0 {
+    if rng.ri(2) != 0 {
+        if rng.ri(2) != 0 {
             mutated = val.wrapping_sub(1 + n);
         } else {
             mutated = swap16(swap16(val).wrapping_sub(n));
         }
     } else {
-        if ri(2) != 0 {
+        if rng.ri(2) != 0 {
             mutated = val.wrapping_add(1 + n);
         } else {
             mutated = swap16(swap16(val).wrapping_add(n));
@@ -224,25 +224,25 @@ unsafe fn word_arith(_ar: &mut [u8], len: usize) {
 }
 
 #[inline]
-unsafe fn dword_arith(_ar: &mut [u8], len: usize) {
+unsafe fn dword_arith(rng: &mut ChainRng, _ar: &mut [u8], len: usize) {
     //! Perform arithmetic operations on a random dword in the byte array
     if len < 4 {
         return;
     }
-    let p = ri((len - 3) as u32) as usize;
+    let p = rng.ri((len - 3) as u32) as usize;
     let p_ptr = _ar.as_mut_ptr().add(p);
-    let n = 1 + ri(ARITH_MAX) as u32;
+    let n = 1 + rng.ri(ARITH_MAX) as u32;
 
     let val = ptr::read_unaligned(p_ptr as *const u32);
     let mutated: u32;
-    if ri(2) != 0 {
-        if ri(2) != 0 {
+    if rng.ri(2) != 0 {
+        if rng.ri(2) != 0 {
             mutated = val.wrapping_sub(1 + n);
         } else {
             mutated = swap32(swap32(val).wrapping_sub(n));
         }
     } else {
-        if ri(2) != 0 {
+        if rng.ri(2) != 0 {
             mutated = val.wrapping_add(1 + n);
         } else {
             mutated = swap32(swap32(val).wrapping_add(n));
@@ -252,25 +252,25 @@ unsafe fn dword_arith(_ar: &mut [u8], len: usize) {
 }
 
 #[inline]
-fn byte_random(_ar: &mut [u8], len: usize){
+fn byte_random(rng: &mut ChainRng, _ar: &mut [u8], len: usize){
     //! Set a random byte in the byte array to a random value
     if len == 0 {
         return;
     }
-    let p: usize = ri(len as u32) as usize;
-    _ar[p] ^= 1 + ri(255) as u8;
+    let p: usize = rng.ri(len as u32) as usize;
+    _ar[p] ^= 1 + rng.ri(255) as u8;
 }
 
 #[inline]
-unsafe fn bytes_random(_ar: &mut [u8], len: usize){
+unsafe fn bytes_random(rng: &mut ChainRng, _ar: &mut [u8], len: usize){
     //! Randomly modify a block of bytes in the byte array
     if len < 2 {
         return;
     }
-    let copy_len = choose_block_len((len - 1) as u32) as usize;
-    let copy_from = ri((len - copy_len + 1) as u32) as usize;
-    let copy_to = ri((len - copy_len + 1) as u32) as usize;
-    if ri(4) != 0 {
+    let copy_len = choose_block_len(rng, (len - 1) as u32) as usize;
+    let copy_from = rng.ri((len - copy_len + 1) as u32) as usize;
+    let copy_to = rng.ri((len - copy_len + 1) as u32) as usize;
+    if rng.ri(4) != 0 {
         if copy_from != copy_to {
             ptr::copy(
                 _ar.as_ptr().add(copy_from),
@@ -279,23 +279,23 @@ unsafe fn bytes_random(_ar: &mut [u8], len: usize){
             );
         }
     } else {
-        let fill_byte: u8 = if ri(2) != 0 {
-            ri(255) as u8
+        let fill_byte: u8 = if rng.ri(2) != 0 {
+            rng.ri(255) as u8
         } else {
-            _ar[ri(len as u32) as usize]
+            _ar[rng.ri(len as u32) as usize]
         };
         ptr::write_bytes(_ar.as_mut_ptr().add(copy_to), fill_byte, copy_len);   
     }
 }
 
 #[inline]
-unsafe fn random_delete_bytes(_ar: &mut [u8], len: &mut usize){
+unsafe fn random_delete_bytes(rng: &mut ChainRng, _ar: &mut [u8], len: &mut usize){
     //! Randomly delete a block of bytes from the byte array
     if *len < 2 {
         return;
     }
-    let del_len = ri((*len - 1) as u32) as usize;
-    let del_from = ri((*len - del_len) as u32) as usize;
+    let del_len = rng.ri((*len - 1) as u32) as usize;
+    let del_from = rng.ri((*len - del_len) as u32) as usize;
     ptr::copy(
         _ar.as_ptr().add(del_from + del_len),
         _ar.as_mut_ptr().add(del_from),
@@ -305,24 +305,24 @@ unsafe fn random_delete_bytes(_ar: &mut [u8], len: &mut usize){
 }
 
 #[inline]
-unsafe fn random_grow_bytes(_ar: &mut Vec<u8>, len: &mut usize){
+unsafe fn random_grow_bytes(rng: &mut ChainRng, _ar: &mut Vec<u8>, len: &mut usize){
     //! Randomly grow the byte array by inserting or cloning a block of bytes
     if *len == 0 || *len > MAX_STR_LEN {
         return;
     }
-    let clone_or_insert = ri(4);
+    let clone_or_insert = rng.ri(4);
     let growth_len: usize;
     let growth_from: usize;
 
     if clone_or_insert != 0 {
-        growth_len = choose_block_len(*len as u32) as usize;
-        growth_from = ri((*len - growth_len + 1) as u32) as usize;
+        growth_len = choose_block_len(rng, *len as u32) as usize;
+        growth_from = rng.ri((*len - growth_len + 1) as u32) as usize;
     } else {
-        growth_len = choose_block_len(HAVOC_BLK_XL as u32) as usize;
+        growth_len = choose_block_len(rng, HAVOC_BLK_XL as u32) as usize;
         growth_from = 0;
     }
 
-    let growth_to = ri((*len) as u32) as usize;
+    let growth_to = rng.ri((*len) as u32) as usize;
 
     let mut new_buf: Vec<u8> = Vec::with_capacity(*len + growth_len + 1);
     new_buf.extend_from_slice(&_ar[..growth_to]);
@@ -330,10 +330,10 @@ unsafe fn random_grow_bytes(_ar: &mut Vec<u8>, len: &mut usize){
     if clone_or_insert != 0 {
         new_buf.extend_from_slice(&_ar[growth_from..growth_from + growth_len]);
     } else {
-        let fill_byte: u8 = if ri(2) != 0 {
-            ri(256) as u8
+        let fill_byte: u8 = if rng.ri(2) != 0 {
+            rng.ri(256) as u8
         } else {
-            _ar[ri(*len as u32) as usize]
+            _ar[rng.ri(*len as u32) as usize]
         };
         new_buf.extend(std::iter::repeat(fill_byte).take(growth_len));
     }
@@ -344,36 +344,98 @@ unsafe fn random_grow_bytes(_ar: &mut Vec<u8>, len: &mut usize){
     _ar.extend_from_slice(&new_buf);
 }
 
-pub unsafe fn havoc(ar: &mut Vec<u8>, len: &mut usize, is_str:bool){
+#[inline]
+unsafe fn havoc_op(rng: &mut ChainRng, ar: &mut [u8], len: usize, op: u32) {
+    //! Apply one of the length-preserving havoc operations
+    match op {
+        0 => bitflip_1(rng, ar, len),
+        1 => byte_intersting(rng, ar, len),
+        2 => word_intersting(rng, ar, len),
+        3 => dword_intersting(rng, ar, len),
+        4 => byte_arith(rng, ar, len),
+        5 => word_arith(rng, ar, len),
+        6 => dword_arith(rng, ar, len),
+        7 => byte_random(rng, ar, len),
+        8 => bytes_random(rng, ar, len),
+        _ => {}
+    }
+}
+
+pub unsafe fn havoc(rng: &mut ChainRng, ar: &mut Vec<u8>, len: &mut usize, is_str:bool){
     //! Perform a series of random mutations on the byte array
-    let use_stacking = (1 as u32) << (1+ri(7));
+    let use_stacking = (1 as u32) << (1+rng.ri(7));
     for _ in 0..use_stacking {
         let op = if is_str{
-            ri(11)
+            rng.ri(11)
         } else {
-            ri(9)
+            rng.ri(9)
         };
         match op {
-            0 => bitflip_1(ar, *len),
-            1 => byte_intersting(ar, *len),
-            2 => word_intersting(ar, *len),
-            3 => dword_intersting(ar, *len),
-            4 => byte_arith(ar, *len),
-            5 => word_arith(ar, *len),
-            6 => dword_arith(ar, *len),
-            7 => byte_random(ar, *len),
-            8 => bytes_random(ar, *len),
             9 => {
                 if is_str {
-                    random_delete_bytes(ar, len);
+                    random_delete_bytes(rng, ar, len);
                 }
             }
             10 => {
                 if is_str {
-                    random_grow_bytes(ar, len);
+                    random_grow_bytes(rng, ar, len);
                 }
             }
-            _ => {}
+            _ => havoc_op(rng, ar, *len, op),
+        }
+    }
+}
+
+pub fn mutate_int_value(rng: &mut ChainRng, value: i32) -> i32 {
+    //! Mutate an integer by treating it as a byte array
+    let mut byte_array = value.to_le_bytes().to_vec(); // 转换为小端字节序的字节数组
+    let mut len = byte_array.len();
+    unsafe {
+        havoc(rng, &mut byte_array, &mut len, false);
+    }
+    i32::from_le_bytes(byte_array.as_slice().try_into().unwrap())
+}
+
+pub fn mutate_float_value(rng: &mut ChainRng, value: f32) -> f32 {
+    //! Mutate a float by treating it as a byte array
+    let mut byte_array = value.to_le_bytes().to_vec(); // 转换为小端字节序的字节数组
+    let mut len = byte_array.len();
+    unsafe {
+        havoc(rng, &mut byte_array, &mut len, false);
+    }
+    f32::from_le_bytes(byte_array.as_slice().try_into().unwrap())
+}
+
+pub fn mutate_str_value(rng: &mut ChainRng, value: &str) -> String {
+    //! Mutate a string by treating it as a byte array
+    let mut byte_array = value.as_bytes().to_vec();
+    let mut len = byte_array.len();
+    unsafe {
+        havoc(rng, &mut byte_array, &mut len, true);
+    }
+    String::from_utf8_lossy(&byte_array).to_string()
+}
+
+pub fn mutate_bytes_value(rng: &mut ChainRng, value: &[u8]) -> Vec<u8> {
+    //! Mutate a bytes object by treating it as a byte array
+    let mut byte_array = value.to_vec();
+    let mut len = byte_array.len();
+    unsafe {
+        havoc(rng, &mut byte_array, &mut len, false);
+    }
+    byte_array
+}
+
+pub fn mutate_buffer_value(rng: &mut ChainRng, buf: &mut [u8]) {
+    //! Mutate a buffer in place without changing its length, e.g. the data of an array
+    // ri 只接受 u32，超过 4 GiB 的缓冲区只变异其前 4 GiB
+    let len = buf.len().min(u32::MAX as usize);
+    let buf = &mut buf[..len];
+    unsafe {
+        let use_stacking = (1 as u32) << (1 + rng.ri(7));
+        for _ in 0..use_stacking {
+            let op = rng.ri(9);
+            havoc_op(rng, buf, len, op);
         }
     }
 }
@@ -385,65 +447,68 @@ mod tests {
     #[test]
     fn test_mutations_zero_length() {
         //! Test mutation functions with zero-length input
+        let mut rng = ChainRng::new(4399);
         let mut byte_array: Vec<u8> = vec![];
         let mut len = byte_array.len();
 
         unsafe {
-            bitflip_1(&mut byte_array, len);
-            byte_intersting(&mut byte_array, len);
-            word_intersting(&mut byte_array, len);
-            dword_intersting(&mut byte_array, len);
-            byte_arith(&mut byte_array, len);
-            word_arith(&mut byte_array, len);
-            dword_arith(&mut byte_array, len);
-            byte_random(&mut byte_array, len);
-            bytes_random(&mut byte_array, len);
-            random_delete_bytes(&mut byte_array, &mut len);
-            random_grow_bytes(&mut byte_array, &mut len);
+            bitflip_1(&mut rng, &mut byte_array, len);
+            byte_intersting(&mut rng, &mut byte_array, len);
+            word_intersting(&mut rng, &mut byte_array, len);
+            dword_intersting(&mut rng, &mut byte_array, len);
+            byte_arith(&mut rng, &mut byte_array, len);
+            word_arith(&mut rng, &mut byte_array, len);
+            dword_arith(&mut rng, &mut byte_array, len);
+            byte_random(&mut rng, &mut byte_array, len);
+            bytes_random(&mut rng, &mut byte_array, len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
+            random_grow_bytes(&mut rng, &mut byte_array, &mut len);
         }
     }
 
     #[test]
     fn test_mutations_1_length() {
         //! Test mutation functions with 1-length input
+        let mut rng = ChainRng::new(4399);
         let mut byte_array: Vec<u8> = vec![0];
         let mut len = byte_array.len();
 
         unsafe {
-            bitflip_1(&mut byte_array, len);
-            byte_intersting(&mut byte_array, len);
-            word_intersting(&mut byte_array, len);
-            dword_intersting(&mut byte_array, len);
-            byte_arith(&mut byte_array, len);
-            word_arith(&mut byte_array, len);
-            dword_arith(&mut byte_array, len);
-            byte_random(&mut byte_array, len);
-            bytes_random(&mut byte_array, len);
-            random_delete_bytes(&mut byte_array, &mut len);
-            random_delete_bytes(&mut byte_array, &mut len);
-            random_grow_bytes(&mut byte_array, &mut len);
+            bitflip_1(&mut rng, &mut byte_array, len);
+            byte_intersting(&mut rng, &mut byte_array, len);
+            word_intersting(&mut rng, &mut byte_array, len);
+            dword_intersting(&mut rng, &mut byte_array, len);
+            byte_arith(&mut rng, &mut byte_array, len);
+            word_arith(&mut rng, &mut byte_array, len);
+            dword_arith(&mut rng, &mut byte_array, len);
+            byte_random(&mut rng, &mut byte_array, len);
+            bytes_random(&mut rng, &mut byte_array, len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
+            random_grow_bytes(&mut rng, &mut byte_array, &mut len);
         }
     }
 
     #[test]
     fn test_mutations_2_length() {
         //! Test mutation functions with 2-length input
+        let mut rng = ChainRng::new(4399);
         let mut byte_array: Vec<u8> = vec![0, 1];
         let mut len = byte_array.len();
 
         unsafe {
-            bitflip_1(&mut byte_array, len);
-            byte_intersting(&mut byte_array, len);
-            word_intersting(&mut byte_array, len);
-            dword_intersting(&mut byte_array, len);
-            byte_arith(&mut byte_array, len);
-            word_arith(&mut byte_array, len);
-            dword_arith(&mut byte_array, len);
-            byte_random(&mut byte_array, len);
-            bytes_random(&mut byte_array, len);
-            random_delete_bytes(&mut byte_array, &mut len);
-            random_delete_bytes(&mut byte_array, &mut len);
-            random_grow_bytes(&mut byte_array, &mut len);
+            bitflip_1(&mut rng, &mut byte_array, len);
+            byte_intersting(&mut rng, &mut byte_array, len);
+            word_intersting(&mut rng, &mut byte_array, len);
+            dword_intersting(&mut rng, &mut byte_array, len);
+            byte_arith(&mut rng, &mut byte_array, len);
+            word_arith(&mut rng, &mut byte_array, len);
+            dword_arith(&mut rng, &mut byte_array, len);
+            byte_random(&mut rng, &mut byte_array, len);
+            bytes_random(&mut rng, &mut byte_array, len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
+            random_grow_bytes(&mut rng, &mut byte_array, &mut len);
         }
     }
 
@@ -451,29 +516,31 @@ mod tests {
     #[test]
     fn test_mutations_4_length() {
         //! Test mutation functions with 4-length input
+        let mut rng = ChainRng::new(4399);
         let mut byte_array: Vec<u8> = vec![0, 1, 2, 3];
         let mut len = byte_array.len();
 
 
         unsafe {
-            bitflip_1(&mut byte_array, len);
-            byte_intersting(&mut byte_array, len);
-            word_intersting(&mut byte_array, len);
-            dword_intersting(&mut byte_array, len);
-            byte_arith(&mut byte_array, len);
-            word_arith(&mut byte_array, len);
-            dword_arith(&mut byte_array, len);
-            byte_random(&mut byte_array, len);
-            bytes_random(&mut byte_array, len);
-            random_delete_bytes(&mut byte_array, &mut len);
-            random_delete_bytes(&mut byte_array, &mut len);
-            random_grow_bytes(&mut byte_array, &mut len);
+            bitflip_1(&mut rng, &mut byte_array, len);
+            byte_intersting(&mut rng, &mut byte_array, len);
+            word_intersting(&mut rng, &mut byte_array, len);
+            dword_intersting(&mut rng, &mut byte_array, len);
+            byte_arith(&mut rng, &mut byte_array, len);
+            word_arith(&mut rng, &mut byte_array, len);
+            dword_arith(&mut rng, &mut byte_array, len);
+            byte_random(&mut rng, &mut byte_array, len);
+            bytes_random(&mut rng, &mut byte_array, len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
+            random_grow_bytes(&mut rng, &mut byte_array, &mut len);
         }
     }
 
     #[test]
     fn test_mutations_8_length() {
         //! Test mutation functions with 8-length input
+        let mut rng = ChainRng::new(4399);
         let mut byte_array: Vec<u8> = vec![0,1,2,3,4,5,6,7];
         let mut len = byte_array.len();
 
@@ -482,49 +549,49 @@ mod tests {
 
         unsafe {
             previous_values.extend_from_slice(&byte_array);
-            bitflip_1(&mut byte_array, len);
+            bitflip_1(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            byte_intersting(&mut byte_array, len);
+            byte_intersting(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            word_intersting(&mut byte_array, len);
+            word_intersting(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            dword_intersting(&mut byte_array, len);
+            dword_intersting(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            byte_arith(&mut byte_array, len);
+            byte_arith(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            word_arith(&mut byte_array, len);
+            word_arith(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            dword_arith(&mut byte_array, len);
+            dword_arith(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            byte_random(&mut byte_array, len);
+            byte_random(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            bytes_random(&mut byte_array, len);
+            bytes_random(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            random_delete_bytes(&mut byte_array, &mut len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
             assert_ne!(byte_array, previous_values);
             assert!(len < previous_len);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
             previous_len = len;
-            random_grow_bytes(&mut byte_array, &mut len);
+            random_grow_bytes(&mut rng, &mut byte_array, &mut len);
             assert_ne!(byte_array, previous_values);
             assert!(len > previous_len);
             previous_values.clear();
@@ -535,11 +602,12 @@ mod tests {
     #[test]
     fn test_mutations_max_length() {
         //! Test mutation functions with maximum-length input
+        let mut rng = ChainRng::new(4399);
         
         // Create a byte array of maximum length with random data
         let mut byte_array: Vec<u8> = vec![0; MAX_STR_LEN];
         for i in 0..MAX_STR_LEN {
-            byte_array[i] = ri(256) as u8;
+            byte_array[i] = rng.ri(256) as u8;
         }
         let mut len = byte_array.len();
 
@@ -548,49 +616,49 @@ mod tests {
 
         unsafe {
             previous_values.extend_from_slice(&byte_array);
-            bitflip_1(&mut byte_array, len);
+            bitflip_1(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            byte_intersting(&mut byte_array, len);
+            byte_intersting(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            word_intersting(&mut byte_array, len);
+            word_intersting(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            dword_intersting(&mut byte_array, len);
+            dword_intersting(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            byte_arith(&mut byte_array, len);
+            byte_arith(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            word_arith(&mut byte_array, len);
+            word_arith(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            dword_arith(&mut byte_array, len);
+            dword_arith(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            byte_random(&mut byte_array, len);
+            byte_random(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            bytes_random(&mut byte_array, len);
+            bytes_random(&mut rng, &mut byte_array, len);
             assert_ne!(byte_array, previous_values);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
-            random_delete_bytes(&mut byte_array, &mut len);
+            random_delete_bytes(&mut rng, &mut byte_array, &mut len);
             assert_ne!(byte_array, previous_values);
             assert!(len < previous_len);
             previous_values.clear();
             previous_values.extend_from_slice(&byte_array);
             previous_len = len;
-            random_grow_bytes(&mut byte_array, &mut len);
+            random_grow_bytes(&mut rng, &mut byte_array, &mut len);
             assert_ne!(byte_array, previous_values);
             assert!(len > previous_len);
             previous_values.clear();
@@ -601,9 +669,10 @@ mod tests {
     #[test]
     fn test_havoc_1000_times() {
         //! Test havoc function by applying it 1000 times
+        let mut rng = ChainRng::new(4399);
         let mut byte_array: Vec<u8> = vec![0; 100];
         for i in 0..100 {
-            byte_array[i] = ri(256) as u8;
+            byte_array[i] = rng.ri(256) as u8;
         }
         let mut len = byte_array.len();
 
@@ -613,7 +682,7 @@ mod tests {
         let mut eq_cnt = 0;
         unsafe {
             for _ in 0..500 {
-                havoc(&mut byte_array, &mut len, true);
+                havoc(&mut rng, &mut byte_array, &mut len, true);
                 if byte_array == previous_values {
                     eq_cnt += 1;
                 }
@@ -621,7 +690,7 @@ mod tests {
                 previous_values.extend_from_slice(&byte_array);
             }
             for _ in 0..500 {
-                havoc(&mut byte_array, &mut len, false);
+                havoc(&mut rng, &mut byte_array, &mut len, false);
                 if byte_array == previous_values {
                     eq_cnt += 1;
                 }
@@ -631,4 +700,34 @@ mod tests {
         }
         assert!(eq_cnt < 50);
     }
-}
\ No newline at end of file
+
+    #[test]
+    fn test_mutate_buffer_value() {
+        //! Test that mutating a buffer in place keeps its length
+        let mut rng = ChainRng::new(4399);
+        let original: Vec<u8> = (0..64).collect();
+        let mut changed = 0;
+        for _ in 0..100 {
+            let mut buf = original.clone();
+            mutate_buffer_value(&mut rng, &mut buf);
+            assert_eq!(buf.len(), original.len());
+            if buf != original {
+                changed += 1;
+            }
+        }
+        assert!(changed > 50);
+        mutate_buffer_value(&mut rng, &mut []);
+    }
+
+    #[test]
+    fn test_mutations_replay_from_state() {
+        //! Test that streams with the same state produce the same mutations
+        let mut rng = ChainRng::new(4399);
+        for _ in 0..100 {
+            let mut replay = rng;
+            let value = mutate_str_value(&mut rng, "hello world");
+            assert_eq!(mutate_str_value(&mut replay, "hello world"), value);
+            assert_eq!(replay.state, rng.state);
+        }
+    }
+}
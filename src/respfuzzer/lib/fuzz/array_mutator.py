@@ -0,0 +1,283 @@
+"""
+NumPy、pandas 和 torch 数组参数的变异。
+
+numpy、pandas、scipy、sklearn、torch 等目标库的大部分参数都是数组，之前这些数组落入
+`mutate_instance`：深拷贝后调用 `dir()` 并随机 setattr 一个成员，几乎得不到有意义的变异。
+本模块为数组提供专门的变异函数，每次变异只复制一次数组：
+
+  - 数据：在新副本的连续数据缓冲区上通过 buffer protocol 原地运行 Rust 的 havoc；
+  - 特殊值：向随机位置批量写入 NaN、±inf、类型的最值等；
+  - 形状与步长：展平、转置、增减维度、切片、重复以及非连续的视图；
+  - dtype：转换为随机选择的另一种 dtype。
+
+所有随机选择都通过 `randint` 完成，因此与其他变异一样可以由随机状态重放。这些库都是可选依赖，
+变异函数以 "模块.类名" 的形式注册到 `mutator` 的分派表，只有参数中真正出现数组时才会导入。
+"""
+
+from respfuzzer.lib.fuzz.mutate import mutate_buffer, randint
+
+MAX_ARRAY_SIZE = 1 << 24  # 重复元素后数组的元素数上限
+MAX_SPECIAL_VALUES = 16  # 每次注入的特殊值个数上限
+
+# havoc 只对这些 dtype 的原始字节有意义，其余（object、unicode 等）逐元素变异
+HAVOC_KINDS = "biufcmMSV"
+
+DTYPES = [
+    "bool",
+    "int8",
+    "int16",
+    "int32",
+    "int64",
+    "uint8",
+    "uint64",
+    "float16",
+    "float32",
+    "float64",
+    "complex64",
+    "complex128",
+]
+
+
+def _special_values(dtype) -> list:
+    import numpy as np
+
+    if dtype.kind in "fc":
+        finfo = np.finfo(dtype)
+        return [np.nan, np.inf, -np.inf, -0.0, finfo.max, finfo.min, finfo.tiny]
+    if dtype.kind in "iu":
+        iinfo = np.iinfo(dtype)
+        return [0, 1, -1 if dtype.kind == "i" else 0, iinfo.max, iinfo.min]
+    if dtype.kind == "b":
+        return [True, False]
+    if dtype.kind in "mM":
+        return [np.datetime64("NaT") if dtype.kind == "M" else np.timedelta64("NaT")]
+    return []
+
+
+def mutate_array_data(arr):
+    """
+    Run havoc over the raw bytes of a fresh copy of `arr`.
+    """
+    import numpy as np
+
+    new_val = np.array(arr, copy=True, order="C", subok=True)
+    if new_val.size == 0:
+        return new_val
+    if new_val.dtype.kind not in HAVOC_KINDS:
+        return mutate_array_element(new_val)
+    # 以 uint8 视图导出同一块内存，havoc 直接修改其内容
+    mutate_buffer(new_val.reshape(-1).view(np.uint8))
+    if new_val.dtype.kind == "b":
+        new_val = new_val.view(np.uint8).astype(bool)
+    return new_val
+
+
+def mutate_array_element(new_val):
+    """
+    Mutate one random element of `new_val` in place with `mutate_auto`.
+    """
+    from respfuzzer.lib.fuzz import mutator
+
+    import numpy as np
+
+    flat = new_val.reshape(-1)
+    index = randint(flat.size)
+    elem = flat[index]
+    # object 数组的元素本身就是 Python 对象，没有 item()
+    flat[index] = mutator.mutate_auto(
+        elem.item() if isinstance(elem, np.generic) else elem
+    )
+    return new_val
+
+
+def inject_special_values(arr):
+    """
+    Write NaN, infinities and extreme values to random positions of a copy.
+    """
+    import numpy as np
+
+    new_val = np.array(arr, copy=True, subok=True)
+    values = _special_values(new_val.dtype)
+    if new_val.size == 0 or not values:
+        return mutate_array_data(arr)
+    n = 1 + randint(min(new_val.size, MAX_SPECIAL_VALUES))
+    index = [randint(new_val.size) for _ in range(n)]
+    picked = [values[randint(len(values))] for _ in range(n)]
+    with np.errstate(all="ignore"):
+        new_val.reshape(-1)[index] = np.array(picked).astype(new_val.dtype)
+    return new_val
+
+
+def mutate_array_shape(arr):
+    """
+    Change the shape or strides of `arr`.
+    """
+    import numpy as np
+
+    # 所有形状变异都在同一份新副本上取视图，保留视图的步长且不与种子共享内存
+    new_val = np.array(arr, copy=True, subok=True)
+    ndim = new_val.ndim
+    op = randint(7)
+    if ndim == 0 and op >= 4:
+        return new_val.reshape(1)
+    if op == 0:
+        return new_val.reshape(-1)
+    elif op == 1:
+        return new_val.T  # 维数 ≥ 2 时得到 Fortran 顺序的步长
+    elif op == 2:
+        return np.expand_dims(new_val, randint(ndim + 1))
+    elif op == 3:
+        if ndim == 0 or 1 in new_val.shape:
+            return np.squeeze(new_val)
+        return new_val[..., :1]
+    axis = randint(ndim)
+    if op == 4:
+        # 沿随机一维切片
+        n = new_val.shape[axis]
+        start = randint(n + 1)
+        index = slice(start, start + randint(n - start + 1))
+    elif op == 5:
+        times = 2 + randint(8)
+        if new_val.size * times > MAX_ARRAY_SIZE:
+            return new_val
+        return np.repeat(new_val, times, axis=axis)
+    else:
+        # 负步长或跨步的视图，覆盖接收非连续数组的代码路径
+        index = slice(None, None, [-1, 2, -2][randint(3)])
+    return new_val[(slice(None),) * axis + (index,)]
+
+
+def mutate_array_dtype(arr):
+    """
+    Cast `arr` to a random dtype.
+    """
+    import numpy as np
+
+    dtype = DTYPES[randint(len(DTYPES))]
+    with np.errstate(all="ignore"):
+        return arr.astype(dtype, casting="unsafe")
+
+
+def mutate_ndarray(old_val):
+    """
+    Mutate the data, special values, shape or dtype of a NumPy array.
+    """
+    a = [
+        mutate_array_data,
+        inject_special_values,
+        mutate_array_shape,
+        mutate_array_dtype,
+    ]
+    b = randint(len(a))
+    mt = a[b]
+    try:
+        return mt(old_val)
+    except Exception:
+        # np.matrix 等子类不支持部分形状
+        return old_val
+
+
+def mutate_numpy_scalar(old_val):
+    """
+    Mutate a NumPy scalar such as `np.float32` while keeping its width.
+    """
+    import numpy as np
+
+    arr = np.asarray(old_val)
+    a = [mutate_array_data, inject_special_values]
+    b = randint(len(a))
+    try:
+        return a[b](arr)[()]
+    except Exception:
+        return old_val
+
+
+def mutate_array_values(arr):
+    """
+    Mutate the values of `arr` while keeping its shape, for pandas columns.
+    """
+    a = [mutate_array_data, inject_special_values]
+    b = randint(len(a))
+    return a[b](arr)
+
+
+def _take_rows(n: int) -> list[int]:
+    # 行的切片或重复
+    if n == 0:
+        return []
+    if randint(2) == 0:
+        start = randint(n)
+        stop = start + 1 + randint(n - start)
+        return list(range(start, stop))
+    return [randint(n) for _ in range(1 + randint(2 * n))]
+
+
+def mutate_series(old_val):
+    """
+    Mutate the values or the rows of a pandas Series.
+    """
+    try:
+        if randint(2) == 0:
+            return old_val.iloc[_take_rows(len(old_val))].copy()
+        values = mutate_array_values(old_val.to_numpy())
+        return type(old_val)(values, index=old_val.index, name=old_val.name)
+    except Exception:
+        return old_val
+
+
+def mutate_dataframe(old_val):
+    """
+    Mutate the values of a random column or the rows of a pandas DataFrame.
+    """
+    try:
+        n_columns = old_val.shape[1]
+        if randint(2) == 0 or n_columns == 0:
+            return old_val.iloc[_take_rows(len(old_val))].copy()
+        new_val = old_val.copy()
+        column = randint(n_columns)
+        new_val.isetitem(
+            column, mutate_array_values(old_val.iloc[:, column].to_numpy())
+        )
+        return new_val
+    except Exception:
+        return old_val
+
+
+def mutate_tensor(old_val):
+    """
+    Mutate a torch tensor through its NumPy view, keeping the device and
+    `requires_grad`.
+    """
+    import torch
+
+    try:
+        tensor = old_val.detach().cpu()
+        try:
+            arr = tensor.numpy()  # CPU 张量与 numpy 数组共享内存，不复制
+            dtype = None
+        except TypeError:
+            # bfloat16 等 numpy 不支持的 dtype
+            dtype = tensor.dtype
+            arr = tensor.float().numpy()
+        new_arr = mutate_ndarray(arr)
+        if any(stride < 0 for stride in new_arr.strides):
+            new_arr = new_arr.copy()  # torch 不支持负步长
+        new_val = torch.from_numpy(new_arr)
+        if dtype is not None and new_val.dtype == torch.float32:
+            new_val = new_val.to(dtype)
+        new_val = new_val.to(old_val.device)
+        if old_val.requires_grad and new_val.is_floating_point():
+            new_val.requires_grad_()
+        return new_val
+    except Exception:
+        return old_val
+
+
+# 以 "模块.类名" 注册，导入 mutator 时不需要导入这些库
+ARRAY_MUTATORS = {
+    "numpy.ndarray": mutate_ndarray,
+    "numpy.generic": mutate_numpy_scalar,
+    "pandas.core.series.Series": mutate_series,
+    "pandas.core.frame.DataFrame": mutate_dataframe,
+    "torch.Tensor": mutate_tensor,
+}
@@ -0,0 +1,100 @@
+"""
+种子执行时间的校准。
+
+之前两条 fuzz 循环都使用固定的超时猜测（`execution_timeout + 变异次数 / 100`），执行
+很快的函数也要等满 5 秒才能判定卡死，而执行较慢的函数又容易被误杀。本模块在 fuzz 之前
+把种子重复执行若干次，测得其基线执行时间的分布，并据此推导出每个函数的期限：
+
+  - exec_timeout：单次执行的期限，取 p99 × `timeout_multiplier`，并限制在
+    [`timeout_floor`, `execution_timeout`] 之间；
+  - exec_time：执行时间的中位数，用于估算一个变异体完成全部数据级变异所需的总时间。
+
+两者随种子一起保存在数据库中，变异体沿用其种子的期限。
+"""
+
+import math
+import time
+from typing import Callable, NamedTuple
+
+from loguru import logger
+
+from respfuzzer.models import Seed
+
+MIN_EXEC_TIME = 1e-3  # 估算总时间时，单次执行至少按 1ms 计
+
+
+class Timing(NamedTuple):
+    exec_time: float
+    exec_timeout: float
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """
+    Return the `q`-th percentile of `samples` using the nearest-rank method.
+    """
+    ordered = sorted(samples)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def derive_timing(samples: list[float], config: dict) -> Timing:
+    """
+    Derive the per-function deadlines from the measured runtimes `samples`.
+    """
+    ceiling = config["execution_timeout"]
+    floor = min(config.get("timeout_floor", 0.1), ceiling)
+    k = config.get("timeout_multiplier", 5.0)
+    exec_timeout = min(max(percentile(samples, 99) * k, floor), ceiling)
+    exec_time = min(max(percentile(samples, 50), MIN_EXEC_TIME), ceiling)
+    return Timing(exec_time, exec_timeout)
+
+
+def calibrate_seed(
+    seed: Seed, run_once: Callable[[float], object], config: dict
+) -> Timing:
+    """
+    Measure the baseline runtime of `seed` and store the derived deadlines in
+    `seed.exec_time` and `seed.exec_timeout`.
+
+    Args:
+        seed: The seed to calibrate.
+        run_once: Executes the seed once with the given timeout in seconds.
+        config: The `[fuzz]` configuration.
+
+    Returns:
+        Timing: The derived deadlines.
+    """
+    ceiling = config["execution_timeout"]
+    runs = max(config.get("calibration_runs", 5), 1)
+
+    run_once(ceiling)  # 预热：首次执行包含导入等一次性开销，不计入样本
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        run_once(ceiling)
+        dt = time.perf_counter() - t0
+        samples.append(dt)
+        if dt >= ceiling:
+            break  # 已经卡死，再执行也只会得到同样的结果
+
+    timing = derive_timing(samples, config)
+    seed.exec_time, seed.exec_timeout = timing
+    logger.info(
+        f"Calibrated seed {seed.id} ({seed.func_name}): median {timing.exec_time * 1000:.2f}ms, "
+        f"deadline {timing.exec_timeout:.3f}s over {len(samples)} runs"
+    )
+    return timing
+
+
+def mutant_budget(seed: Seed, n_execs: int, config: dict) -> float:
+    """
+    Return the time budget of fuzzing a mutant of `seed` with `n_execs`
+    data-level mutations.
+    """
+    if seed.exec_timeout is None:
+        # 未校准的种子沿用之前的估计：大部分测试用例的执行都在10ms以内完成
+        return config["execution_timeout"] + n_execs / 100
+    k = config.get("timeout_multiplier", 5.0)
+    exec_time = max(seed.exec_time or 0.0, MIN_EXEC_TIME)
+    # 一份期限留给变异体自身的代码，一份留给被 SIGALRM 打断的卡死执行
+    return 2 * seed.exec_timeout + n_execs * exec_time * k
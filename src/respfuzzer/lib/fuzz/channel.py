@@ -0,0 +1,212 @@
+"""
+父进程与执行 worker 之间的低开销通信通道。
+
+通道基于一条双工 `multiprocessing.Pipe`，只传输定长的二进制帧（`send_bytes`/`recv_bytes`
+直接写管道，不经过 `Queue` 的 feeder 线程，也不 pickle 整个 Seed/Mutant）：
+
+  - DEFINE 帧：在某个程序第一次发往某个 worker 时携带其库名、函数名、源码和校准得到的
+    单次执行期限，worker 按程序哈希缓存下来；
+  - 命令帧：`(opcode, 程序哈希, seed id, 随机流种子)`，之后的执行只需要发送这一条定长记录；
+    两端各自按 LRU 保留最近使用的 `[fuzz] code_cache_size` 个程序，且以相同的顺序访问，
+    父进程据此得知 worker 淘汰了哪些程序，再次发送时重新附上 DEFINE 帧；
+  - 结果帧：`(status, 执行次数, 新增覆盖位数, CPU 时间)` 的定长状态记录，之后依次附上
+    各异常类型被抛出的次数和类型名。
+"""
+
+import hashlib
+import struct
+from collections import OrderedDict
+from multiprocessing.connection import Connection
+from typing import NamedTuple
+
+from respfuzzer.lib.fuzz.code_cache import CODE_CACHE_SIZE, code_hash
+from respfuzzer.models import HasCode
+
+OP_EXIT = 0
+OP_EXECUTE = 1
+OP_FUZZ = 2
+OP_FEEDBACK_FUZZ = 3
+OP_DEFINE = 255
+
+STATUS_OK = 0
+STATUS_EXCEPTION = 1
+STATUS_TIMEOUT = 2
+STATUS_CRASH = 3
+
+_COMMAND = struct.Struct("<B16sqQ")  # opcode, program key, seed id, random stream
+# opcode, program key, seed id, len(lib), len(func), exec timeout (0 if uncalibrated)
+_DEFINE = struct.Struct("<B16sqHHd")
+# status, exec count, new coverage bits, CPU seconds, number of exception types
+_RESULT = struct.Struct("<BIIdH")
+_EXCEPTION = struct.Struct("<IB")  # count, len(type name)
+
+_NO_KEY = bytes(16)
+
+
+class Program(NamedTuple):
+    """
+    The worker-side view of a seed or mutant, satisfying `HasCode`.
+    """
+
+    id: int | None
+    library_name: str
+    func_name: str
+    function_call: str
+    code_key: str
+    exec_timeout: float | None = None
+
+
+class Result(NamedTuple):
+    status: int
+    exec_cnt: int
+    new_cov: int
+    cpu_time: float = 0.0
+    exceptions: tuple[tuple[str, int], ...] = ()  # (type name, count)
+
+
+def program_key(seed: HasCode) -> bytes:
+    """
+    Return the 16-byte key identifying `seed`'s program.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in (seed.library_name, seed.func_name, seed.function_call):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    h.update(struct.pack("<d", seed.exec_timeout or 0.0))
+    return h.digest()
+
+
+class ParentChannel:
+    """
+    The parent end of a worker channel.
+    """
+
+    def __init__(self, conn: Connection, max_programs: int = CODE_CACHE_SIZE) -> None:
+        self.conn = conn
+        self.max_programs = max_programs
+        # 与 WorkerChannel.programs 同步淘汰的程序哈希
+        self.known: OrderedDict[bytes, None] = OrderedDict()
+
+    def send_command(
+        self, opcode: int, seed: HasCode | None = None, stream: int = 0
+    ) -> None:
+        """
+        Send `opcode` with `seed`, whose mutations draw from the random
+        `stream` (0 lets the worker derive one), see `respfuzzer.lib.fuzz.seeding`.
+        """
+        if seed is None:
+            self.conn.send_bytes(_COMMAND.pack(opcode, _NO_KEY, -1, 0))
+            return
+        key = program_key(seed)
+        seed_id = seed.id if seed.id is not None else -1
+        if key in self.known:
+            self.known.move_to_end(key)
+        else:
+            lib = seed.library_name.encode("utf-8")
+            func = seed.func_name.encode("utf-8")
+            exec_timeout = seed.exec_timeout or 0.0
+            header = _DEFINE.pack(
+                OP_DEFINE, key, seed_id, len(lib), len(func), exec_timeout
+            )
+            self.conn.send_bytes(
+                header + lib + func + seed.function_call.encode("utf-8")
+            )
+            self.known[key] = None
+            if len(self.known) > self.max_programs:
+                self.known.popitem(last=False)
+        self.conn.send_bytes(_COMMAND.pack(opcode, key, seed_id, stream))
+
+    def recv_result(self, timeout: float) -> Result:
+        """
+        Wait up to `timeout` seconds for the result of the last command.
+
+        Returns:
+            Result: The reported result, or a synthesized one with
+            `STATUS_TIMEOUT`/`STATUS_CRASH` if the worker hangs or died.
+        """
+        try:
+            if not self.conn.poll(timeout):
+                return Result(STATUS_TIMEOUT, 0, 0)
+            frame = self.conn.recv_bytes()
+        except (EOFError, OSError):
+            return Result(STATUS_CRASH, 0, 0)
+        status, exec_cnt, new_cov, cpu_time, n_types = _RESULT.unpack_from(frame)
+        exceptions = []
+        offset = _RESULT.size
+        for _ in range(n_types):
+            count, name_len = _EXCEPTION.unpack_from(frame, offset)
+            offset += _EXCEPTION.size
+            name = frame[offset : offset + name_len].decode("utf-8", "replace")
+            offset += name_len
+            exceptions.append((name, count))
+        return Result(status, exec_cnt, new_cov, cpu_time, tuple(exceptions))
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class WorkerChannel:
+    """
+    The worker end of a channel, which caches programs by key.
+    """
+
+    def __init__(self, conn: Connection, max_programs: int = CODE_CACHE_SIZE) -> None:
+        self.conn = conn
+        self.max_programs = max_programs
+        self.programs: OrderedDict[bytes, Program] = OrderedDict()
+        self.stream = 0  # random stream of the last command
+
+    def poll(self, timeout: float) -> bool:
+        return self.conn.poll(timeout)
+
+    def recv_command(self) -> tuple[int, Program | None]:
+        """
+        Receive the next command, transparently handling DEFINE frames.
+        """
+        while True:
+            frame = self.conn.recv_bytes()
+            if frame[0] != OP_DEFINE:
+                opcode, key, _, self.stream = _COMMAND.unpack(frame)
+                program = self.programs.get(key)
+                if program is not None:
+                    self.programs.move_to_end(key)
+                return opcode, program
+            _, key, seed_id, lib_len, func_len, exec_timeout = _DEFINE.unpack_from(
+                frame
+            )
+            body = frame[_DEFINE.size :]
+            lib = body[:lib_len].decode("utf-8")
+            func = body[lib_len : lib_len + func_len].decode("utf-8")
+            source = body[lib_len + func_len :].decode("utf-8")
+            self.programs[key] = Program(
+                seed_id if seed_id >= 0 else None,
+                lib,
+                func,
+                source,
+                code_hash(source),
+                exec_timeout or None,
+            )
+            if len(self.programs) > self.max_programs:
+                self.programs.popitem(last=False)
+
+    def send_result(
+        self,
+        status: int,
+        exec_cnt: int = 0,
+        new_cov: int = 0,
+        cpu_time: float = 0.0,
+        exceptions: dict[str, int] | None = None,
+    ) -> None:
+        """
+        Report the result of the last command: the executions it completed,
+        the coverage bits it added, the CPU seconds it used and how many
+        times each exception type was raised.
+        """
+        items = list((exceptions or {}).items())[:0xFFFF]
+        parts = [
+            _RESULT.pack(status, exec_cnt, max(new_cov, 0), cpu_time, len(items))
+        ]
+        for name, count in items:
+            raw = name.encode("utf-8")[:0xFF]
+            parts.append(_EXCEPTION.pack(min(count, 0xFFFFFFFF), len(raw)) + raw)
+        self.conn.send_bytes(b"".join(parts))
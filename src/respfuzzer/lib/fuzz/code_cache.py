@@ -0,0 +1,89 @@
+"""
+种子/变异体代码的编译缓存。
+
+`seed.function_call` 以源码形式保存，每次 `exec` 都需要重新解析和编译。本模块以源码
+内容的哈希为键缓存编译后的 code object：进程内缓存在内存中；若配置了
+`[fuzz] code_cache_dir`，还会以 marshal 格式持久化到磁盘，供之后启动的 worker 复用。
+
+几乎每个 LLM 变异体的源码都不相同，而常驻 worker、zygote 和 fork server 会存活整个
+campaign，因此内存中的缓存按 LRU 淘汰，最多保留 `[fuzz] code_cache_size` 个 code object。
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from types import CodeType
+
+from loguru import logger
+
+from respfuzzer.utils.config import get_config
+
+_config = get_config("fuzz")
+CODE_CACHE_SIZE = max(_config.get("code_cache_size", 1024), 1)
+_code_cache: OrderedDict[str, CodeType] = OrderedDict()
+_cache_dir = _config.get("code_cache_dir")
+_cache_dir = Path(_cache_dir) if _cache_dir else None
+
+
+def code_hash(source: str) -> str:
+    """
+    Return the content hash used as the cache key of `source`.
+    """
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _disk_path(key: str) -> Path:
+    # marshal 格式与解释器版本相关，因此文件名中带上 cache_tag
+    return _cache_dir / f"{key}.{sys.implementation.cache_tag}.marshal"
+
+
+def _load_from_disk(key: str) -> CodeType | None:
+    try:
+        with open(_disk_path(key), "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _dump_to_disk(key: str, code: CodeType) -> None:
+    path = _disk_path(key)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        _cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            marshal.dump(code, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to persist compiled code {key}: {e}")
+
+
+def compile_cached(source: str, key: str | None = None) -> CodeType:
+    """
+    Compile `source` in "exec" mode, reusing a cached code object if the same
+    source has been compiled before.
+
+    Args:
+        source: Python source code.
+        key: Precomputed `code_hash(source)`, if already known.
+
+    Raises:
+        SyntaxError: If `source` is not valid Python code.
+    """
+    key = key or code_hash(source)
+    code = _code_cache.get(key)
+    if code is not None:
+        _code_cache.move_to_end(key)
+        return code
+    if _cache_dir is not None:
+        code = _load_from_disk(key)
+    if code is None:
+        code = compile(source, "<string>", "exec")
+        if _cache_dir is not None:
+            _dump_to_disk(key, code)
+    _code_cache[key] = code
+    if len(_code_cache) > CODE_CACHE_SIZE:
+        _code_cache.popitem(last=False)
+    return code
@@ -0,0 +1,185 @@
+"""
+数据级变异的覆盖率引导语料库。
+
+之前 `fuzz_function_feedback` 的每次变异都从种子的原始参数出发，触发了新覆盖的变异结果
+随即被丢弃。本模块在 worker 进程内为每个目标函数维护一个 AFL 风格的语料库：
+
+  - 执行后覆盖率位图增加的参数列表被 pickle 后保存为一个条目（无法 pickle 的对象直接保存
+    引用），以结构哈希去除重复条目，详见 `respfuzzer.lib.fuzz.dedup`；
+  - 之后的变异从语料库中依次选取父条目，每个父条目连续变异一批；
+  - favored 条目（当前调用的原始参数以及单位执行时间内新增覆盖不低于中位数的条目）优先
+    被选中，其他条目按照 AFL 的概率被跳过；
+  - 条目数超过 `[fuzz] corpus_max_entries` 时淘汰得分最低的条目。
+
+所有随机选择都通过 `randint` 完成，同一条随机流上的一次运行可以完整重放。从语料库条目
+变异出的输入依赖于之前的执行结果，不能只凭随机状态对种子重放：每一批变异的父条目与随机状态
+一起写入日志，父进程恢复崩溃或超时的变异时把父条目保存下来，`replay_mutation` 变异该父条目
+而不是种子的原始参数，详见 `respfuzzer.lib.fuzz.journal`。无法 pickle 的父条目不能重放。
+
+语料库以函数名以及参数的个数和关键字为键，同一个函数在不同变异体中的调用共享语料库。
+"""
+
+import pickle
+
+from loguru import logger
+
+from respfuzzer.lib.fuzz.dedup import structural_hash
+from respfuzzer.lib.fuzz.mutate import randint
+from respfuzzer.utils.config import get_config
+
+_config = get_config("fuzz")
+CORPUS_ENABLED = _config.get("corpus_enabled", True)
+_max_entries = max(_config.get("corpus_max_entries", 256), 2)
+
+MIN_EXEC_TIME = 1e-6  # 计算得分时，单次执行至少按 1us 计
+
+# AFL 跳过条目的概率（百分比）
+SKIP_TO_NEW_PROB = 99  # 存在尚未变异的 favored 条目时，跳过其他条目
+SKIP_NFAV_OLD_PROB = 95  # 跳过已经变异过的非 favored 条目
+SKIP_NFAV_NEW_PROB = 75  # 跳过尚未变异的非 favored 条目
+
+
+class CorpusEntry:
+    """
+    A parameter list kept in the corpus, with the coverage it discovered.
+    """
+
+    def __init__(self, param_list: list, new_cov: int, exec_time: float) -> None:
+        try:
+            self.data = pickle.dumps(param_list, protocol=pickle.HIGHEST_PROTOCOL)
+            self.pickled = True
+        except Exception:
+            self.data = param_list
+            self.pickled = False
+        self.hash = structural_hash(param_list)
+        self.new_cov = new_cov
+        self.exec_time = exec_time
+        self.favored = False
+        self.n_fuzz = 0  # 作为父条目被选中的次数
+
+    @property
+    def score(self) -> float:
+        return self.new_cov / max(self.exec_time, MIN_EXEC_TIME)
+
+    def params(self) -> list:
+        """
+        Return a fresh copy of the parameter list of the entry.
+        """
+        if self.pickled:
+            try:
+                return pickle.loads(self.data)
+            except Exception:
+                pass
+        return list(self.data)
+
+
+class Corpus:
+    """
+    The corpus of one target function.
+
+    Example:
+    >>> corpus = get_corpus(full_name, args, kwargs)
+    >>> parent = corpus.next_parent()
+    >>> corpus.add(mt_param_list, new_cov, exec_time)
+    """
+
+    def __init__(self, max_entries: int = _max_entries) -> None:
+        self.max_entries = max_entries
+        self.entries: list[CorpusEntry] = []
+        self.current: CorpusEntry | None = None  # 当前调用的原始参数
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _find(self, h: int | None) -> CorpusEntry | None:
+        if h is None:
+            return None
+        return next((e for e in self.entries if e.hash == h), None)
+
+    def set_current(self, param_list: list) -> None:
+        """
+        Add the unmutated arguments of the current call as a favored entry.
+        """
+        entry = self._find(structural_hash(param_list))
+        if entry is None:
+            entry = CorpusEntry(param_list, 0, 0.0)
+            self._append(entry)
+        self.current = entry
+        self.cull()
+
+    def add(self, param_list: list, new_cov: int, exec_time: float) -> bool:
+        """
+        Keep `param_list`, whose execution discovered `new_cov` new bits.
+
+        Returns:
+            bool: False if an equal parameter list is already in the corpus.
+        """
+        h = structural_hash(param_list)
+        if self._find(h) is not None:
+            return False
+        self._append(CorpusEntry(param_list, new_cov, exec_time))
+        self.cull()
+        return True
+
+    def _append(self, entry: CorpusEntry) -> None:
+        self.entries.append(entry)
+        if len(self.entries) <= self.max_entries:
+            return
+        # 淘汰得分最低的条目（相同时淘汰最早的），当前调用的原始参数除外
+        victim = min(
+            (e for e in self.entries if e is not self.current and e is not entry),
+            key=lambda e: e.score,
+        )
+        index = self.entries.index(victim)
+        del self.entries[index]
+        if self.cursor > index:
+            self.cursor -= 1
+
+    def cull(self) -> None:
+        """
+        Recompute the favored entries.
+        """
+        scores = sorted(e.score for e in self.entries if e.new_cov > 0)
+        median = scores[len(scores) // 2] if scores else 0.0
+        for e in self.entries:
+            e.favored = e is self.current or (e.new_cov > 0 and e.score >= median)
+
+    def next_parent(self) -> CorpusEntry:
+        """
+        Pick the next parent by cycling through the corpus, skipping entries
+        with AFL's probabilities.
+        """
+        pending_favored = any(e.favored and e.n_fuzz == 0 for e in self.entries)
+        while True:
+            self.cursor %= len(self.entries)
+            entry = self.entries[self.cursor]
+            self.cursor += 1
+            if pending_favored:
+                new_favored = entry.favored and entry.n_fuzz == 0
+                skip = 0 if new_favored else SKIP_TO_NEW_PROB
+            elif not entry.favored:
+                skip = SKIP_NFAV_OLD_PROB if entry.n_fuzz else SKIP_NFAV_NEW_PROB
+            else:
+                skip = 0
+            if skip and randint(100) < skip:
+                continue
+            entry.n_fuzz += 1
+            return entry
+
+
+_corpora: dict[tuple, Corpus] = {}
+
+
+def get_corpus(full_name: str, args: tuple, kwargs: dict) -> Corpus:
+    """
+    Return the corpus of `full_name` for calls with the same number of
+    positional arguments and keyword names, with the current arguments added.
+    """
+    key = (full_name, len(args), tuple(kwargs))
+    corpus = _corpora.get(key)
+    if corpus is None:
+        corpus = _corpora[key] = Corpus()
+    corpus.set_current(list(args) + list(kwargs.values()))
+    logger.debug(f"Corpus of {full_name} has {len(corpus)} entries")
+    return corpus
@@ -0,0 +1,146 @@
+"""
+基于 virgin map 的逐次执行新覆盖检测。
+
+之前判断一次执行是否触发了新覆盖只能比较 `count_bitmap_s()` 前后两次的计数，每次都是对整个
+共享位图的 popcount，只适合在每个 LLM 变异体结束时调用一次；各 worker 的位图也要等到变异体
+结束后才合并到全局位图。本模块参照 AFL 的 `has_new_bits`：
+
+  - 通过 System V 共享内存直接映射 dcov 的覆盖率位图（shm key 即 `BitmapManager` 的 key），
+    以 uint64 的 NumPy 数组访问，不经过任何复制；
+  - 全局位图本身就是所有 worker 共享的 virgin map（置位表示已经见过）。执行后由 Rust 扩展
+    （`atomic_or_trace`）按块逐字扫描 worker 位图：整块为零的字直接跳过，已经全部见过的字
+    只读不写，只对包含新边的字做原子 OR。扫描不分配内存、不产生中间数组，只有触及的字才有
+    额外开销；全局覆盖实时可见，也不再需要为每个 worker 保存全局位图的副本或加锁合并。
+
+dcov 的位图按位记录边而不记录命中次数，因此没有 AFL 中"新的命中次数分桶"，只报告新边。
+"""
+
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+import numpy as np
+
+from respfuzzer.lib.fuzz.mutate import atomic_or_trace
+
+IPC_RMID = 0
+SHM_RDONLY = 0o10000
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+_libc.shmget.restype = ctypes.c_int
+_libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+_libc.shmat.restype = ctypes.c_void_p
+_libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+_libc.shmdt.restype = ctypes.c_int
+_libc.shmdt.argtypes = [ctypes.c_void_p]
+_libc.shmctl.restype = ctypes.c_int
+_libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+_bitwise_count = getattr(np, "bitwise_count", None)  # NumPy >= 2.0
+
+
+def popcount(words: np.ndarray) -> int:
+    """
+    Return the number of set bits in `words`.
+    """
+    if _bitwise_count is not None:
+        return int(_bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+def shm_size(shmid: int) -> int:
+    """
+    Return the size of the System V shared memory segment `shmid`.
+    """
+    for line in Path("/proc/sysvipc/shm").read_text().splitlines()[1:]:
+        fields = line.split()
+        if int(fields[1]) == shmid:
+            return int(fields[3])
+    raise OSError(f"Shared memory segment {shmid} not found")
+
+
+def remove_segment(shm_key: int) -> bool:
+    """
+    Remove the System V shared memory segment `shm_key`. The kernel frees
+    it once the last attached process detaches or exits.
+
+    Returns:
+        bool: False if there was no such segment.
+    """
+    shmid = _libc.shmget(shm_key, 0, 0)
+    if shmid < 0:
+        return False
+    return _libc.shmctl(shmid, IPC_RMID, None) == 0
+
+
+class SharedBitmap:
+    """
+    A zero-copy view of the coverage bitmap in the System V shared memory
+    segment `shm_key`.
+
+    Example:
+    >>> bitmap = SharedBitmap(4399)
+    >>> bitmap.words  # np.ndarray of uint64
+    >>> bitmap.close()
+    """
+
+    def __init__(self, shm_key: int, readonly: bool = False) -> None:
+        self.shm_key = shm_key
+        self.shmid = _libc.shmget(shm_key, 0, 0)
+        if self.shmid < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"shmget({shm_key}) failed")
+        size = shm_size(self.shmid)
+        addr = _libc.shmat(self.shmid, None, SHM_RDONLY if readonly else 0)
+        if addr in (None, ctypes.c_void_p(-1).value):
+            err = ctypes.get_errno()
+            raise OSError(err, f"shmat({shm_key}) failed")
+        self.addr = addr
+        buf = (ctypes.c_uint8 * size).from_address(addr)
+        words = np.frombuffer(buf, dtype=np.uint8, count=size - size % 8)
+        self.words = words.view(np.uint64)
+        if readonly:
+            self.words.flags.writeable = False
+
+    def close(self) -> None:
+        if self.addr is None:
+            return
+        self.words = None
+        _libc.shmdt(self.addr)
+        self.addr = None
+
+    def __enter__(self) -> "SharedBitmap":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class SharedVirginMap:
+    """
+    The edges seen by all workers, kept as set bits of the global bitmap
+    `shm_key` and updated in place with atomic OR.
+
+    Example:
+    >>> virgin = SharedVirginMap(GLOBAL_SHM_KEY)
+    >>> new_edges = virgin.update(trace.words)
+    """
+
+    def __init__(self, shm_key: int) -> None:
+        self.bitmap = SharedBitmap(shm_key)
+
+    def update(self, trace: np.ndarray) -> int:
+        """
+        Set the bits of `trace` in the global bitmap.
+
+        Returns:
+            int: The number of edges in `trace` no worker had seen before.
+        """
+        # 其他 worker 可能同时写入同一个字，由原子 OR 的旧值判断哪些位是本次新增的
+        return atomic_or_trace(self.bitmap.words, trace)
+
+    def count(self) -> int:
+        return popcount(self.bitmap.words)
+
+    def close(self) -> None:
+        self.bitmap.close()
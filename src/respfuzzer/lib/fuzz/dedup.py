@@ -0,0 +1,214 @@
+"""
+变异参数列表的去重。
+
+`mutate_param_list` 经常产生已经执行过的输入：`mutate_bool` 翻转回原值、`mutate_list_clip`
+作用在很短的列表上、`mutate_dict` 选中同一个键等等。每个重复的输入都要付出一次完整的函数调用
+以及日志写入的代价。
+
+本模块对变异后的参数列表计算一个廉价的结构哈希（类型 + 值，递归地处理容器与数组），并用
+Bloom filter 记录已经执行过的输入。重复的输入在执行前重新变异（最多 `MAX_REMUTATIONS` 次，
+见 `respfuzzer.lib.fuzz.fuzz_function`），仍然重复才跳过。Bloom filter 只会误报不会漏报，
+误报的代价仅仅是少执行一个新输入。去重的范围由 `[fuzz] dedup_scope` 配置：
+
+  - "seed"：每次调用 fuzz_function 时清空，即每个种子（变异体）独立去重；
+  - "campaign"：在 worker 进程的整个生命周期内保留，跨种子去重。结构哈希与被测函数的全名一起
+    写入 Bloom filter，不同函数的相同参数列表不会相互冲突；
+  - "off"：不去重。
+
+无法廉价哈希的参数（任意类的实例、过大的数组等）不参与去重，这样的输入总是会被执行。
+"""
+
+from loguru import logger
+
+from respfuzzer.utils.config import get_config
+
+MASK64 = (1 << 64) - 1
+MAX_HASH_BYTES = 1 << 20  # 超过该大小的数组不参与去重
+
+_config = get_config("fuzz")
+DEDUP_SCOPE = _config.get("dedup_scope", "seed")
+_bloom_bits = max(_config.get("dedup_bloom_bits", 1 << 23), 64)
+
+# 可以直接以 (类型, 值) 哈希的不可变类型
+_SCALARS = (bool, int, str, bytes, type(None))
+
+
+def structural_hash(value, max_bytes: int | None = MAX_HASH_BYTES) -> int | None:
+    """
+    Hash the type and value of `value`, recursing into containers and arrays.
+    Arrays larger than `max_bytes` (None for no limit) are not hashed.
+
+    Returns:
+        int | None: The hash, or None if `value` contains an object that
+        cannot be hashed cheaply.
+    """
+    cls = type(value)
+    if cls in _SCALARS:
+        return hash((cls, value))
+    if cls is float:
+        # 以十六进制表示区分 -0.0 与 0.0，并使 NaN 与自身相等
+        return hash((cls, value.hex()))
+    if cls is complex:
+        return hash((cls, value.real.hex(), value.imag.hex()))
+    if cls in (list, tuple):
+        items = []
+        for item in value:
+            h = structural_hash(item, max_bytes)
+            if h is None:
+                return None
+            items.append(h)
+        return hash((cls, tuple(items)))
+    if cls in (set, frozenset):
+        items = []
+        for item in value:
+            h = structural_hash(item, max_bytes)
+            if h is None:
+                return None
+            items.append(h)
+        return hash((cls, frozenset(items)))
+    if cls is dict:
+        items = []
+        for k, v in value.items():
+            hk, hv = structural_hash(k, max_bytes), structural_hash(v, max_bytes)
+            if hk is None or hv is None:
+                return None
+            items.append((hk, hv))
+        return hash((cls, tuple(items)))
+    if getattr(value, "__array_interface__", None) is not None:
+        return _array_hash(value, max_bytes)
+    return None
+
+
+def _array_hash(value, max_bytes: int | None) -> int | None:
+    # NumPy 数组及标量：dtype、形状、步长与原始数据一起哈希
+    try:
+        if value.dtype.hasobject:
+            return None
+        if max_bytes is not None and value.nbytes > max_bytes:
+            return None
+        strides = getattr(value, "strides", ())
+        return hash(
+            (type(value), value.dtype.str, value.shape, strides, value.tobytes())
+        )
+    except Exception:
+        return None
+
+
+class BloomFilter:
+    """
+    A Bloom filter over 64-bit hashes, with `k` probes derived by double
+    hashing.
+
+    Example:
+    >>> bf = BloomFilter(1 << 20)
+    >>> bf.add(h)
+    False
+    >>> bf.add(h)
+    True
+    """
+
+    def __init__(self, n_bits: int, k: int = 4) -> None:
+        self.n_bits = n_bits
+        self.k = k
+        self.bits = bytearray((n_bits + 7) // 8)
+
+    def add(self, h: int) -> bool:
+        """
+        Insert `h` and return whether it (probably) was already present.
+        """
+        h &= MASK64
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        bits = self.bits
+        present = True
+        for i in range(self.k):
+            pos = (h1 + i * h2) % self.n_bits
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                present = False
+        return present
+
+    def clear(self) -> None:
+        self.bits[:] = bytes(len(self.bits))
+
+
+class Deduplicator:
+    """
+    Skip mutated parameter lists that were (probably) executed before, and
+    count how many were skipped.
+
+    Parameter lists are keyed by the function under test, set by
+    `get_deduplicator`, so one filter can be shared across functions.
+
+    Example:
+    >>> dedup = get_deduplicator(full_name)
+    >>> if dedup.is_duplicate(mt_param_list):
+    ...     mt_param_list = mutate_param_list(param_list)
+    """
+
+    def __init__(self, n_bits: int = _bloom_bits) -> None:
+        self.filter = BloomFilter(n_bits)
+        self.key = 0
+        self.checked = 0
+        self.duplicates = 0
+
+    def _hash(self, param_list: list) -> int | None:
+        h = structural_hash(param_list)
+        return None if h is None else hash((self.key, h))
+
+    def add(self, param_list: list) -> None:
+        """
+        Mark `param_list`, e.g. the unmutated arguments, as executed.
+        """
+        h = self._hash(param_list)
+        if h is not None:
+            self.filter.add(h)
+
+    def is_duplicate(self, param_list: list) -> bool:
+        h = self._hash(param_list)
+        if h is None:
+            return False
+        self.checked += 1
+        if self.filter.add(h):
+            self.duplicates += 1
+            return True
+        return False
+
+    def duplicate_rate(self) -> float:
+        return self.duplicates / self.checked if self.checked else 0.0
+
+    def reset(self) -> None:
+        self.filter.clear()
+        self.checked = self.duplicates = 0
+
+
+_deduplicator: Deduplicator | None = None
+
+
+def get_deduplicator(full_name: str = "") -> Deduplicator | None:
+    """
+    Return the deduplicator for a fuzz_function call on `full_name`, cleared
+    with the "seed" scope, or None if deduplication is off.
+    """
+    global _deduplicator
+    if DEDUP_SCOPE == "off":
+        return None
+    if _deduplicator is None:
+        _deduplicator = Deduplicator()
+    elif DEDUP_SCOPE == "seed":
+        _deduplicator.reset()
+    _deduplicator.key = hash(full_name)
+    return _deduplicator
+
+
+def log_duplicates(full_name: str, dedup: Deduplicator | None, skipped: int) -> None:
+    """
+    Log the duplicates skipped by the current fuzz_function call and the
+    duplicate rate over the scope of `dedup`.
+    """
+    if dedup is None or dedup.checked == 0:
+        return
+    logger.debug(
+        f"Skipped {skipped} duplicate mutations of {full_name}, duplicate rate {dedup.duplicate_rate():.2%}"
+    )
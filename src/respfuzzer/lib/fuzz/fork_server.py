@@ -0,0 +1,206 @@
+"""
+AFL 风格的 fork server。
+
+每个被测库只启动一个常驻的 server 进程，由它一次性导入目标库；之后每个变异体都
+通过 `os.fork()` 从 server 复制出一个廉价的子进程来执行，从而避免每次尝试都重新
+导入 torch、paddle、pandas 这类重量级库。
+
+父进程与 server 之间通过一条 `multiprocessing.Pipe` 通信，协议如下：
+  - ("run", (seed, timeout, target, stream, resume)) -> server 回复 ("pid", child_pid)，子进程
+    结束后回复 ("status", exitcode)；target 为 None 时子进程执行 server 的默认 target，stream 为
+    子进程中数据级变异的随机流种子，resume 为被杀死的上一次尝试的恢复点
+  - ("exit", None) -> server 退出
+"""
+
+import importlib
+import os
+import signal
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Callable
+
+from loguru import logger
+
+from respfuzzer.lib.fuzz.code_cache import compile_cached
+from respfuzzer.lib.fuzz.seeding import Resume, set_stream
+from respfuzzer.models import HasCode
+from respfuzzer.utils.process_helper import set_resource_limits
+
+
+def _preload_module(full_func_path: str) -> None:
+    """
+    Import the deepest importable module along `full_func_path` so that later
+    children inherit it from the server instead of importing it themselves.
+    """
+    parts = full_func_path.split(".")
+    for i in range(len(parts) - 1, 0, -1):
+        try:
+            importlib.import_module(".".join(parts[:i]))
+            return
+        except Exception:
+            continue
+
+
+def _fork_server_loop(
+    library_name: str, conn: Connection, target: Callable[[HasCode], None]
+) -> None:
+    """
+    The main loop of the fork server process.
+    """
+    try:
+        importlib.import_module(library_name)
+    except Exception as e:
+        logger.error(f"Fork server failed to import {library_name}: {e}")
+
+    preloaded = set()
+    while True:
+        try:
+            command, payload = conn.recv()
+        except EOFError:
+            break
+
+        match command:
+            case "run":
+                seed, timeout, run_target, stream, resume = payload
+                if seed.func_name not in preloaded:
+                    _preload_module(seed.func_name)
+                    preloaded.add(seed.func_name)
+                try:
+                    # 在 server 中编译，子进程直接继承缓存的 code object
+                    compile_cached(seed.function_call)
+                except SyntaxError:
+                    pass
+                pid = os.fork()
+                if pid == 0:
+                    conn.close()
+                    set_resource_limits(cpu_seconds=timeout * 1.5)
+                    set_stream(stream, resume)
+                    exitcode = 0
+                    try:
+                        (run_target or target)(seed)
+                    except BaseException:
+                        exitcode = 1
+                    os._exit(exitcode)
+                try:
+                    os.setpgid(pid, pid)  # 与子进程内的 setpgid 竞争，保证 killpg 可用
+                except OSError:
+                    pass
+                conn.send(("pid", pid))
+                _, status = os.waitpid(pid, 0)
+                conn.send(("status", os.waitstatus_to_exitcode(status)))
+            case "exit":
+                break
+            case _:
+                logger.error(f"Unknown command received by fork server: {command}")
+                break
+
+
+class ForkServer:
+    """
+    A per-library fork server which imports the library once and forks a
+    fresh child for every execution.
+
+    Example:
+    >>> with ForkServer("numpy", safe_fuzz) as server:
+    ...     success = server.run(mutant, timeout=5.0)
+    """
+
+    def __init__(self, library_name: str, target: Callable[[HasCode], None]) -> None:
+        self.library_name = library_name
+        self.target = target
+        self.conn: Connection | None = None
+        self.process: Process | None = None
+        self.child_pid: int | None = None
+
+    def start(self) -> None:
+        parent_conn, child_conn = Pipe()
+        self.conn = parent_conn
+        self.process = Process(
+            target=_fork_server_loop,
+            args=(self.library_name, child_conn, self.target),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        logger.debug(
+            f"Fork server for {self.library_name} started with PID {self.process.pid}"
+        )
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.conn.send(("exit", None))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def restart(self) -> None:
+        logger.warning(f"Restarting fork server for {self.library_name}")
+        self.stop()
+        self.start()
+
+    def run(
+        self,
+        seed: HasCode,
+        timeout: float,
+        target: Callable[[HasCode], None] | None = None,
+        stream: int = 0,
+        resume: Resume | None = None,
+    ) -> bool:
+        """
+        Execute `seed` in a child forked from the server, with `target` instead
+        of the default target if given. `target` must be picklable. Data-level
+        mutations in the child draw from the random `stream`, continuing a
+        killed attempt on the same stream from `resume` if given.
+
+        Returns:
+            bool: True if the child exited normally with code 0, False if it
+            failed, timed out or the server died.
+        """
+        if self.process is None:
+            self.start()
+        self.child_pid = None
+        try:
+            self.conn.send(("run", (seed, timeout, target, stream, resume)))
+            # server 在 fork 之前会导入模块、编译代码，卡住时只能重启整个 server
+            if not self.conn.poll(timeout):
+                logger.error(
+                    f"Fork server for {self.library_name} did not fork within {timeout:.2f}s"
+                )
+                self.restart()
+                return False
+            _, self.child_pid = self.conn.recv()
+            if not self.conn.poll(timeout):
+                self.kill_child()
+            _, exitcode = self.conn.recv()
+        except (EOFError, BrokenPipeError, OSError) as e:
+            logger.error(f"Fork server for {self.library_name} crashed: {e}")
+            self.kill_child()
+            self.restart()
+            return False
+        return exitcode == 0
+
+    def kill_child(self) -> None:
+        if self.child_pid is None:
+            return
+        try:
+            os.killpg(self.child_pid, signal.SIGKILL)
+        except ProcessLookupError:
+            try:
+                os.kill(self.child_pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def __enter__(self) -> "ForkServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
@@ -1,40 +1,116 @@
-import io
 import json
 import os
 import sys
-from multiprocessing import Process, Queue
-from time import time
+from multiprocessing.connection import Connection, wait
+from time import process_time
 import dcov
 from dcov import BitmapManager
 from loguru import logger
 from concurrent.futures import ThreadPoolExecutor
 
+from respfuzzer.lib.fuzz import fuzz_function
+from respfuzzer.lib.fuzz.channel import (
+    STATUS_CRASH,
+    STATUS_EXCEPTION,
+    STATUS_OK,
+    STATUS_TIMEOUT,
+    OP_EXECUTE,
+    OP_EXIT,
+    OP_FEEDBACK_FUZZ,
+    OP_FUZZ,
+    WorkerChannel,
+)
+from respfuzzer.lib.fuzz.calibration import calibrate_seed, mutant_budget
+from respfuzzer.lib.fuzz.code_cache import compile_cached
+from respfuzzer.lib.fuzz.coverage_map import SharedBitmap, SharedVirginMap
 from respfuzzer.lib.fuzz.instrument import (
     instrument_function_via_path_ctx,
     instrument_function_via_path_feedback, 
 )
 
+from respfuzzer.lib.fuzz.journal import (
+    close_journal,
+    journal_redis_client,
+    parent_note,
+    recover_journal,
+)
 from respfuzzer.lib.fuzz.llm_mutator import LLMMutator
-from respfuzzer.models import HasCode, Seed, Mutant
-from respfuzzer.repos.seed_table import get_seed_by_function_name, get_seeds_iter
+from respfuzzer.lib.fuzz.output_sink import install_output_sink
+from respfuzzer.lib.fuzz.seeding import derive_state, master_seed, set_stream
+from respfuzzer.lib.fuzz.worker_pool import GLOBAL_SHM_KEY, Worker, WorkerPool
+from respfuzzer.lib.fuzz.zygote import owner_pid
+from respfuzzer.models import Seed, Mutant
+from respfuzzer.repos.seed_table import (
+    get_seed_by_function_name,
+    get_seeds_iter,
+    update_seed_timing,
+)
 from respfuzzer.utils.config import get_config
-from respfuzzer.utils.process_helper import kill_process_tree_linux
-from respfuzzer.utils.redis_util import get_redis_client
 
 
-def continue_safe_execute(recv: Queue, send: Queue, process_index: int) -> None:
+class CoverageProbe:
+    """
+    Flushes the coverage of the current process to the bitmap `shm_key` and
+    returns a counter which grows by the number of new edges. New edges are
+    those not yet set in the global bitmap, which the probe updates in place
+    with atomic OR, see `respfuzzer.lib.fuzz.coverage_map`. If the bitmaps
+    cannot be mapped the probe falls back to counting the whole bitmap of the
+    worker, whose coverage the parent then merges into the global bitmap.
+
+    Example:
+    >>> probe = CoverageProbe(bm, shm_key)
+    >>> probe.clear_trace()
+    >>> new_edges = probe() - last
+    """
+
+    def __init__(self, bm: BitmapManager, shm_key: int) -> None:
+        self.bm = bm
+        self.new_edges = 0
+        self.virgin = None
+        if shm_key == GLOBAL_SHM_KEY:
+            return  # 计算初始覆盖的 worker 直接写入全局位图
+        try:
+            self.trace = SharedBitmap(shm_key, readonly=True)
+            self.virgin = SharedVirginMap(GLOBAL_SHM_KEY)
+        except OSError as e:
+            logger.warning(
+                f"Failed to map coverage bitmap {shm_key}, counting it instead: {e}"
+            )
+
+    def __call__(self) -> int:
+        self.bm.write()
+        if self.virgin is None:
+            return self.bm.count_bitmap_s()
+        self.new_edges += self.virgin.update(self.trace.words)
+        return self.new_edges
+
+    def clear_trace(self) -> None:
+        """
+        Clear the bitmap of the worker before the next seed. Its edges are
+        kept in the global bitmap, and the following checks only scan the
+        words touched by the seed. Nothing is cleared in the fallback mode.
+        """
+        if self.virgin is None:
+            return
+        self.bm.clear_bitmap()
+        self.bm.write()
+
+
+def continue_safe_execute(conn: Connection, process_index: int) -> None:
     """
-    该函数被父进程以子进程的形式创建，从父进程不断获取指令和需要执行的 Seed，并安全执行。
-    父进程指令：
-      - "execute", seed:Seed : 执行指定的 Seed。
-      - "exit" : 退出子进程。
+    该函数被父进程以子进程的形式创建，从父进程不断获取指令和需要执行的程序，并安全执行。
+    通信协议见 `respfuzzer.lib.fuzz.channel`，父进程指令：
+      - OP_EXECUTE : 执行指定的程序。
+      - OP_FUZZ : 对程序中的目标函数进行数据级变异。
+      - OP_FEEDBACK_FUZZ : 对程序中的目标函数进行数据级变异，并记录覆盖率。
+      - OP_EXIT : 退出子进程。
+    每条指令执行完毕后回复一条结果记录：执行次数、新增覆盖位数、消耗的 CPU 时间以及各类型
+    异常的次数，父进程据此计算 LLM 变异算子的奖励。
     """
     os.setpgid(0, 0)  # 设置进程组ID，便于后续杀死子进程
-    fake_stdout = io.StringIO()
-    fake_stderr = io.StringIO()
-    sys.stdout = fake_stdout
-    sys.stderr = fake_stderr
-    
+    ring = install_output_sink()
+
+    channel = WorkerChannel(conn)
     seen_library = set()
     config = get_config("fuzz")
     data_fuzz_per_seed = config.get("data_fuzz_per_seed")
@@ -46,112 +122,171 @@ def continue_safe_execute(recv: Queue, send: Queue, process_index: int) -> None:
         # dcov.open_bitmap_py()
     except Exception:
         logger.exception("Failed to open coverage bitmap in worker process.")
-        send.put("done")
+        channel.send_result(STATUS_CRASH)
         return
+    # 父进程退出时 pidfd 变为可读；zygote fork 出的 worker 的 ppid 是 zygote，因此不能比较 ppid
+    try:
+        owner = os.pidfd_open(owner_pid())
+    except ProcessLookupError:
+        logger.error("Parent process exited, take care!")
+        exit(1)
+    probe_coverage = CoverageProbe(bm_child, process_index)
+    last_cov = probe_coverage()
+    # 每次数据级变异执行后检查覆盖率，触发新覆盖的参数保留在语料库中
+    fuzz_function.set_coverage_probe(probe_coverage)
     with dcov.LoaderWrapper(bm_child) as l:
         while True:
+            # 常驻 worker 可能长时间空闲（等待 LLM 变异），仅在父进程退出时才退出
+            ready = wait([conn, owner], 100)
+            if owner in ready:
+                logger.error("Parent process exited, take care!")
+                exit(1)
+            if not ready:
+                continue
             try:
-                seed: HasCode
-                command, seed = recv.get(timeout=100)
-            except TimeoutError:
-                logger.error("No command received in 100 seconds, take care!")
+                command, program = channel.recv_command()
+            except EOFError:
+                break
+            if program and program.library_name not in seen_library:
+                l.add_library(program.library_name)
+                seen_library.add(program.library_name)
+
+            if command == OP_EXIT:
+                logger.info("Exiting worker process as instructed.")
+                close_journal()
+                break
+            if program is None:
+                logger.error(f"Unknown command or program received: {command}")
                 exit(1)
-            if seed and seed.library_name not in seen_library:
-                l.add_library(seed.library_name)
-                seen_library.add(seed.library_name)
-
-            match command:
-                case "execute":
-                    try:
-                        exec(seed.function_call)
-                    except Exception:
-                        pass
-                    finally:
-                        bm_child.write()
-                        send.put("done")
-                case "fuzz":
-                    try:
-                        with instrument_function_via_path_ctx(seed.func_name):
-                            exec(seed.function_call)
-                    except Exception:
-                        pass
-                    finally:
-                        send.put("done")
-                case "exit":
-                    logger.info("Exiting worker process as instructed.")
-                    break
-                case "feedback_fuzz":
-                    try:
-                        with instrument_function_via_path_feedback(seed.func_name, data_fuzz_per_seed):
-                            exec(seed.function_call)
-                    except Exception:
-                        pass
-                    finally:
-                        bm_child.write()
-                        send.put("done")
-                case _:
+
+            status = STATUS_OK
+            exec_before = fuzz_function.exec_total
+            fuzz_function.exception_counts.clear()
+            cpu_before = process_time()
+            fuzz_function.set_execution_timeout(program.exec_timeout)
+            set_stream(channel.stream)
+            probe_coverage.clear_trace()
+            if ring is not None:
+                ring.clear()  # 只保留当前程序的输出
+            try:
+                code = compile_cached(program.function_call, program.code_key)
+                if command == OP_EXECUTE:
+                    exec(code)
+                elif command == OP_FUZZ:
+                    with instrument_function_via_path_ctx(program.func_name):
+                        exec(code)
+                elif command == OP_FEEDBACK_FUZZ:
+                    with instrument_function_via_path_feedback(
+                        program.func_name, data_fuzz_per_seed
+                    ):
+                        exec(code)
+                else:
                     logger.error(f"Unknown command received: {command}")
                     exit(1)
+            except TimeoutError:
+                status = STATUS_TIMEOUT
+            except Exception:
+                status = STATUS_EXCEPTION
+            finally:
+                if status != STATUS_OK and ring is not None:
+                    logger.warning(
+                        f"Program {program.id} ({program.func_name}) failed with status {status}, recent output:\n{ring.getvalue()}"
+                    )
+                cov = probe_coverage()
+                channel.send_result(
+                    status,
+                    fuzz_function.exec_total - exec_before,
+                    cov - last_cov,
+                    process_time() - cpu_before,
+                    fuzz_function.exception_counts,
+                )
+                last_cov = cov
+
+
+def get_zygote_preload() -> dict[str, list[str]] | None:
+    """
+    读取 `[zygote]` 配置，返回每个库需要在 zygote 中预导入的子模块；未启用时返回 None。
+    """
+    zygote_cfg = get_config("zygote") or {}
+    if not zygote_cfg.get("enabled", False):
+        return None
+    return zygote_cfg.get("preload", {})
+
 
 def _fuzz_dataset(
     dataset: dict[str, dict[str, dict[str, list[int]]]],
     enable_feedback_mutation: bool = False,
+    round_index: int = 0,
 ) -> None:
     """
     Fuzz the dataset by iterating over all functions and query related seeds.
+    `round_index` distinguishes the random streams of repeated rounds.
     """
     # 收集所有待 fuzz 的 seed
     seeds: list[tuple[str, Seed]] = []
-    shm_key_start=4399
     for library_name in dataset:
         for func_name in dataset[library_name]:
             full_func_name = f"{library_name}.{func_name}"
             seed = get_seed_by_function_name(full_func_name)
             if not seed:
                 continue
-            seeds.append((shm_key_start, full_func_name, seed))
-            shm_key_start += 1
+            seeds.append((full_func_name, seed))
 
     if not seeds:
         logger.info("No seeds found in dataset to fuzz.")
         return
 
-    # 并行执行 fuzz_single_seed（使用线程池以避免多进程嵌套的 pickling 问题）
+    # 线程只负责驱动 LLM 变异（I/O 密集），真正的执行由常驻进程池中的空闲 worker 完成
     cfg = get_config("fuzz")
     max_workers = cfg.get("max_workers")
-    logger.info(f"Starting parallel fuzzing with {max_workers} workers for {len(seeds)} seeds")
+    pool_size = cfg.get("pool_size") or os.cpu_count()
+    logger.info(
+        f"Starting parallel fuzzing with {max_workers} threads and {pool_size} processes for {len(seeds)} seeds"
+    )
+    pool = WorkerPool(
+        pool_size,
+        continue_safe_execute,
+        max_rss_mb=cfg.get("worker_max_rss_mb"),
+        zygote_preload=get_zygote_preload(),
+        memory_ratio=cfg.get("worker_memory_ratio", 0.8),
+    )
     futures = []
-    with ThreadPoolExecutor(max_workers=max_workers) as exc:
-        for shm_key, full_name, seed in seeds:
-            fut = exc.submit(
-                fuzz_single_seed,
-                seed,
-                enable_feedback_mutation,
-                shm_key,
-            )
-            futures.append((fut, full_name))
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as exc:
+            for full_name, seed in seeds:
+                fut = exc.submit(
+                    fuzz_single_seed,
+                    seed,
+                    pool,
+                    enable_feedback_mutation,
+                    round_index,
+                )
+                futures.append((fut, full_name))
 
-        for fut, full_name in futures:
-            try:
-                # 等待任务完成并捕获异常（任务内部已有异常捕获，但这里再保险）
-                fut.result()
-            except Exception as e:
-                logger.exception(f"Parallel fuzz task for {full_name} raised: {e}")
-            finally:
-                p = BitmapManager(4398).count_bitmap()
-                logger.info(f"Current coverage after fuzzing {full_name}: {p} bits.")
+            for fut, full_name in futures:
+                try:
+                    # 等待任务完成并捕获异常（任务内部已有异常捕获，但这里再保险）
+                    fut.result()
+                except Exception as e:
+                    logger.exception(f"Parallel fuzz task for {full_name} raised: {e}")
+                finally:
+                    logger.info(
+                        f"Current coverage after fuzzing {full_name}: {pool.coverage} bits."
+                    )
+    finally:
+        pool.shutdown()
 
 
 def calc_initial_seed_coverage_dataset(
     dataset: dict[str, dict[str, dict[str, list[int]]]],
 ) -> int:
     logger.info("Calculating initial seed coverage for the dataset....")
-    send, recv = Queue(), Queue()
-    bm = BitmapManager(4398)
+    bm = BitmapManager(GLOBAL_SHM_KEY)
     bm.clear_bitmap()
     bm.write()
-    process = Process(target=continue_safe_execute, args=(send, recv, 4398))
-    process.start()
+    config = get_config("fuzz")
+    worker = Worker(GLOBAL_SHM_KEY, continue_safe_execute)
+    worker.start()
     for library_name in dataset:
         for func_name in dataset[library_name]:
             full_func_name = f"{library_name}.{func_name}"
@@ -161,24 +296,22 @@ def calc_initial_seed_coverage_dataset(
                     f"Seed for function {full_func_name} not found, take care!"
                 )
                 exit(1)
-            try:
-                send.put(("execute", seed))
-                recv.get(timeout=10)
-            except Exception:
-                logger.warning(
-                    f"Seed {seed.id} execution timeout, restarting worker process."
+            if seed.exec_timeout is None:
+                # 校准时的执行同样记录了种子的覆盖率
+                calibrate_seed(
+                    seed,
+                    lambda timeout: worker.execute(OP_EXECUTE, seed, timeout),
+                    config,
                 )
-                if process.is_alive():
-                    kill_process_tree_linux(process)
-                else:
-                    process.join()
-                send, recv = Queue(), Queue()
-                process = Process(target=continue_safe_execute, args=(send, recv, 4398))
-                process.start()
+                update_seed_timing(seed)
                 continue
-    send.put(("exit", None))
-    process.join()
-    bm = BitmapManager(4398)
+            result = worker.execute(OP_EXECUTE, seed, 10)
+            if result.status in (STATUS_TIMEOUT, STATUS_CRASH):
+                logger.warning(
+                    f"Seed {seed.id} execution timeout, worker process restarted."
+                )
+    worker.stop()
+    bm = BitmapManager(GLOBAL_SHM_KEY)
     p = bm.count_bitmap_s()
     logger.info(f"Initial coverage after executing all seeds: {p} bits.")
 
@@ -190,6 +323,7 @@ def fuzz_dataset(
     """Fuzz functions specified in the dataset JSON file."""
     logger.remove()
     logger.add(sys.__stderr__, level="DEBUG")
+    master_seed()
     bm_parent = BitmapManager(4398)
     bm_parent.clear_bitmap()
     logger.info(f"Starting fuzzing for dataset: {dataset_path}")
@@ -213,10 +347,13 @@ def fuzz_dataset_infinite(dataset_path: str) -> None:
     dataset: dict[str, dict[str, dict[str, list[int]]]] = json.load(
         open(dataset_path, "r")
     )
+    master_seed()
     calc_initial_seed_coverage_dataset(dataset)
+    round_index = 0
     while True:
         try:
-            _fuzz_dataset(dataset)
+            _fuzz_dataset(dataset, round_index=round_index)
+            round_index += 1
         except KeyboardInterrupt:
             logger.info("Fuzzing interrupted by user.")
             break
@@ -232,68 +369,78 @@ def fuzz_one_library(library_name: str) -> None:
     dcov.clear_bitmap_py()
 
     logger.info(f"Starting fuzzing for library: {library_name}")
+    master_seed()
+
+    cfg = get_config("fuzz")
+    pool = WorkerPool(
+        1,
+        continue_safe_execute,
+        max_rss_mb=cfg.get("worker_max_rss_mb"),
+        zygote_preload=get_zygote_preload(),
+        memory_ratio=cfg.get("worker_memory_ratio", 0.8),
+    )
+    try:
+        for seed in get_seeds_iter(library_name):
+            fuzz_single_seed(seed, pool)
+    finally:
+        pool.shutdown()
+
 
-    for seed in get_seeds_iter(library_name):
-        fuzz_single_seed(seed)
-        
-    
 def fuzz_single_seed(
-    seed: Seed, enable_feedback_mutation: bool = True, process_index: int = 4399,
+    seed: Seed,
+    pool: WorkerPool,
+    enable_feedback_mutation: bool = True,
+    round_index: int = 0,
 ) -> None:
     """
-
+    Fuzz a single seed with LLM mutants, executing every mutant on an idle
+    worker borrowed from `pool`. The data-level mutations of every mutant
+    draw from their own random stream, see `respfuzzer.lib.fuzz.seeding`.
     """
     config = get_config("fuzz")
-    execution_timeout = config.get("execution_timeout")
     llm_fuzz_per_seed = config.get("llm_fuzz_per_seed")
     data_fuzz_per_seed = config.get("data_fuzz_per_seed")
-    redis_client = get_redis_client()
+    redis_client = journal_redis_client()
 
     logger.info(f"Starting SGM Fuzzing for seed {seed.id}: {seed.func_name}")
-    bm = BitmapManager(process_index)
-    bm.sync_from(4398)
-    bm.write()
-    send, recv = Queue(), Queue()
-    process = Process(target=continue_safe_execute, args=(send, recv, process_index))
-    process.start()
-    child_pid = process.pid
+    if seed.exec_timeout is None:
+        with pool.worker(seed.library_name) as worker:
+            calibrate_seed(
+                seed,
+                lambda timeout: worker.execute(OP_EXECUTE, seed, timeout),
+                config,
+            )
+        update_seed_timing(seed)
+    timeout = mutant_budget(seed, data_fuzz_per_seed, config)
     Mutator = LLMMutator(seed)
-    for _ in range(llm_fuzz_per_seed):       
+    for mutant_index in range(llm_fuzz_per_seed):
         mutant, mutation_type = Mutator.random_llm_mutate()
-        cov_before = bm.count_bitmap_s()
-        logger.debug(f"Mutant {mutant.id} coverage before execution: {cov_before}")
-        logger.info(f"Start fuzzing mutant {mutant.id} of seed {seed.id}: {mutant.func_name}")
-        try:
-            send.put(("feedback_fuzz", mutant))
-            recv.get(timeout=execution_timeout + data_fuzz_per_seed / 100)   
-        except Exception as e:
-            logger.info(f"Exception occurred: {e}")
-            random_state = redis_client.hget("random_state", str(child_pid))
-            logger.info(
-                f"Mutant {mutant.id} execution timeout after {execution_timeout} seconds, restarting worker process. Last random state: {random_state}"
-            )
-            if process.is_alive():
-                kill_process_tree_linux(process)
-            else:
-                process.join()
-            send, recv = Queue(), Queue()
-            process = Process(target=continue_safe_execute, args=(send, recv, process_index))
-            process.start()
-            child_pid = process.pid
-            continue
-        cov_after = bm.count_bitmap_s()
-        logger.info(f"[{process_index}]Finished fuzzing mutant {mutant.id} of seed {seed.id}: coverage {cov_before} -> {cov_after}")
+        stream = derive_state(master_seed(), round_index, seed.id or 0, mutant_index)
+        with pool.worker(seed.library_name) as worker:
+            logger.info(f"Start fuzzing mutant {mutant.id} of seed {seed.id}: {mutant.func_name}, stream={stream}")
+            child_pid = worker.pid
+            result = worker.execute(OP_FEEDBACK_FUZZ, mutant, timeout, stream)
+            if result.status in (STATUS_TIMEOUT, STATUS_CRASH):
+                # worker 的覆盖已在重启前由 Worker.execute 合并
+                recovery = recover_journal(child_pid, redis_client)
+                random_state = recovery.random_state if recovery else None
+                logger.info(
+                    f"Mutant {mutant.id} execution timeout after {timeout} seconds, worker process restarted. Last random state: {random_state}{parent_note(recovery)}"
+                )
+                if enable_feedback_mutation:
+                    # 耗尽了整个执行期限，按没有新增覆盖计算奖励
+                    Mutator.update_reward(
+                        mutation_type, Mutator.calculate_reward(False, 0.0)
+                    )
+                continue
+            if result.new_cov > 0 and pool.virgin is None:
+                pool.merge_coverage(worker)
+        exceptions = ", ".join(f"{name}: {count}" for name, count in result.exceptions)
+        logger.info(f"[{worker.shm_key}]Finished fuzzing mutant {mutant.id} of seed {seed.id}: {result.exec_cnt} executions, {result.new_cov} new coverage bits, {result.cpu_time:.2f} CPU seconds, exceptions {{{exceptions}}}")
         if enable_feedback_mutation:
-            if cov_after > cov_before:
-                Mutator.update_reward(mutation_type, Mutator.calculate_reward(False, 1.0))
-                logger.info(f"LLM Mutant {mutant.id} increased coverage: {cov_before} -> {cov_after}")
-            else:
-                Mutator.update_reward(mutation_type, Mutator.calculate_reward(False, 0.0)) 
-        
-    send.put(("exit", None))
-    process.join()
-    bm.write()
-    bm2 = BitmapManager(4398)
-    bm2.merge_from(process_index)
-    logger.info(f"Merging coverage from process {process_index} to parent bitmap, final coverage: {bm2.count_bitmap()} bits.")
-    bm2.write()
\ No newline at end of file
+            coverage_gain = Mutator.coverage_gain(result.new_cov, result.cpu_time)
+            Mutator.update_reward(
+                mutation_type, Mutator.calculate_reward(False, coverage_gain)
+            )
+            if result.new_cov > 0:
+                logger.info(f"LLM Mutant {mutant.id} increased coverage by {result.new_cov} bits")
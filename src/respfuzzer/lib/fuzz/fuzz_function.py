@@ -1,22 +1,60 @@
 import signal
-import os
 import time
+from collections import Counter
 from multiprocessing.connection import Connection
-from typing import Callable
+from typing import Callable, Iterator
 
 from loguru import logger
 
+from respfuzzer.lib.fuzz.corpus import CORPUS_ENABLED, Corpus, get_corpus
+from respfuzzer.lib.fuzz.dedup import Deduplicator, get_deduplicator, log_duplicates
+from respfuzzer.lib.fuzz.journal import (
+    JOURNAL_EXEC_CNT,
+    JOURNAL_EXEC_RECORD,
+    Journal,
+    current_journal,
+    get_journal,
+    journal_redis_client,
+)
 from respfuzzer.lib.fuzz.mutate import get_random_state, set_random_state
-from respfuzzer.lib.fuzz.mutator import mutate_param_list
+from respfuzzer.lib.fuzz.mutator import (
+    get_isolator,
+    mutate_param_list,
+    mutate_param_list_batch,
+)
+from respfuzzer.lib.fuzz.seeding import current_call, next_random_state, resume_point
 from respfuzzer.utils.config import get_config
 from respfuzzer.utils.dump import dump_any_obj
-from respfuzzer.utils.redis_util import get_redis_client
 
 c_conn: Connection = None
+exec_total = 0  # number of execute_once() calls in this process
+exception_counts: Counter[str] = Counter()  # execute_once() 抛出的异常，按类型名计数
 fuzz_config = get_config("fuzz")
 execution_timeout = fuzz_config["execution_timeout"]
 data_fuzz_per_seed = fuzz_config["data_fuzz_per_seed"]
-rc = get_redis_client()
+mutation_batch_size = max(fuzz_config.get("mutation_batch_size", 64), 1)
+MAX_REMUTATIONS = 8  # 重复的变异最多重新变异的次数
+rc = journal_redis_client()  # None with the local journal backend
+coverage_probe: Callable[[], int] | None = None  # 返回当前覆盖的位数
+replay_parent: list | None = None  # 重放时代替原始参数被变异的语料库父条目
+
+
+def set_coverage_probe(probe: Callable[[], int] | None) -> None:
+    """
+    Set the function returning the current coverage of the process, which
+    enables the coverage-guided corpus of `fuzz_function_feedback`.
+    """
+    global coverage_probe
+    coverage_probe = probe
+
+
+def set_execution_timeout(timeout: float | None) -> None:
+    """
+    Set the per-execution deadline used by `execute_once`, falling back to the
+    configured `execution_timeout` for uncalibrated seeds.
+    """
+    global execution_timeout
+    execution_timeout = timeout or fuzz_config["execution_timeout"]
 
 
 def handle_timeout(signum, frame):
@@ -44,6 +82,8 @@ def execute_once(func: Callable, *args, **kwargs):
         TimeoutError: If execution takes longer than execution_timeout
         Exception: If any other exception occurs during execution
     """
+    global exec_total
+    exec_total += 1
     signal.signal(signal.SIGALRM, handle_timeout)
     try:
         signal.setitimer(signal.ITIMER_REAL, execution_timeout)
@@ -52,15 +92,19 @@ def execute_once(func: Callable, *args, **kwargs):
         return res
     except TimeoutError as te:
         signal.setitimer(signal.ITIMER_REAL, 0)
-        seed_id = rc.hget("fuzz", "seed_id")
-        exec_cnt = rc.hget("fuzz", "exec_cnt")
-        random_state = rc.hget("exec_record", int(exec_cnt) + 1)
-        logger.warning(
-            f"TimeoutError during fuzzing seed {seed_id} with random state: {random_state} ({exec_cnt+1}'th mutation)."
-        )
+        exception_counts["TimeoutError"] += 1
+        journal = current_journal()
+        if journal is not None:
+            # 随机状态直接取自本地日志，并在进程退出前把日志写回 Redis
+            journal.flush()
+            seed_id = rc.hget("fuzz", "seed_id") if rc is not None else None
+            logger.warning(
+                f"TimeoutError during fuzzing seed {seed_id} with random state: {journal.in_flight()} ({journal.committed + 1}'th mutation)."
+            )
         raise te
     except Exception as e:
         signal.setitimer(signal.ITIMER_REAL, 0)
+        exception_counts[type(e).__name__] += 1
         # seed_id = rc.hget("fuzz", "seed_id")
         # exec_cnt = rc.hget("fuzz", "exec_cnt")
         # exec_cnt = int(exec_cnt) if exec_cnt else 0
@@ -104,6 +148,132 @@ def reconvert_param_list(param_list, *args, **kwargs) -> tuple[tuple, dict]:
     return args, kwargs
 
 
+def remutate_duplicate(
+    dedup: Deduplicator | None, parent: list, random_state: int, mt_param_list: list
+) -> tuple[int, list | None]:
+    """Mutate `parent` again while `mt_param_list` is a duplicate, at most
+    `MAX_REMUTATIONS` times, so that a duplicate does not waste a mutation.
+
+    The random state of each retry is taken right before it, so the returned
+    state replays the returned mutation like any other.
+
+    Returns:
+        tuple[int, list | None]: The random state and the new mutation, or
+        None if all the retries were duplicates as well.
+    """
+    if dedup is None or not dedup.is_duplicate(mt_param_list):
+        return random_state, mt_param_list
+    for _ in range(MAX_REMUTATIONS):
+        random_state = get_random_state()
+        mt_param_list = mutate_param_list(parent)
+        if not dedup.is_duplicate(mt_param_list):
+            return random_state, mt_param_list
+    return random_state, None
+
+
+def generate_mutations(
+    param_list: list, n: int, start: int = 0, dedup: Deduplicator | None = None
+) -> Iterator[tuple[int, int, list | None]]:
+    """Generate the mutations `start + 1` to `n` of a parameter list in batches.
+
+    Mutations only depend on the random state, so generating up to
+    `mutation_batch_size` of them in one native call yields the same inputs
+    as mutating before every execution. Duplicates found by `dedup` are
+    mutated again, see `remutate_duplicate`.
+
+    Yields:
+        tuple[int, int, list | None]: The 1-based index of the mutation, the
+        random state it was generated from and the mutated parameter list,
+        None if it stayed a duplicate.
+    """
+    i = start
+    while i < n:
+        batch, states = mutate_param_list_batch(
+            param_list, min(mutation_batch_size, n - i)
+        )
+        for random_state, mt_param_list in zip(states, batch):
+            i += 1
+            yield i, *remutate_duplicate(dedup, param_list, random_state, mt_param_list)
+
+
+def record_duplicates(full_name: str, dedup: Deduplicator | None, skipped: int) -> None:
+    """Log the duplicate mutations skipped by a fuzz_function call and add
+    them to `dup_cnt` in Redis."""
+    log_duplicates(full_name, dedup, skipped)
+    if rc is not None and skipped:
+        rc.hincrby("fuzz", "dup_cnt", skipped)
+
+
+def fast_forward(full_name: str, param_list: list) -> int | None:
+    """Fast-forward past the mutations a killed attempt on the same random
+    stream has already executed.
+
+    The mutation that hung is regenerated from its journaled random state
+    without being executed, which leaves the random state at the start of the
+    next mutation.
+
+    Returns:
+        int | None: The number of mutations to skip, or None if the current
+        fuzz_function call was executed entirely by a previous attempt.
+    """
+    resume = resume_point()
+    if resume is None:
+        return 0
+    if resume.call > current_call():
+        logger.debug(f"Skip {full_name}, executed by a previous attempt")
+        return None
+    logger.info(
+        f"Resume {full_name} after {resume.index}'th mutation with random state {resume.random_state}"
+    )
+    set_random_state(resume.random_state)
+    mutate_param_list(param_list)
+    return resume.index
+
+
+def resume_mutations(
+    full_name: str, param_list: list, n: int, dedup: Deduplicator | None = None
+) -> Iterator[tuple[int, int, list | None]]:
+    """Generate the mutations of the current fuzz_function call, skipping the
+    ones a killed attempt on the same random stream has already executed.
+    """
+    start = fast_forward(full_name, param_list)
+    if start is None:
+        return iter(())
+    return generate_mutations(param_list, n, start=start, dedup=dedup)
+
+
+def corpus_mutations(
+    full_name: str,
+    corpus: Corpus,
+    param_list: list,
+    n: int,
+    dedup: Deduplicator | None = None,
+    journal: Journal | None = None,
+) -> Iterator[tuple[int, int, list | None]]:
+    """Generate the mutations of the current fuzz_function call from parents
+    picked from `corpus`, a batch per parent.
+
+    The next parent is only picked after the previous batch was executed, so
+    the entries added meanwhile take part in the scheduling. Each parent is
+    logged to `journal`, so that a crashing mutation can be replayed from its
+    parent and random state.
+    """
+    i = fast_forward(full_name, param_list)
+    if i is None:
+        return
+    while i < n:
+        entry = corpus.next_parent()
+        if journal is not None:
+            # 无法 pickle 的父条目记为空，重放时给出提示
+            pickled = entry.data if entry.pickled else b""
+            journal.set_parent(None if entry is corpus.current else pickled)
+        parent = entry.params()
+        batch, states = mutate_param_list_batch(parent, min(mutation_batch_size, n - i))
+        for random_state, mt_param_list in zip(states, batch):
+            i += 1
+            yield i, *remutate_duplicate(dedup, parent, random_state, mt_param_list)
+
+
 def fuzz_function(func: Callable, *args, **kwargs) -> None:
     """Fuzz test a function by mutating its parameters.
 
@@ -119,9 +289,8 @@ def fuzz_function(func: Callable, *args, **kwargs) -> None:
     """
     full_name = f"{func.__module__}.{func.__name__}"
 
-    exec_cnt = rc.hget("fuzz", "exec_cnt")
-
-    set_random_state(int(time.time()))
+    random_state = next_random_state()
+    set_random_state(random_state)
 
     param_list = convert_to_param_list(*args, **kwargs)
     if len(param_list) == 0:
@@ -130,14 +299,30 @@ def fuzz_function(func: Callable, *args, **kwargs) -> None:
         return
 
     logger.debug(f"Start fuzz {full_name}")
-    rc.hset("fuzz", "current_func", full_name)
-
-    for i in range(1, data_fuzz_per_seed + 1):
-        random_state = get_random_state()
-        rc.hset(f"exec_record", i, random_state)
-        mt_param_list = mutate_param_list(param_list)
-        args, kwargs = reconvert_param_list(mt_param_list, *args, **kwargs)
+    logger.debug(f"Initial random state of {full_name}: {random_state}")
+    if rc is not None:
+        rc.hset("fuzz", "current_func", full_name)
+
+    # 随机状态与执行次数写入本地日志，父进程直接读取，详见 `respfuzzer.lib.fuzz.journal`
+    journal = get_journal(JOURNAL_EXEC_RECORD | JOURNAL_EXEC_CNT, rc, current_call())
+    # 跳过已经执行过的输入，详见 `respfuzzer.lib.fuzz.dedup`
+    dedup = get_deduplicator(full_name)
+    if dedup is not None:
+        dedup.add(param_list)  # 原始参数已由插桩的函数执行过
+    skipped = 0
+    # 只复制被调用方会原地修改的参数，详见 `ArgumentIsolator`
+    isolator = get_isolator(full_name, args, kwargs)
+    for i, random_state, mt_param_list in resume_mutations(
+        full_name, param_list, data_fuzz_per_seed, dedup
+    ):
+        if mt_param_list is None:
+            skipped += 1
+            continue
+        journal.record(i, random_state)
+        exec_list, fingerprints = isolator.prepare(mt_param_list)
+        args, kwargs = reconvert_param_list(exec_list, *args, **kwargs)
         execute_once(func, *args, **kwargs)
+        isolator.check(exec_list, fingerprints)
         """
         在记录变异前的随机状态时，使用了exec_cnt + 1，这是因为当前获取的exec_cnt是在本次执行之前已经执行过的次数。
         如果执行成功，则外部获取到的exec_cnt会加1；
@@ -145,14 +330,27 @@ def fuzz_function(func: Callable, *args, **kwargs) -> None:
         所以在获取变异前的随机状态时，需要使用exec_cnt + 1来获取当前变异对应的随机状态。
         即：想获取第i次变异的随机状态时，i对应的exec_cnt应该是i-1。
         """
-        rc.hincrby("fuzz", "exec_cnt", 1)
+        journal.commit()
+    journal.flush()
+    record_duplicates(full_name, dedup, skipped)
 
     logger.debug(f"Fuzz {full_name} done")
 
 
+def set_replay_parent(parent: list | None) -> None:
+    """
+    Set the corpus parent recovered from the journal, which `replay_fuzz`
+    mutates instead of the arguments of the call.
+    """
+    global replay_parent
+    replay_parent = parent
+
+
 def replay_fuzz(func: Callable, *args, **kwargs) -> None:
     full_name = f"{func.__module__}.{func.__name__}"
     param_list = convert_to_param_list(*args, **kwargs)
+    if replay_parent is not None:
+        param_list = replay_parent
     seed = get_random_state()
     logger.info(f"Replay fuzz {full_name} with random state {seed}")
     mt_param_list = mutate_param_list(param_list)
@@ -168,37 +366,75 @@ def replay_fuzz(func: Callable, *args, **kwargs) -> None:
 def fuzz_function_f4a(func: Callable, *args, **kwargs) -> None:
     full_name = f"{func.__module__}.{func.__name__}"
 
-    set_random_state(int(time.time()))
+    random_state = next_random_state()
+    set_random_state(random_state)
 
-    logger.debug(f"RespFuzzer start fuzz {full_name}")
+    logger.debug(f"RespFuzzer start fuzz {full_name} with random state {random_state}")
 
     param_list = convert_to_param_list(*args, **kwargs)
     if len(param_list) == 0:
         execute_once(func, *args, **kwargs)
         return
 
-    for i in range(1, data_fuzz_per_seed + 1):
-        mt_param_list = mutate_param_list(param_list)
-        args, kwargs = reconvert_param_list(mt_param_list, *args, **kwargs)
+    isolator = get_isolator(full_name, args, kwargs)
+    for _, _, mt_param_list in generate_mutations(param_list, data_fuzz_per_seed):
+        exec_list, fingerprints = isolator.prepare(mt_param_list)
+        args, kwargs = reconvert_param_list(exec_list, *args, **kwargs)
         execute_once(func, *args, **kwargs)
+        isolator.check(exec_list, fingerprints)
 
     logger.debug(f"RespFuzzer fuzz {full_name} done")
 
 
 def fuzz_function_feedback(func: Callable, data_fuzz_per_seed: int, *args, **kwargs) -> None:
     full_name = f"{func.__module__}.{func.__name__}"
-    pid = os.getpid()
-    set_random_state(int(time.time()))
-    logger.info(f"RespFuzzer start feedback fuzz {full_name}")
+    random_state = next_random_state()
+    set_random_state(random_state)
+    logger.info(
+        f"RespFuzzer start feedback fuzz {full_name} with random state {random_state}"
+    )
 
     param_list = convert_to_param_list(*args, **kwargs)
     if len(param_list) == 0:
         execute_once(func, *args, **kwargs)
         return
 
-    for _ in range(1, data_fuzz_per_seed + 1):
-        rc.hset("random_state", str(pid), get_random_state())
-        mt_param_list = mutate_param_list(param_list)
-        args, kwargs = reconvert_param_list(mt_param_list, *args, **kwargs)
+    # 仅维护 random_state 中本进程的最新随机状态
+    journal = get_journal(0, rc, current_call())
+    dedup = get_deduplicator(full_name)
+    if dedup is not None:
+        dedup.add(param_list)  # 原始参数已由插桩的函数执行过
+    skipped = 0
+    isolator = get_isolator(full_name, args, kwargs)
+    # 触发新覆盖的变异结果保留在语料库中，详见 `respfuzzer.lib.fuzz.corpus`
+    corpus = None
+    if CORPUS_ENABLED and coverage_probe is not None:
+        corpus = get_corpus(full_name, args, kwargs)
+        mutations = corpus_mutations(
+            full_name, corpus, param_list, data_fuzz_per_seed, dedup, journal
+        )
+        last_cov = coverage_probe()
+    else:
+        mutations = resume_mutations(full_name, param_list, data_fuzz_per_seed, dedup)
+    for i, random_state, mt_param_list in mutations:
+        if mt_param_list is None:
+            skipped += 1
+            continue
+        journal.record(i, random_state)
+        exec_list, fingerprints = isolator.prepare(mt_param_list)
+        args, kwargs = reconvert_param_list(exec_list, *args, **kwargs)
+        t0 = time.perf_counter()
         execute_once(func, *args, **kwargs)
+        isolator.check(exec_list, fingerprints)
+        if corpus is not None:
+            exec_time = time.perf_counter() - t0
+            cov = coverage_probe()
+            if cov > last_cov and corpus.add(mt_param_list, cov - last_cov, exec_time):
+                logger.debug(
+                    f"Keep {i}'th mutation of {full_name} with random state {random_state}: {cov - last_cov} new bits"
+                )
+            last_cov = cov
+        journal.commit()
+    journal.flush()
+    record_duplicates(full_name, dedup, skipped)
     logger.info(f"RespFuzzer feedback fuzz {full_name} done")
\ No newline at end of file
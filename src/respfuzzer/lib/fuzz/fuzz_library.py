@@ -1,19 +1,26 @@
-import io
 import os
 import sys
 import time
-from multiprocessing import Process
 
 import redis
 from loguru import logger
 
+from respfuzzer.lib.fuzz import fuzz_function
+from respfuzzer.lib.fuzz.calibration import calibrate_seed, mutant_budget
+from respfuzzer.lib.fuzz.code_cache import compile_cached
+from respfuzzer.lib.fuzz.fork_server import ForkServer
 from respfuzzer.lib.fuzz.instrument import instrument_function_via_path_ctx
+from respfuzzer.lib.fuzz.journal import (
+    journal_redis_client,
+    parent_note,
+    recover_journal,
+)
 from respfuzzer.lib.fuzz.llm_mutator import batch_random_llm_mutate_valid_only
+from respfuzzer.lib.fuzz.output_sink import install_output_sink
+from respfuzzer.lib.fuzz.seeding import Resume, derive_state, master_seed
 from respfuzzer.models import Seed
-from respfuzzer.repos.seed_table import get_seeds_iter
+from respfuzzer.repos.seed_table import get_seeds_iter, update_seed_timing
 from respfuzzer.utils.config import get_config
-from respfuzzer.utils.process_helper import manage_process_with_timeout
-from respfuzzer.utils.redis_util import get_redis_client
 
 
 def safe_fuzz(seed: Seed) -> None:
@@ -21,10 +28,8 @@ def safe_fuzz(seed: Seed) -> None:
     Safely and silently execute the fuzzing process for a given seed.
     """
     os.setpgid(0, 0)  # 设置进程组ID，便于后续杀死子进程
-    fake_stdout = io.StringIO()
-    fake_stderr = io.StringIO()
-    sys.stdout = fake_stdout
-    sys.stderr = fake_stderr
+    ring = install_output_sink()
+    fuzz_function.set_execution_timeout(seed.exec_timeout)
 
     logger.debug(
         f"Safe fuzzing seed {seed.id}: {seed.func_name} with PID {os.getpid()}, PGID {os.getpgid(0)}"
@@ -32,28 +37,56 @@ def safe_fuzz(seed: Seed) -> None:
 
     try:
         with instrument_function_via_path_ctx(seed.func_name):
-            exec(seed.function_call)
+            exec(compile_cached(seed.function_call))
     except TimeoutError as te:
         raise te
     except Exception as e:
-        logger.error(f"Seems seed {seed.id} is invalid:\n{e}")
+        output = f"\nRecent output:\n{ring.getvalue()}" if ring else ""
+        logger.error(f"Seems seed {seed.id} is invalid:\n{e}{output}")
         # traceback.print_stack()
         raise e
 
 
-def fuzz_single_seed(seed: Seed, config: dict, redis_client: redis.Redis) -> None:
+def safe_execute(seed: Seed) -> None:
+    """
+    Silently execute the seed once without fuzzing, used for calibration.
+    """
+    os.setpgid(0, 0)
+    install_output_sink()
+    exec(compile_cached(seed.function_call))
+
+
+def fuzz_single_seed(
+    seed: Seed,
+    config: dict,
+    redis_client: redis.Redis | None,
+    fork_server: ForkServer,
+) -> None:
     """
     Fuzz a single seed with retries and monitoring.
-    Returns the number of executions.
+    Every attempt runs in a child forked from `fork_server`, so the library
+    under test is imported only once per library. Progress is read from the
+    child's journal; `redis_client` is None with the local journal backend.
+    An attempt killed while executing a mutation is retried on the same random
+    stream from the mutation after the hanging one, so retries never repeat
+    executed mutations.
     """
     logger.info(f"Starting SGM Fuzzing for seed {seed.id}: {seed.func_name}")
-    execution_timeout = config.get("execution_timeout")
     llm_fuzz_per_seed = config.get("llm_fuzz_per_seed")
     data_fuzz_per_seed = config.get("data_fuzz_per_seed")
     max_try_per_seed = config.get("max_try_per_seed")
 
-    redis_client.hset("fuzz", "seed_id", seed.id)
-    redis_client.hset("fuzz", "current_func", seed.func_name)
+    if redis_client is not None:
+        redis_client.hset("fuzz", "seed_id", seed.id)
+        redis_client.hset("fuzz", "current_func", seed.func_name)
+
+    if seed.exec_timeout is None:
+        calibrate_seed(
+            seed,
+            lambda timeout: fork_server.run(seed, timeout, target=safe_execute),
+            config,
+        )
+        update_seed_timing(seed)
 
     t0 = time.time()
     mutants = batch_random_llm_mutate_valid_only(
@@ -64,43 +97,58 @@ def fuzz_single_seed(seed: Seed, config: dict, redis_client: redis.Redis) -> Non
         f"LLM mutation completed, generated {len(mutants)}/{llm_fuzz_per_seed} mutants in {dt:.2f}s"
     )
 
-    for mutant in mutants:
+    for mutant_index, mutant in enumerate(mutants):
         logger.debug(f"LLM mutated code for seed {seed.id}:\n{mutant.function_call}\n")
-        redis_client.hset("fuzz", "exec_cnt", 0)
-        redis_client.delete("exec_record")
+        if redis_client is not None:
+            redis_client.hset("fuzz", "exec_cnt", 0)
+            redis_client.delete("exec_record")
 
+        exec_cnt = 0
+        resume = None
         for attempt in range(1, max_try_per_seed + 1):
-            exec_cnt = int(redis_client.hget("fuzz", "exec_cnt") or 0)
             if exec_cnt >= data_fuzz_per_seed:
                 break
-            process = Process(target=safe_fuzz, args=(mutant,))
 
             """动态调整超时时间
             总时间 = 固定时间 + 浮动时间
-            固定时间=execution_timeout
-            浮动时间=(data_fuzz_per_seed - exec_cnt) / 100
+            固定时间=2 * 校准得到的单次执行期限
+            浮动时间=(data_fuzz_per_seed - exec_cnt) * 中位执行时间 * timeout_multiplier
             解释：
             1. 浮动时间根据剩余需要执行的变异数调整，确保有足够时间完成剩余任务。
-            2. 浮动时间的一个基本假设是大部分测试用例的执行都在10ms以内完成，因此除以100。
+            2. 执行时间来自校准阶段测得的基线分布，详见 `respfuzzer.lib.fuzz.calibration`。
             """
-            timeout = execution_timeout + (data_fuzz_per_seed - exec_cnt) / 100
+            timeout = mutant_budget(seed, data_fuzz_per_seed - exec_cnt, config)
+            if resume is None:
+                # 无法恢复时每次尝试使用各自的随机流，重试不会重放已执行过的变异
+                stream = derive_state(
+                    master_seed(), seed.id or 0, mutant_index, attempt
+                )
 
             logger.debug(
-                f"Start fuzz mutant {mutant.id} of seed {seed.id} ({seed.func_name}), attempt={attempt}, exec_cnt_res={data_fuzz_per_seed-exec_cnt}, process PID={process.pid}"
+                f"Start fuzz mutant {mutant.id} of seed {seed.id} ({seed.func_name}), attempt={attempt}, exec_cnt_res={data_fuzz_per_seed-exec_cnt}, stream={stream}, resume={resume}"
             )
-            success = manage_process_with_timeout(process, timeout)
-
-            if not success:
-                exec_cnt = int(redis_client.hget("fuzz", "exec_cnt") or 0)
-                randome_state = redis_client.hget("exec_record", exec_cnt + 1)
-                logger.info(
-                    f"Mutant {mutant.id} of seed {seed.id} not completed successfully with random state {randome_state}."
-                )
-                continue  # 重试
+            success = fork_server.run(mutant, timeout, stream=stream, resume=resume)
+            recovery = None
+            if fork_server.child_pid is not None:
+                # 子进程可能被 SIGKILL 杀死，执行次数和随机状态直接从其本地日志中读取
+                recovery = recover_journal(fork_server.child_pid, redis_client)
+            if recovery is not None:
+                exec_cnt += recovery.exec_cnt
+
+            if success:
+                break  # 随机流中的变异已全部执行
+
+            random_state = recovery.random_state if recovery else None
+            logger.info(
+                f"Mutant {mutant.id} of seed {seed.id} not completed successfully with random state {random_state}{parent_note(recovery)}."
+            )
+            resume = None
+            if random_state is not None:
+                # 在同一条随机流上从挂起的变异之后继续，即第 exec_cnt + 2 次变异
+                resume = Resume(recovery.call, recovery.index, random_state)
 
-        final_exec_cnt = int(redis_client.hget("fuzz", "exec_cnt") or 0)
         logger.info(
-            f"Finished fuzzing mutant {mutant.id} of seed {seed.id}, total executions: {final_exec_cnt}"
+            f"Finished fuzzing mutant {mutant.id} of seed {seed.id}, total executions: {exec_cnt}"
         )
 
 
@@ -113,8 +161,11 @@ def fuzz_one_library(library_name: str) -> None:
     logger.add(sys.__stderr__, level="INFO")
 
     config = get_config("fuzz")
-    redis_client = get_redis_client()
-    redis_client.delete("fuzz")
-
-    for seed in get_seeds_iter(library_name):
-        fuzz_single_seed(seed, config, redis_client)
+    master_seed()
+    redis_client = journal_redis_client()
+    if redis_client is not None:
+        redis_client.delete("fuzz")
+
+    with ForkServer(library_name, safe_fuzz) as fork_server:
+        for seed in get_seeds_iter(library_name):
+            fuzz_single_seed(seed, config, redis_client, fork_server)
@@ -0,0 +1,359 @@
+"""
+数据级变异热循环中随机状态的本地日志。
+
+之前 `fuzz_function` 的每次迭代都要同步访问 Redis 三次（hget、hset exec_record、
+hincrby exec_cnt），`fuzz_function_feedback` 每次迭代也要 hset random_state，当
+`data_fuzz_per_seed` 达到数千时 Redis 的往返延迟成为变异循环的瓶颈。
+
+本模块把日志写入每个 worker 进程私有的 mmap 文件（`[fuzz] journal_dir`，默认位于
+/dev/shm）。mmap 文件的写入在进程被 SIGKILL 后依然保留，因此父进程可以通过 worker
+的 PID 直接读取其日志，得到已完成的执行次数以及被杀死时正在执行的那次变异的随机状态。
+日志的后端由 `[fuzz] journal_backend` 配置：
+
+  - "redis"：每积累 `journal_flush_interval` 条记录通过一条 pipeline 批量写回 Redis，
+    父进程恢复时把尚未写回的记录补写到 Redis，便于多机部署时集中观察；
+  - "local"：只写本地文件，最内层循环完全没有网络 I/O，单机运行时也不再需要 Redis。
+
+文件布局：
+  - 头部：magic, flags, capacity, recorded, committed, flushed records, flushed commits,
+    call（fuzz_function 调用在随机流中的序号，用于恢复，详见 `respfuzzer.lib.fuzz.seeding`）,
+    total（进程内所有 fuzz_function 调用累计完成的执行次数，不随每次调用重置）
+  - 之后是 capacity 条 (index, random state) 记录组成的环形缓冲区，第 n 条记录位于 n % capacity
+
+从语料库条目变异出的输入不能只凭随机状态重放（详见 `respfuzzer.lib.fuzz.corpus`）。当前
+这一批变异的父条目以 pickle 的形式写入旁边的 {pid}.parent 文件，父进程恢复时一并读出，
+与随机状态一起交给 `replay_mutation`。从原始参数变异时没有该文件。
+"""
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import NamedTuple
+
+import redis
+from loguru import logger
+
+from respfuzzer.utils.config import get_config
+from respfuzzer.utils.redis_util import get_redis_client
+
+JOURNAL_EXEC_RECORD = 0b01  # 将每次变异的随机状态写入 exec_record
+JOURNAL_EXEC_CNT = 0b10  # 将完成的执行次数累加到 fuzz.exec_cnt
+
+_MAGIC = b"RFJRNL03"
+_HEADER = struct.Struct("<8sQQQQQQQQ")
+_ENTRY = struct.Struct("<QQ")  # index, random state
+_U64 = struct.Struct("<Q")
+
+_RECORDED = 24
+_COMMITTED = 32
+_FLUSHED_RECORDS = 40
+_FLUSHED_COMMITS = 48
+_TOTAL = 64
+
+_config = get_config("fuzz")
+_journal_dir = Path(_config.get("journal_dir") or "/dev/shm/respfuzzer-journal")
+_flush_interval = max(_config.get("journal_flush_interval", 256), 1)
+JOURNAL_BACKEND = _config.get("journal_backend", "redis")
+
+
+class Recovery(NamedTuple):
+    exec_cnt: int  # 进程内所有 fuzz_function 调用累计完成的执行次数
+    random_state: int | None  # 进程被杀死时正在执行的变异的随机状态
+    index: int | None  # 该变异的序号
+    call: int  # 该变异所属的 fuzz_function 调用在随机流中的序号
+    parent: bytes | None = None  # 该变异的父条目（pickle），None 表示从原始参数变异
+
+
+def journal_redis_client() -> redis.Redis | None:
+    """
+    Return the Redis client journals are flushed to, or None for the local
+    backend.
+    """
+    return get_redis_client() if JOURNAL_BACKEND == "redis" else None
+
+
+def journal_path(pid: int) -> Path:
+    return _journal_dir / f"{pid}.journal"
+
+
+def parent_path(pid: int) -> Path:
+    return _journal_dir / f"{pid}.parent"
+
+
+def dump_parent(random_state: int, parent: bytes) -> Path:
+    """
+    Save the recovered corpus parent of the mutation with `random_state`,
+    for `replay_mutation` to mutate it instead of the seed's arguments.
+    """
+    path = Path(f"/tmp/respfuzzer_replay_{random_state}_parent.pkl")
+    path.write_bytes(parent)
+    return path
+
+
+def parent_note(recovery: Recovery | None) -> str:
+    """
+    Dump the corpus parent of the recovered in-flight mutation, if any, and
+    return the note appended to its log line for `replay_mutation from_log`.
+    """
+    if recovery is None or recovery.random_state is None or recovery.parent is None:
+        return ""
+    return f" from corpus parent {dump_parent(recovery.random_state, recovery.parent)}"
+
+
+class Journal:
+    """
+    The mmap-backed random-state journal of one worker process.
+
+    Example:
+    >>> journal = Journal.create(os.getpid(), JOURNAL_EXEC_RECORD, rc)
+    >>> journal.record(1, get_random_state())
+    >>> journal.commit()
+    >>> journal.flush()
+    """
+
+    def __init__(self, pid: int, mm: mmap.mmap, rc: redis.Redis | None) -> None:
+        self.pid = pid
+        self.mm = mm
+        self.rc = rc
+        (
+            _,
+            self.flags,
+            self.capacity,
+            self.recorded,
+            self.committed,
+            self.flushed_records,
+            self.flushed_commits,
+            self.call,
+            self.total,
+        ) = _HEADER.unpack_from(mm)
+
+    @classmethod
+    def create(
+        cls,
+        pid: int,
+        flags: int,
+        rc: redis.Redis | None,
+        capacity: int = _flush_interval,
+        call: int = 0,
+    ) -> "Journal":
+        _journal_dir.mkdir(parents=True, exist_ok=True)
+        parent_path(pid).unlink(missing_ok=True)  # 复用的 PID 可能留下旧的父条目
+        size = _HEADER.size + capacity * _ENTRY.size
+        fd = os.open(journal_path(pid), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, size)
+            mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(mm, 0, _MAGIC, flags, capacity, 0, 0, 0, 0, call, 0)
+        return cls(pid, mm, rc)
+
+    @classmethod
+    def attach(cls, pid: int, rc: redis.Redis | None) -> "Journal | None":
+        """
+        Open the journal left by the (usually dead) process `pid`, if any.
+        """
+        try:
+            fd = os.open(journal_path(pid), os.O_RDWR)
+        except FileNotFoundError:
+            return None
+        try:
+            mm = mmap.mmap(fd, 0)
+        except ValueError:  # 文件为空：进程在初始化日志时就被杀死了
+            return None
+        finally:
+            os.close(fd)
+        if mm[: len(_MAGIC)] != _MAGIC:
+            mm.close()
+            return None
+        return cls(pid, mm, rc)
+
+    def reset(self, flags: int, call: int = 0) -> None:
+        """
+        Flush the pending records and start a new log with `flags` for the
+        `call`'th fuzz_function call. The cumulative execution count is kept.
+        """
+        self.flush()
+        self.flags = flags
+        self.call = call
+        self.recorded = self.committed = 0
+        self.flushed_records = self.flushed_commits = 0
+        _HEADER.pack_into(
+            self.mm, 0, _MAGIC, flags, self.capacity, 0, 0, 0, 0, call, self.total
+        )
+        self.set_parent(None)
+
+    def set_parent(self, parent: bytes | None) -> None:
+        """
+        Log the pickled corpus parent of the mutations recorded from now on,
+        or None when they are mutated from the original arguments.
+        """
+        path = parent_path(self.pid)
+        if parent is None:
+            path.unlink(missing_ok=True)
+            return
+        # 先写临时文件再改名，进程在写入时被杀死也不会留下不完整的父条目
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(parent)
+        os.replace(tmp, path)
+
+    def _entry(self, seq: int) -> tuple[int, int]:
+        return _ENTRY.unpack_from(
+            self.mm, _HEADER.size + (seq % self.capacity) * _ENTRY.size
+        )
+
+    def record(self, index: int, random_state: int) -> None:
+        """
+        Log the random state of the `index`'th mutation before executing it.
+        """
+        if self.recorded - self.flushed_records >= self.capacity:
+            self.flush()
+        offset = _HEADER.size + (self.recorded % self.capacity) * _ENTRY.size
+        _ENTRY.pack_into(self.mm, offset, index, random_state)
+        self.recorded += 1
+        _U64.pack_into(self.mm, _RECORDED, self.recorded)
+
+    def commit(self) -> None:
+        """
+        Mark the last recorded mutation as executed.
+        """
+        self.committed += 1
+        self.total += 1
+        _U64.pack_into(self.mm, _COMMITTED, self.committed)
+        _U64.pack_into(self.mm, _TOTAL, self.total)
+
+    def in_flight(self) -> int | None:
+        """
+        Return the random state of the mutation being executed, if any.
+        """
+        entry = self.in_flight_entry()
+        return entry[1] if entry else None
+
+    def in_flight_entry(self) -> tuple[int, int] | None:
+        """
+        Return the index and random state of the mutation being executed.
+        """
+        if self.recorded == 0 or self.committed >= self.recorded:
+            return None
+        return self._entry(self.recorded - 1)
+
+    def exec_cnt(self) -> int:
+        """
+        Return the executions completed by all fuzz_function calls of the
+        process, not only the current one.
+        """
+        return self.total
+
+    def flush(self) -> None:
+        """
+        Write the pending records back to Redis with a single pipeline. With
+        the local backend the records are simply marked as flushed.
+        """
+        pending = self.recorded - self.flushed_records
+        delta = self.committed - self.flushed_commits
+        if pending == 0 and delta == 0:
+            return
+        if self.rc is None:
+            self._mark_flushed()
+            return
+        pipe = self.rc.pipeline(transaction=False)
+        if pending and self.flags & JOURNAL_EXEC_RECORD:
+            mapping = dict(
+                self._entry(seq) for seq in range(self.flushed_records, self.recorded)
+            )
+            pipe.hset("exec_record", mapping=mapping)
+        if delta and self.flags & JOURNAL_EXEC_CNT:
+            pipe.hincrby("fuzz", "exec_cnt", delta)
+        if self.recorded:
+            pipe.hset("random_state", str(self.pid), self._entry(self.recorded - 1)[1])
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            # 记录仍保留在 mmap 中，下次 flush 或父进程恢复时会重试
+            logger.warning(f"Failed to flush journal of {self.pid}: {e}")
+            return
+        self._mark_flushed()
+
+    def _mark_flushed(self) -> None:
+        self.flushed_records = self.recorded
+        self.flushed_commits = self.committed
+        _U64.pack_into(self.mm, _FLUSHED_RECORDS, self.flushed_records)
+        _U64.pack_into(self.mm, _FLUSHED_COMMITS, self.flushed_commits)
+
+    def close(self, unlink: bool = False) -> None:
+        self.mm.close()
+        if unlink:
+            journal_path(self.pid).unlink(missing_ok=True)
+            parent_path(self.pid).unlink(missing_ok=True)
+
+
+_journal: Journal | None = None
+
+
+def get_journal(flags: int, rc: redis.Redis | None, call: int = 0) -> Journal:
+    """
+    Return the journal of the current process, started afresh with `flags`
+    for the `call`'th fuzz_function call.
+    """
+    global _journal
+    if _journal is None or _journal.pid != os.getpid():
+        # fork 出的子进程不能复用父进程的日志
+        _journal = Journal.create(os.getpid(), flags, rc, call=call)
+    else:
+        _journal.reset(flags, call)
+    return _journal
+
+
+def current_journal() -> Journal | None:
+    if _journal is None or _journal.pid != os.getpid():
+        return None
+    return _journal
+
+
+def close_journal() -> None:
+    """
+    Flush and remove the journal of the current process before it exits.
+    """
+    global _journal
+    journal = current_journal()
+    if journal is None:
+        return
+    journal.flush()
+    journal.close(unlink=True)
+    _journal = None
+
+
+def recover_journal(pid: int, rc: redis.Redis | None) -> Recovery | None:
+    """
+    Read and remove the journal left by the finished or killed worker `pid`,
+    flushing the leftover records to Redis with the redis backend.
+
+    Returns:
+        Recovery | None: The number of completed executions and the index,
+        random state and corpus parent of the mutation in flight when the
+        worker died, or None if `pid` left no journal.
+    """
+    try:
+        journal = Journal.attach(pid, rc)
+        if journal is None:
+            return None
+        try:
+            index, random_state = journal.in_flight_entry() or (None, None)
+            parent = None
+            if random_state is not None:
+                try:
+                    parent = parent_path(pid).read_bytes()
+                except FileNotFoundError:
+                    pass
+            recovery = Recovery(
+                journal.exec_cnt(), random_state, index, journal.call, parent
+            )
+            journal.flush()
+        finally:
+            journal.close()
+        return recovery
+    finally:
+        # 无论读取是否成功都删除日志，同一 PID 被复用时不会读到旧的日志
+        journal_path(pid).unlink(missing_ok=True)
+        parent_path(pid).unlink(missing_ok=True)
@@ -25,6 +25,9 @@ from respfuzzer.utils.llm_helper import SimpleLLMClient
 
 llm_cfg = get_config("llm_mutator")
 client = SimpleLLMClient(**llm_cfg)
+# 每 CPU 秒新增该数量的覆盖位时，覆盖率增益为 1 - 1/e
+reward_cov_rate = max(get_config("fuzz").get("reward_cov_rate", 100.0), 1e-9)
+MIN_CPU_TIME = 1e-3  # 计算覆盖率增益时，变异体至少按 1ms CPU 时间计
 
 
 PROMPT_MUTATE = (
@@ -83,6 +86,7 @@ def llm_mutate(seed: Seed, mutation_type: int) -> Mutant:
         func_name=seed.func_name,
         args=seed.args,
         function_call=mutated_code,
+        exec_timeout=seed.exec_timeout,
     )
     mutant_id = create_mutant(mutant)
     mutant.id = mutant_id
@@ -194,11 +198,11 @@ class LLMMutator:
         将多种信号归一化为统一奖励值 [0,1]
         不存在语法错误是基础要求，达不到有惩罚，达到了没有奖励，此时应该保持奖励为0.5，从而使得0.5*0.1+0.9*0.5=0.5保持不变
         当存在语法错误时，不会进行传统变异，覆盖率奖励一定为0
-        仅当不存在语法错误时，才会进行传统变异，从而有覆盖率奖励，此时奖励会变成1，从而使得1*0.1+0.9*0.5=0.55略有提升
+        仅当不存在语法错误时，才会进行传统变异，从而有覆盖率奖励，此时奖励随每 CPU 秒新增覆盖增长，最高接近1，从而使得1*0.1+0.9*0.5=0.55略有提升
 
         Arguments:
             has_syntax_error: 是否有语法错误
-            coverage_gain: 覆盖率增益 (0~1)
+            coverage_gain: 覆盖率增益 (0~1)，见 `coverage_gain`
         """
         # 基础权重分配
         w_syntax = 0.5
@@ -213,6 +217,22 @@ class LLMMutator:
         # 归一化到 [0,1]
         return min(max(base_reward, 0), 1)
 
+    @staticmethod
+    def coverage_gain(new_cov: int, cpu_time: float) -> float:
+        """
+        将变异体在 worker 中每 CPU 秒新增的覆盖位数映射到 [0,1)，作为 `calculate_reward` 的
+        覆盖率增益。新增覆盖相同时，消耗 CPU 时间越多的变异体增益越低，从而引导选择
+        产出高且开销低的变异算子。
+
+        Arguments:
+            new_cov: 新增覆盖位数
+            cpu_time: 数据级变异消耗的 CPU 时间（秒）
+        """
+        if new_cov <= 0:
+            return 0.0
+        rate = new_cov / max(cpu_time, MIN_CPU_TIME)
+        return 1 - math.exp(-rate / reward_cov_rate)
+
     def random_llm_mutate(self) -> tuple[Mutant, int]:
         """
         随机选择一种变异类型并对种子进行变异。
@@ -1,7 +1,30 @@
+from collections.abc import Buffer
+
 def mutate_int(a: int) -> int: ...
-def mutate_str(s: str) -> str: ...
+def mutate_str(s: str, rng: ChainRng | None = None) -> str: ...
 def mutate_float(f: float) -> float: ...
-def mutate_bytes(b: bytes) -> bytes: ...
+def mutate_bytes(b: bytes, rng: ChainRng | None = None) -> bytes: ...
 def set_random_state(seed: int) -> None: ...
 def get_random_state() -> int: ...
 def randint(max: int) -> int: ...
+def mutate_int_batch(a: int, n: int) -> tuple[list[int], list[int]]: ...
+def mutate_float_batch(f: float, n: int) -> tuple[list[float], list[int]]: ...
+def mutate_str_batch(s: str, n: int) -> tuple[list[str], list[int]]: ...
+def mutate_bytes_batch(b: bytes, n: int) -> tuple[list[bytes], list[int]]: ...
+def mutate_buffer(buffer: Buffer, rng: ChainRng | None = None) -> None: ...
+def atomic_or_words(map: Buffer, index: list[int], words: list[int]) -> int: ...
+def atomic_or_trace(map: Buffer, trace: Buffer) -> int: ...
+def mutate_auto(value: object) -> object: ...
+def mutate_param_list(params: list) -> list: ...
+def mutate_param_list_batch(params: list, n: int) -> tuple[list[list], list[int]]: ...
+def set_copy_on_write(enabled: bool) -> None: ...
+
+class ChainRng:
+    state: int
+    def __init__(self, state: int | None = None) -> None: ...
+    def randint(self, max: int) -> int: ...
+    def mutate_int(self, a: int) -> int: ...
+    def mutate_float(self, f: float) -> float: ...
+    def mutate_str(self, s: str) -> str: ...
+    def mutate_bytes(self, b: bytes) -> bytes: ...
+    def mutate_buffer(self, buffer: Buffer) -> None: ...
@@ -1,47 +1,133 @@
 import copy
-from typing import Dict, FrozenSet, List, Set, Tuple
+from typing import Callable, List
 
+from respfuzzer.lib.fuzz import mutate as native
+from respfuzzer.lib.fuzz.array_mutator import ARRAY_MUTATORS
+from respfuzzer.lib.fuzz.dedup import structural_hash
 from respfuzzer.lib.fuzz.mutate import (
+    get_random_state,
     mutate_bytes,
     mutate_float,
     mutate_int,
     mutate_str,
     randint,
 )
+from respfuzzer.utils.config import get_config
 
-VALUE_TYPES = [
-    (bool, "bool"),
-    (int, "int"),
-    (float, "float"),
-    (complex, "complex"),
-    (str, "str"),
-    (bytes, "bytes"),
-    (List, "list"),
-    (Tuple, "tuple"),
-    (Set, "set"),
-    (FrozenSet, "frozenset"),
-    (Dict, "dict"),
-    (object, "instance"),
-]
+# 写时复制：变异函数从不原地修改传入的值，因此只需浅拷贝被修改的那个容器/对象，
+# 未被修改的参数和成员在变异前后共享；关闭后恢复为逐层深拷贝
+COPY_ON_WRITE = get_config("fuzz").get("copy_on_write", True)
 
 
-def get_type(old_val) -> str:
+def copy_value(old_val):
     """
-    Get the type string for a given value.
+    Copy a container or instance which is about to be modified.
 
     Args:
-        old_val: The value to check type for.
+        old_val: The value to copy.
 
     Returns:
-        str: The type string.
+        A shallow copy with copy-on-write, otherwise a deep copy.
+    """
+    if COPY_ON_WRITE:
+        return copy.copy(old_val)
+    return copy.deepcopy(old_val)
+
+
+# 不可变的原子类型，执行前不需要复制
+_IMMUTABLE = (bool, int, float, complex, str, bytes, range, type, type(None))
+
+
+def is_immutable(value) -> bool:
+    cls = type(value)
+    if cls in _IMMUTABLE:
+        return True
+    if cls in (tuple, frozenset):
+        return all(is_immutable(v) for v in value)
+    return False
+
 
-    Raises:
-        ValueError: If the value type is unknown.
+PROBE_EXECUTIONS = 4  # 每个函数前几次执行传入深拷贝，检查被调用方是否原地修改参数
+
+
+class ArgumentIsolator:
+    """
+    Protect the arguments shared by copy-on-write mutations from callees that
+    modify their inputs in place, copying only the arguments such a callee
+    actually touches.
+
+    With copy-on-write, the unmutated arguments (and the unmutated members
+    of mutated containers) are the seed's own objects, shared by every
+    mutation of a batch. A callee modifying them in place, e.g. `list.sort`
+    or an `out=` array, would corrupt the following mutations, and a
+    mutation replayed from its random state would not be the input that
+    actually ran. The first `PROBE_EXECUTIONS` executions of a function get
+    deep copies of all mutable arguments, fingerprinted before and after the
+    call. Afterwards only the positions whose fingerprint changed, or could
+    not be computed (e.g. arbitrary instances), are deep-copied; the others
+    are passed as they are.
+
+    Example:
+    >>> isolator = get_isolator(full_name, args, kwargs)
+    >>> exec_list, fingerprints = isolator.prepare(mt_param_list)
+    >>> execute_once(func, *exec_list)
+    >>> isolator.check(exec_list, fingerprints)
     """
-    for type_, val in VALUE_TYPES:
-        if isinstance(old_val, type_):  # type: ignore
-            return val
-    raise ValueError(f"Unknown value type {old_val}")
+
+    def __init__(self) -> None:
+        self.probed = 0
+        self.dirty: set[int] = set()  # 需要在每次执行前深拷贝的参数位置
+
+    def prepare(self, param_list: List[object]) -> tuple[list, list | None]:
+        """
+        Return the parameter list to execute, and the fingerprints of its
+        arguments to `check` after a probing execution, or None.
+        """
+        if not COPY_ON_WRITE:
+            return param_list, None  # 变异时已经逐层深拷贝
+        probing = self.probed < PROBE_EXECUTIONS
+        exec_list, fingerprints = [], []
+        for i, value in enumerate(param_list):
+            fingerprint = None
+            if not is_immutable(value) and (probing or i in self.dirty):
+                if probing:
+                    fingerprint = structural_hash(value, None)
+                    if fingerprint is None:
+                        self.dirty.add(i)  # 无法判断是否被修改，总是复制
+                try:
+                    value = copy.deepcopy(value)
+                except Exception:
+                    fingerprint = None
+            exec_list.append(value)
+            fingerprints.append(fingerprint)
+        return exec_list, fingerprints if probing else None
+
+    def check(self, exec_list: list, fingerprints: list | None) -> None:
+        """
+        Mark the arguments the callee modified during a probing execution.
+        """
+        if fingerprints is None:
+            return
+        self.probed += 1
+        for i, fingerprint in enumerate(fingerprints):
+            if fingerprint is not None and i not in self.dirty:
+                if structural_hash(exec_list[i], None) != fingerprint:
+                    self.dirty.add(i)
+
+
+_isolators: dict[tuple, ArgumentIsolator] = {}
+
+
+def get_isolator(full_name: str, args: tuple, kwargs: dict) -> ArgumentIsolator:
+    """
+    Return the isolator of `full_name` for calls with the same number of
+    positional arguments and keyword names.
+    """
+    key = (full_name, len(args), tuple(kwargs))
+    isolator = _isolators.get(key)
+    if isolator is None:
+        isolator = _isolators[key] = ArgumentIsolator()
+    return isolator
 
 
 def mutate_auto(old_val):
@@ -54,13 +140,11 @@ def mutate_auto(old_val):
     """
     if old_val is None:
         return None
-    if isinstance(old_val, object) and type(old_val) is type(object):
+    cls = type(old_val)
+    if cls is type:
         return old_val
-    type_ = get_type(old_val)
-    func_name = f"mutate_{type_}"
-    func = globals()[func_name]
-    new_val = func(old_val)
-    return new_val
+    mutator = _dispatch.get(cls) or resolve_mutator(cls)
+    return mutator(old_val)
 
 
 def mutate_complex(old_val: complex) -> complex:
@@ -105,7 +189,7 @@ def mutate_list_expand(old_val: list) -> list:
     index = randint(len(old_val) - 1)
     t = old_val[index]
     new_t = mutate_auto(t)
-    new_val = copy.deepcopy(old_val)
+    new_val = copy_value(old_val)
     new_val.append(new_t)
     return new_val
 
@@ -150,7 +234,7 @@ def mutate_frozenset(old_val: frozenset) -> frozenset:
 
 
 def mutate_dict(old_val: dict) -> dict:
-    new_val = copy.deepcopy(old_val)
+    new_val = copy_value(old_val)
     keys = list(new_val.keys())
     if len(keys) == 0:
         return old_val
@@ -162,7 +246,10 @@ def mutate_dict(old_val: dict) -> dict:
 
 def mutate_instance(old_val: object) -> object:
     try:
-        new_val = copy.deepcopy(old_val)
+        new_val = copy_value(old_val)
+        if COPY_ON_WRITE and new_val is old_val:
+            # __copy__ 返回了对象本身，修改其成员会影响原对象
+            new_val = copy.deepcopy(old_val)
         members = dir(new_val)
         members = [x for x in members if not x.startswith("__")]
         if len(members) == 0:
@@ -180,7 +267,7 @@ def mutate_param_list(old_val: List[object]) -> List:
     a = len(old_val)
     if a <= 1:
         return old_val
-    new_val = copy.deepcopy(old_val)
+    new_val = copy_value(old_val)
     mt_num = randint(a) + 1
     mt_idx = []
     while mt_num > 0:
@@ -193,6 +280,121 @@ def mutate_param_list(old_val: List[object]) -> List:
     return new_val
 
 
+def mutate_param_list_batch(old_val: List[object], n: int) -> tuple[list, list[int]]:
+    """
+    Mutate a parameter list `n` times.
+
+    Returns:
+        tuple[list, list[int]]: The mutated parameter lists and the random
+        state before each mutation, from which it can be replayed.
+    """
+    batch, states = [], []
+    for _ in range(n):
+        states.append(get_random_state())
+        batch.append(mutate_param_list(old_val))
+    return batch, states
+
+
+# 类型分派表：按 type(x) 查找变异函数。_registry 保存注册的类型，_dispatch 缓存沿 MRO
+# 解析出的结果，因此每个值的分派只需一次字典查找，子类在首次出现后同样命中缓存。
+# 可选依赖中的类型以 "模块.类名" 注册，不必为了注册而导入它们。
+# bytearray 未注册，与之前一样按任意对象处理。
+_registry: dict[type | str, Callable] = {
+    bool: mutate_bool,
+    int: mutate_int,
+    float: mutate_float,
+    complex: mutate_complex,
+    str: mutate_str,
+    bytes: mutate_bytes,
+    list: mutate_list,
+    tuple: mutate_tuple,
+    set: mutate_set,
+    frozenset: mutate_frozenset,
+    dict: mutate_dict,
+    object: mutate_instance,
+    **ARRAY_MUTATORS,
+}
+_dispatch: dict[type, Callable] = {}
+
+# 原生 mutate_auto 的分派缓存：内置变异函数映射为原生实现的编号（与 structural.rs 中
+# ValueType 的顺序一致），用户注册的变异函数则直接保存可调用对象
+_native_codes: dict[Callable, int] = {
+    mutate_bool: 0,
+    mutate_int: 1,
+    mutate_float: 2,
+    mutate_complex: 3,
+    mutate_str: 4,
+    mutate_bytes: 5,
+    mutate_list: 6,
+    mutate_tuple: 7,
+    mutate_set: 8,
+    mutate_frozenset: 9,
+    mutate_dict: 10,
+    mutate_instance: 11,
+}
+_native_dispatch: dict[type, Callable | int] = {}
+
+
+def resolve_mutator(cls: type) -> Callable:
+    """
+    Resolve the mutator of `cls` along its MRO and cache the result.
+
+    Args:
+        cls: The type of the value to mutate.
+
+    Returns:
+        Callable: The mutator registered for the nearest base class.
+    """
+    for base in cls.__mro__:
+        mutator = _registry.get(base) or _registry.get(
+            f"{base.__module__}.{base.__qualname__}"
+        )
+        if mutator is not None:
+            break
+    else:
+        mutator = mutate_instance  # 元类定义了奇怪的 __mro__
+    _dispatch[cls] = mutator
+    return mutator
+
+
+def register_mutator(type_: type | str, mutator: Callable | None = None):
+    """
+    Register `mutator` for values of `type_` and its subclasses, overriding the
+    built-in mutator if any. Can also be used as a decorator. `type_` may also
+    be the qualified name of a type, e.g. "numpy.ndarray", to avoid importing
+    its module.
+
+    The mutator receives the value and returns a mutated value. It should draw
+    random numbers from `randint` only, so that the mutation can be replayed
+    from the random state, and may call `mutate_auto` on the members.
+
+    Example:
+    >>> @register_mutator(Fraction)
+    ... def mutate_fraction(old_val):
+    ...     return Fraction(mutate_int(old_val.numerator), old_val.denominator)
+    """
+    if mutator is None:
+        return lambda func: register_mutator(type_, func)
+    _registry[type_] = mutator
+    # 已缓存的子类可能改由新注册的变异函数处理
+    _dispatch.clear()
+    _native_dispatch.clear()
+    return mutator
+
+
+# 结构化变异默认使用 Rust 扩展中的原生实现，它与上面的 Python 实现以完全相同的顺序消耗
+# 随机数，因此两者对同一随机状态产生相同的变异。任意对象仍由 Python 的 mutate_instance 处理，
+# 注册的变异函数同样由原生实现回调。
+py_mutate_auto = mutate_auto
+py_mutate_param_list = mutate_param_list
+py_mutate_param_list_batch = mutate_param_list_batch
+if get_config("fuzz").get("native_mutator", True):
+    mutate_auto = native.mutate_auto
+    mutate_param_list = native.mutate_param_list
+    mutate_param_list_batch = native.mutate_param_list_batch
+native.set_copy_on_write(COPY_ON_WRITE)
+
+
 __all__ = [
     "mutate_auto",
     "mutate_bool",
@@ -209,4 +411,9 @@ __all__ = [
     "mutate_dict",
     "mutate_instance",
     "mutate_param_list",
+    "mutate_param_list_batch",
+    "ArgumentIsolator",
+    "get_isolator",
+    "register_mutator",
+    "resolve_mutator",
 ]
@@ -0,0 +1,102 @@
+"""
+fuzz worker 的输出汇。
+
+被测库（nltk、prophet、dask 等）在每次执行时都可能大量输出，如果像之前那样重定向到
+一个永不清空的 `io.StringIO`，worker 的内存会随执行次数无限增长。本模块提供两种有界
+的输出汇，通过 `[fuzz] output_sink` 配置：
+
+  - "devnull"：直接丢弃所有输出；
+  - "ring"：只保留最近 `output_ring_kb` KB 的输出，便于排查崩溃。
+
+两种模式都会把 fd 1 重定向到 /dev/null，以丢弃 C 扩展直接写入 stdout 的内容。Python 层面
+写入 `sys.stderr` 的内容（warnings、tqdm 进度条等）同样进入输出汇，但 fd 2 有意保持不变：
+worker 的 loguru 日志继承自父进程、直接写 fd 2，段错误等致命错误的信息（faulthandler、
+C 层面的 abort 消息）也只能写到 fd 2，重定向后崩溃将无从排查。只有 C 扩展直接写 fd 2
+的输出仍然会写到终端。
+"""
+
+import io
+import os
+import sys
+from collections import deque
+
+from respfuzzer.utils.config import get_config
+
+
+class NullWriter(io.TextIOBase):
+    """
+    A text stream that discards everything written to it.
+    """
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+class RingBuffer(io.TextIOBase):
+    """
+    A text stream that only keeps the last `capacity` characters written.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._chunks: deque[str] = deque()
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        n = len(s)
+        if n >= self.capacity:
+            self._chunks.clear()
+            self._chunks.append(s[-self.capacity :])
+            self._size = self.capacity
+            return n
+        self._chunks.append(s)
+        self._size += n
+        while self._size > self.capacity:
+            head = self._chunks.popleft()
+            overflow = self._size - self.capacity
+            if len(head) > overflow:
+                self._chunks.appendleft(head[overflow:])
+                self._size -= overflow
+            else:
+                self._size -= len(head)
+        return n
+
+    def getvalue(self) -> str:
+        return "".join(self._chunks)
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._size = 0
+
+
+def install_output_sink() -> RingBuffer | None:
+    """
+    Redirect the output of the current process to the sink configured in the
+    `[fuzz]` section.
+
+    Returns:
+        RingBuffer | None: The ring buffer holding recent output in "ring"
+        mode, otherwise None.
+    """
+    config = get_config("fuzz")
+    kind = config.get("output_sink", "devnull")
+
+    sys.stdout.flush()
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    if kind == "ring":
+        ring = RingBuffer(config.get("output_ring_kb", 64) * 1024)
+        sys.stdout = ring
+        sys.stderr = ring
+        return ring
+    sys.stdout = NullWriter()
+    sys.stderr = NullWriter()
+    return None
@@ -1,30 +1,42 @@
 import importlib
+import pickle
 import re
 from multiprocessing import Process
 
 from loguru import logger
 
-from respfuzzer.lib.fuzz.fuzz_library import manage_process_with_timeout
+from respfuzzer.lib.fuzz.code_cache import compile_cached
+from respfuzzer.lib.fuzz.fuzz_function import set_replay_parent
 from respfuzzer.lib.fuzz.instrument import instrument_function_via_path_replay_ctx
 from respfuzzer.lib.fuzz.mutate import set_random_state
 from respfuzzer.repos.mutant_table import get_mutant
+from respfuzzer.utils.process_helper import manage_process_with_timeout
 
 
-def replay_mutation_one(seed_id: int, random_state: int):
+def replay_mutation_one(seed_id: int, random_state: int, parent: str | None = None):
     """
-    Replay a mutation for a specific seed with a given random state.
+    Replay a mutation for a specific seed with a given random state, mutating
+    the pickled corpus parent at path `parent` if the mutation came from the
+    corpus.
     """
     seed = get_mutant(seed_id)
     if seed is None:
         logger.error(f"Seed {seed_id} not found in DB.")
         return None
+    if parent is not None:
+        with open(parent, "rb") as f:
+            data = f.read()
+        if not data:
+            logger.error(f"Corpus parent {parent} could not be pickled, cannot replay.")
+            return None
+        set_replay_parent(pickle.loads(data))
 
     # logger.info(f"Seed {seed_id} function call: {seed.function_call}")
 
     func_path = seed.func_name
     with instrument_function_via_path_replay_ctx(func_path):
         set_random_state(random_state)
-        exec(seed.function_call)
+        exec(compile_cached(seed.function_call))
 
 
 def replay_from_log(log_path: str):
@@ -35,17 +47,29 @@ def replay_from_log(log_path: str):
     2025-10-13 16:43:09.716 | WARNING  | respfuzzer.fuzz.fuzz_library:fuzz_single_seed:110 - Seed 2851 attempt 9 did not complete successfully, last random state: 1760344979.
     2025-10-13 16:43:15.052 | WARNING  | respfuzzer.fuzz.fuzz_library:fuzz_single_seed:110 - Seed 2851 attempt 10 did not complete successfully, last random state: 1760344984.
     """
-    pattern = re.compile(
-        r"Seed (\d+) attempt \d+ did not complete successfully, last random state: (\d+)\."
-    )
+    patterns = [
+        re.compile(
+            r"Seed (\d+) attempt \d+ did not complete successfully, last random state: (\d+)\."
+        ),
+        # fuzz_library / fuzz_dataset 从 worker 的本地日志中恢复出的随机状态
+        re.compile(
+            r"Mutant (\d+) of seed \d+ not completed successfully with random state (\d+)(?: from corpus parent (\S+\.pkl))?\."
+        ),
+        re.compile(
+            r"Mutant (\d+) execution timeout after .* Last random state: (\d+)(?: from corpus parent (\S+\.pkl))?"
+        ),
+    ]
     with open(log_path, "r") as f:
         for line in f:
-            m = pattern.search(line)
+            m = next(filter(None, (p.search(line) for p in patterns)), None)
             if m:
                 seed_id = int(m.group(1))
                 random_state = int(m.group(2))
+                parent = m.group(3) if m.re.groups >= 3 else None
                 logger.info(
                     f"Replaying seed {seed_id} with random state {random_state}"
                 )
-                proc = Process(target=replay_mutation_one, args=(seed_id, random_state))
-                res = manage_process_with_timeout(proc, 5, seed_id)
+                proc = Process(
+                    target=replay_mutation_one, args=(seed_id, random_state, parent)
+                )
+                res = manage_process_with_timeout(proc, 5)
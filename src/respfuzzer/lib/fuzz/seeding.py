@@ -0,0 +1,130 @@
+"""
+数据级变异随机流的播种。
+
+之前每次进入 `fuzz_function*` 都以 `int(time.time())` 作为随机状态，同一秒内启动的几十个
+worker 会重放完全相同的变异序列，`fuzz_library` 中的重试也会从同一条序列重新开始。
+
+本模块从一个 campaign 级别的主种子出发，用 SplitMix64 的跳跃（状态加上 (k + 1) 倍的
+黄金比例增量后再混合）逐层派生出互不重叠的随机流：
+
+  主种子 -> 种子 -> 变异体 -> 重试次数 -> 进程内第几次调用 fuzz_function
+
+父进程为每次执行派生出流的种子并随执行指令下发给 worker，worker 内每次调用 fuzz_function
+再从中派生出初始随机状态。没有收到流种子的进程以主种子和自身 PID 派生。主种子取自
+`[fuzz] master_seed`，未配置时随机生成，并记录在日志中以便复现整个 campaign；每次变异的
+随机状态仍记录在日志（journal）中，可逐条重放。
+
+子进程被杀死后，父进程以同一条流和一个 `Resume` 重试：之前的 fuzz_function 调用直接跳过，
+被杀死的调用从日志中挂起的那次变异的随机状态快进到下一次变异，已完成的执行和挂起的输入都不会重放。
+"""
+
+import os
+from typing import NamedTuple
+
+from loguru import logger
+
+from respfuzzer.utils.config import get_config
+
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+
+# 随机生成的主种子通过环境变量传给以 spawn 方式启动的子进程
+MASTER_SEED_ENV = "RESPFUZZER_MASTER_SEED"
+
+_master_seed: int | None = None
+_stream: int | None = None  # 父进程为当前执行下发的流种子
+_calls = 0  # 当前流中已经开始的 fuzz_function 调用次数
+_resume: "Resume | None" = None
+
+
+class Resume(NamedTuple):
+    call: int  # 被杀死的 fuzz_function 调用在流中的序号
+    index: int  # 挂起的变异在该调用中的序号（从 1 开始）
+    random_state: int  # 挂起的变异之前的随机状态
+
+
+def splitmix64(x: int) -> int:
+    """
+    The SplitMix64 finalizer, same as `hash64` in chain_rng.rs.
+    """
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def derive_state(parent: int, *keys: int) -> int:
+    """
+    Derive the state of a child stream of `parent`, jumping its SplitMix64
+    sequence ahead by `key + 1` steps for each of `keys` in turn.
+
+    Example:
+    >>> derive_state(master_seed(), seed.id, mutant_index, attempt)
+    """
+    state = parent & MASK64
+    for key in keys:
+        state = splitmix64((state + (key + 1) * GOLDEN_GAMMA) & MASK64)
+    return state
+
+
+def master_seed() -> int:
+    """
+    Return the master seed of the campaign, generating and logging one if
+    `[fuzz] master_seed` is not set.
+    """
+    global _master_seed
+    if _master_seed is not None:
+        return _master_seed
+    seed = get_config("fuzz").get("master_seed") or 0
+    if not seed and os.environ.get(MASTER_SEED_ENV):
+        seed = int(os.environ[MASTER_SEED_ENV])
+    if not seed:
+        seed = int.from_bytes(os.urandom(8), "little") or 1
+        os.environ[MASTER_SEED_ENV] = str(seed)
+        logger.info(
+            f"Campaign master seed: {seed} (set [fuzz] master_seed to reproduce)"
+        )
+    _master_seed = seed & MASK64
+    return _master_seed
+
+
+def set_stream(stream: int | None, resume: Resume | None = None) -> None:
+    """
+    Set the stream the following `fuzz_function` calls draw their random
+    states from. 0 or None falls back to a stream of the current process.
+    With `resume`, the calls continue a killed attempt on the same stream.
+    """
+    global _stream, _calls, _resume
+    _stream = stream or None
+    _calls = 0
+    _resume = resume
+
+
+def next_random_state() -> int:
+    """
+    Return the initial random state of the next `fuzz_function` call.
+    """
+    global _calls
+    stream = (
+        _stream if _stream is not None else derive_state(master_seed(), os.getpid())
+    )
+    state = derive_state(stream, _calls)
+    _calls += 1
+    return state
+
+
+def current_call() -> int:
+    """
+    Return the index of the current `fuzz_function` call in the stream.
+    """
+    return _calls - 1
+
+
+def resume_point() -> Resume | None:
+    """
+    Return the killed attempt the current `fuzz_function` call continues,
+    or None if it starts from its first mutation. Calls before `call` have
+    already been executed entirely.
+    """
+    if _resume is None or _resume.call < current_call():
+        return None
+    return _resume
@@ -0,0 +1,344 @@
+"""
+常驻的执行进程池。
+
+进程池在启动时创建固定数量（默认为 CPU 核数）的 worker 进程，每个 worker 拥有一块
+独立的覆盖率位图（shm key 为 `shm_key_start + i`）。位图的共享内存段数量与 worker 数相同，
+在各个种子之间清空复用，进程池关闭或父进程退出时通过 IPC_RMID 释放。种子/变异体被分派给空闲的 worker
+执行，worker 只有在崩溃、超时或内存（RSS）超过阈值时才会被回收重启，从而避免为每个
+种子重新创建进程、重新导入被测库。worker 在每次执行后把新覆盖以原子 OR 直接写入全局位图
+（见 `respfuzzer.lib.fuzz.coverage_map`），全局覆盖实时可见。
+
+启用 zygote 时，worker 从对应被测库的 zygote（见 `respfuzzer.lib.fuzz.zygote`）fork 而来，
+并优先把种子分派给已经绑定到同一个库的空闲 worker。每个 zygote 使用 worker 位图之后的一个
+独立 shm key（`shm_key_start + size + i`），并发的 zygote 不会映射同一个段。
+"""
+
+import atexit
+import threading
+from contextlib import contextmanager
+from multiprocessing import Pipe, Process
+from typing import Callable, Iterator
+
+import psutil
+from dcov import BitmapManager
+from loguru import logger
+
+from respfuzzer.lib.fuzz.channel import (
+    OP_EXIT,
+    STATUS_CRASH,
+    STATUS_TIMEOUT,
+    ParentChannel,
+    Result,
+)
+from respfuzzer.lib.fuzz.coverage_map import (
+    SharedBitmap,
+    SharedVirginMap,
+    remove_segment,
+)
+from respfuzzer.lib.fuzz.zygote import ForkedProcess, Zygote
+from respfuzzer.models import HasCode
+from respfuzzer.utils.process_helper import (
+    kill_process_tree_linux,
+    set_resource_limits,
+)
+
+GLOBAL_SHM_KEY = 4398
+
+
+class Worker:
+    """
+    A long-lived execution process bound to its own coverage bitmap.
+
+    `target` is the worker main loop, called as `target(conn, shm_key)`,
+    see `fuzz_dataset.continue_safe_execute`. `merge`, if given, is called
+    with the worker after it was killed by a timeout or crash and before it
+    is restarted, see `WorkerPool.merge_coverage`.
+    """
+
+    def __init__(
+        self,
+        shm_key: int,
+        target: Callable,
+        memory_ratio: float = 0.8,
+        merge: Callable[["Worker"], int] | None = None,
+    ) -> None:
+        self.shm_key = shm_key
+        self.target = target
+        self.memory_ratio = memory_ratio  # RLIMIT_DATA 占物理内存的比例
+        self.merge = merge
+        self.zygote: Zygote | None = None
+        self.process: Process | ForkedProcess | None = None
+        self.channel: ParentChannel | None = None
+        self.bm = BitmapManager(shm_key)
+
+    @property
+    def pid(self) -> int | None:
+        return self.process.pid if self.process else None
+
+    @property
+    def library_name(self) -> str | None:
+        return self.zygote.library_name if self.zygote else None
+
+    def start(self) -> None:
+        if self.zygote is not None:
+            self.process, parent_conn = self.zygote.spawn(self.shm_key)
+        else:
+            parent_conn, child_conn = Pipe()
+            self.process = Process(target=self.target, args=(child_conn, self.shm_key))
+            self.process.start()
+            child_conn.close()
+        self.channel = ParentChannel(parent_conn)
+        # worker 常驻且累计 CPU 时间，只限制内存；超时由 execute() 负责
+        set_resource_limits(self.process.pid, memory_ratio=self.memory_ratio)
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            try:
+                self.channel.send_command(OP_EXIT)
+                self.process.join(1)
+            except Exception:
+                pass
+        if self.process.is_alive():
+            kill_process_tree_linux(self.process)
+        else:
+            self.process.join()
+        self._release()
+
+    def kill(self) -> None:
+        if self.process is None:
+            return
+        kill_process_tree_linux(self.process)
+        self.process.join()
+        self._release()
+
+    def _release(self) -> None:
+        self.process.close()
+        self.channel.close()
+        self.process = None
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def execute(
+        self, command: int, seed: HasCode, timeout: float, stream: int = 0
+    ) -> Result:
+        """
+        Send `command` with `seed` to the worker and wait for it to finish.
+        Data-level mutations draw from the random `stream`.
+
+        Returns:
+            Result: The status record reported by the worker. If the worker
+            timed out or died, its coverage is merged, it is restarted and
+            the status is `STATUS_TIMEOUT` or `STATUS_CRASH`.
+        """
+        try:
+            self.channel.send_command(command, seed, stream)
+        except (BrokenPipeError, OSError):
+            result = Result(STATUS_CRASH, 0, 0)
+        else:
+            result = self.channel.recv_result(timeout)
+        if result.status in (STATUS_TIMEOUT, STATUS_CRASH):
+            logger.info(
+                f"Worker {self.pid} (shm {self.shm_key}) timeout or crashed after {timeout:.2f}s, restarting."
+            )
+            self.kill()
+            if self.merge is not None:
+                # 重启后的 worker 可能覆盖位图，必须在此之前合并被杀死的 worker 的覆盖
+                self.merge(self)
+            self.start()
+        return result
+
+    def rss(self) -> int:
+        try:
+            return psutil.Process(self.pid).memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0
+
+
+class WorkerPool:
+    """
+    A fixed-size pool of `Worker`s shared by all seed-driving threads.
+
+    Example:
+    >>> pool = WorkerPool(os.cpu_count(), continue_safe_execute)
+    >>> with pool.worker() as w:
+    ...     w.execute(OP_FEEDBACK_FUZZ, mutant, timeout=5.0)
+    >>> pool.shutdown()
+    """
+
+    def __init__(
+        self,
+        size: int,
+        target: Callable,
+        shm_key_start: int = 4399,
+        max_rss_mb: int | None = None,
+        zygote_preload: dict[str, list[str]] | None = None,
+        memory_ratio: float = 0.8,
+    ) -> None:
+        """
+        Args:
+            size: Number of worker processes.
+            target: The worker main loop.
+            shm_key_start: Bitmap key of the first worker; the zygotes use
+                the keys after the workers'.
+            max_rss_mb: Recycle a worker once its RSS exceeds this limit.
+            zygote_preload: If given, fork workers from per-library zygotes;
+                maps a library name to the submodules its zygote pre-imports.
+            memory_ratio: Fraction of physical memory shared by all workers;
+                each worker's data segment is limited to its equal share.
+        """
+        self.target = target
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.zygote_preload = zygote_preload
+        self.zygotes: dict[str, Zygote] = {}
+        self.zygote_key_start = shm_key_start + size
+        # 每个 worker 的 RLIMIT_DATA 只占总预算的一份，所有 worker 加起来不会超出
+        self.workers = [
+            Worker(shm_key_start + i, target, memory_ratio / size, self.merge_coverage)
+            for i in range(size)
+        ]
+        self.idle: list[Worker] = []
+        self._idle_cond = threading.Condition()
+        self._zygote_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._coverage = 0  # 最近一次合并后全局位图的覆盖位数
+        try:
+            # worker 以原子 OR 实时更新全局位图，父进程不需要再合并
+            self.virgin: SharedVirginMap | None = SharedVirginMap(GLOBAL_SHM_KEY)
+        except OSError as e:
+            logger.warning(f"Failed to map the global coverage bitmap: {e}")
+            self.virgin = None
+        for w in self.workers:
+            if self.virgin is None:
+                # worker 的位图从全局位图开始，使得前后计数之差就是新增覆盖；
+                # 重启 worker 时保留位图内容，超时前已经发现的覆盖不会丢失
+                w.bm.sync_from(GLOBAL_SHM_KEY)
+            else:
+                # 槽位可能残留上一次运行的内容，worker 在每条执行指令之前也会清空自己的位图
+                w.bm.clear_bitmap()
+            w.bm.write()
+            if zygote_preload is None:
+                w.start()  # 启用 zygote 时，worker 在首次分派到某个库时才创建
+            self.idle.append(w)
+        # 进程异常退出时也释放位图的共享内存段
+        atexit.register(self.release_bitmaps)
+        logger.info(f"Worker pool started with {size} workers")
+
+    def _get_zygote(self, library_name: str) -> Zygote:
+        with self._zygote_lock:
+            zygote = self.zygotes.get(library_name)
+            if zygote is None:
+                preload = self.zygote_preload.get(library_name, [])
+                shm_key = self.zygote_key_start + len(self.zygotes)
+                zygote = Zygote(library_name, preload, self.target, shm_key)
+                zygote.start()
+                self.zygotes[library_name] = zygote
+            return zygote
+
+    def acquire(self, library_name: str | None = None) -> Worker:
+        """
+        Take an idle worker, preferring one already bound to `library_name`.
+        With zygotes enabled, a worker bound to another library is re-forked
+        from the zygote of `library_name`.
+        """
+        with self._idle_cond:
+            while not self.idle:
+                self._idle_cond.wait()
+            worker = next(
+                (w for w in self.idle if w.library_name == library_name),
+                self.idle[0],
+            )
+            self.idle.remove(worker)
+        if self.zygote_preload is not None and library_name:
+            if worker.library_name != library_name or worker.process is None:
+                worker.kill()
+                worker.zygote = self._get_zygote(library_name)
+                worker.start()
+        elif worker.process is None:
+            worker.start()
+        return worker
+
+    def release(self, worker: Worker) -> None:
+        """
+        Give `worker` back to the pool, recycling it first if it crashed or
+        exceeds the RSS threshold.
+        """
+        if not worker.process.is_alive():
+            logger.info(f"Worker {worker.pid} (shm {worker.shm_key}) died, restarting.")
+            worker.restart()
+        elif self.max_rss and worker.rss() > self.max_rss:
+            logger.info(
+                f"Worker {worker.pid} (shm {worker.shm_key}) exceeds RSS limit, restarting."
+            )
+            worker.restart()
+        with self._idle_cond:
+            self.idle.append(worker)
+            self._idle_cond.notify()
+
+    @contextmanager
+    def worker(self, library_name: str | None = None) -> Iterator[Worker]:
+        w = self.acquire(library_name)
+        try:
+            yield w
+        finally:
+            self.release(w)
+
+    @property
+    def coverage(self) -> int:
+        """
+        The number of edges covered by all workers.
+        """
+        if self.virgin is not None:
+            return self.virgin.count()
+        return self._coverage
+
+    def merge_coverage(self, worker: Worker) -> int:
+        """
+        Merge the coverage of `worker` into the global bitmap. When the
+        workers update the global bitmap in place, this only matters for a
+        worker killed by a timeout or crash, which had no chance to report
+        the edges of its last input; `Worker.execute` calls it before the
+        worker is restarted and the slot is reused.
+
+        Returns:
+            int: The global coverage after merging.
+        """
+        if self.virgin is not None:
+            # 被杀死的 worker 来不及在执行后写入全局位图，由父进程把它的位图 OR 进去
+            try:
+                with SharedBitmap(worker.shm_key, readonly=True) as trace:
+                    self.virgin.update(trace.words)
+            except OSError as e:
+                logger.warning(f"Failed to map coverage bitmap {worker.shm_key}: {e}")
+            return self.coverage
+        with self._merge_lock:
+            bm = BitmapManager(GLOBAL_SHM_KEY)
+            bm.merge_from(worker.shm_key)
+            bm.write()
+            self._coverage = bm.count_bitmap()
+            return self._coverage
+
+    def shutdown(self) -> None:
+        for w in self.workers:
+            w.stop()
+        for zygote in self.zygotes.values():
+            zygote.stop()
+        if self.virgin is not None:
+            self.virgin.close()
+        self.release_bitmaps()
+        atexit.unregister(self.release_bitmaps)
+        logger.info("Worker pool stopped")
+
+    def release_bitmaps(self) -> None:
+        """
+        Remove the shared memory segments of the worker and zygote bitmaps.
+        The global bitmap is kept for the coverage report.
+        """
+        # zygote 预导入后已经自行移除了位图，这里兜底处理它在移除之前被杀死的情况
+        keys = [w.shm_key for w in self.workers]
+        keys += [z.shm_key for z in self.zygotes.values()]
+        for key in keys:
+            remove_segment(key)
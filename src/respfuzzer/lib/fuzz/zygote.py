@@ -0,0 +1,218 @@
+"""
+按库划分的 zygote 进程。
+
+zygote 在启动时于 dcov 的插桩加载器下预先导入目标库及配置的子模块，随后调用
+`gc.freeze()` 把已导入的对象移出 GC 的追踪范围，再按父进程的请求 fork 出执行 worker。
+由于 worker 不会再触碰这些对象的引用计数/GC 头，页面能够在几十个 worker 之间以
+copy-on-write 的方式共享，worker 的重启也只需一次 fork。
+
+父进程与 zygote 之间通过一条双工 `Pipe` 通信：
+  - ("spawn", shm_key) + 通过 SCM_RIGHTS 传递的 worker 管道 fd -> zygote 回复 worker PID
+  - ("exit", None) -> zygote 退出
+
+worker 的父进程是 zygote，因此 worker 通过 `owner_pid()` 的 pidfd 监视 worker 池所在的进程，
+池所在的进程退出时立即退出；zygote 自身退出时 worker 被 init 收养，仍由池通过 pidfd 管理和杀死。
+每个 zygote 预先导入时使用自己的覆盖率位图（worker 池为每个库分配不同的 shm key），预导入结束后
+立即对该段执行 IPC_RMID：内核在最后一个进程分离时释放它，zygote 被 SIGKILL 也不会泄漏。
+"""
+
+import gc
+import importlib
+import os
+import signal
+import threading
+from multiprocessing import Pipe, Process, reduction
+from multiprocessing.connection import Connection, wait
+from typing import Callable
+
+import dcov
+from dcov import BitmapManager
+from loguru import logger
+
+from respfuzzer.lib.fuzz.coverage_map import remove_segment
+
+ZYGOTE_SHM_KEY = 4397  # 单独使用 Zygote 时的默认位图
+_owner_pid: int | None = None  # 创建 zygote 的进程，即 worker 池所在的进程
+
+
+def owner_pid() -> int:
+    """
+    Return the PID of the process owning the workers of this process: the
+    worker pool's process, also for workers forked by a zygote, whose parent
+    is the zygote.
+    """
+    return _owner_pid or os.getppid()
+
+
+class ForkedProcess:
+    """
+    A handle to a worker forked by a zygote, which is not a child of the
+    current process. It mimics the subset of `multiprocessing.Process` used
+    by the worker pool, using a pidfd as the sentinel.
+    """
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        try:
+            self.sentinel = os.pidfd_open(pid)
+        except ProcessLookupError:
+            # worker 在父进程拿到 pidfd 之前就已退出并被 zygote 回收
+            self.sentinel = None
+
+    def is_alive(self) -> bool:
+        return self.sentinel is not None and not wait([self.sentinel], 0)
+
+    def join(self, timeout: float | None = None) -> None:
+        if self.sentinel is not None:
+            wait([self.sentinel], timeout)
+
+    def kill(self) -> None:
+        if self.is_alive():
+            signal.pidfd_send_signal(self.sentinel, signal.SIGKILL)
+
+    def close(self) -> None:
+        if self.sentinel is not None:
+            os.close(self.sentinel)
+            self.sentinel = None
+
+
+def _zygote_loop(
+    library_name: str,
+    preload: list[str],
+    control: Connection,
+    target: Callable[[Connection, int], None],
+    shm_key: int,
+) -> None:
+    """
+    The main loop of a zygote process.
+    """
+    global _owner_pid
+    _owner_pid = os.getppid()
+    gc.disable()
+    # 被 fork 出的 worker 由 zygote 自动回收，避免产生僵尸进程
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    bm = BitmapManager(shm_key)
+    with dcov.LoaderWrapper(bm) as l:
+        l.add_library(library_name)
+        for module in [library_name, *preload]:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                logger.warning(f"Zygote failed to preload {module}: {e}")
+    # 预导入的覆盖不会被读取，worker 各自绑定自己的位图；已映射的段在分离前仍然有效
+    remove_segment(shm_key)
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Zygote for {library_name} ready with PID {os.getpid()}")
+
+    while True:
+        try:
+            command, shm_key = control.recv()
+        except EOFError:
+            break
+        if command != "spawn":
+            break
+        fd = reduction.recv_handle(control)
+        pid = os.fork()
+        if pid == 0:
+            control.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            gc.enable()
+            try:
+                # worker 内部会重新进入绑定自身位图的 LoaderWrapper，
+                # 此后插桩代码的命中记录写入 worker 自己的位图
+                target(Connection(fd), shm_key)
+            finally:
+                os._exit(0)
+        os.close(fd)
+        try:
+            os.setpgid(pid, pid)  # 保证父进程可以用 killpg 杀死整个 worker 进程组
+        except OSError:
+            pass
+        control.send(pid)
+
+
+class Zygote:
+    """
+    A per-library process that forks pre-warmed workers.
+
+    Example:
+    >>> zygote = Zygote("torch", ["torch.nn"], continue_safe_execute, shm_key=4397)
+    >>> zygote.start()
+    >>> process, conn = zygote.spawn(4399)
+    """
+
+    def __init__(
+        self,
+        library_name: str,
+        preload: list[str],
+        target: Callable[[Connection, int], None],
+        shm_key: int = ZYGOTE_SHM_KEY,
+    ) -> None:
+        self.library_name = library_name
+        self.preload = preload
+        self.target = target
+        self.shm_key = shm_key  # 预导入时使用的位图，不同的 zygote 不能共用
+        self.control: Connection | None = None
+        self.process: Process | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        parent_conn, child_conn = Pipe()
+        self.control = parent_conn
+        self.process = Process(
+            target=_zygote_loop,
+            args=(
+                self.library_name,
+                self.preload,
+                child_conn,
+                self.target,
+                self.shm_key,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.control.send(("exit", None))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.control.close()
+        self.process = None
+
+    def spawn(self, shm_key: int) -> tuple[ForkedProcess, Connection]:
+        """
+        Fork a worker bound to the bitmap `shm_key`.
+
+        Returns:
+            tuple[ForkedProcess, Connection]: The worker handle and the
+            parent end of its channel.
+        """
+        with self._lock:
+            for _ in range(2):
+                if self.process is None or not self.process.is_alive():
+                    self.stop()
+                    self.start()
+                parent_conn, child_conn = Pipe()
+                try:
+                    self.control.send(("spawn", shm_key))
+                    reduction.send_handle(
+                        self.control, child_conn.fileno(), self.process.pid
+                    )
+                    pid = self.control.recv()
+                    return ForkedProcess(pid), parent_conn
+                except (EOFError, BrokenPipeError, OSError) as e:
+                    logger.error(f"Zygote for {self.library_name} crashed: {e}")
+                    parent_conn.close()
+                    self.stop()
+                finally:
+                    child_conn.close()
+        raise RuntimeError(f"Failed to spawn worker from zygote {self.library_name}")
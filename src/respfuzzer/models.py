@@ -48,6 +48,8 @@ class Seed(BaseModel):
     func_name: str
     args: list[Argument]
     function_call: str
+    exec_time: float | None = None  # median baseline runtime in seconds
+    exec_timeout: float | None = None  # calibrated per-execution deadline
 
 
 class Mutant(BaseModel):
@@ -58,6 +60,7 @@ class Mutant(BaseModel):
     func_name: str
     args: list[Argument]
     function_call: str
+    exec_timeout: float | None = None  # inherited from the seed
 
 
 class HasCode(Protocol):
@@ -65,6 +68,7 @@ class HasCode(Protocol):
     library_name: str
     func_name: str
     function_call: str
+    exec_timeout: float | None = None
 
 
 class ExecutionResultType(IntEnum):
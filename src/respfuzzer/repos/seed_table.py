@@ -13,9 +13,28 @@ with get_db_cursor() as cur:
             library_name TEXT,
             func_name TEXT,
             args TEXT,
-            function_call TEXT
+            function_call TEXT,
+            exec_time REAL,
+            exec_timeout REAL
         )"""
     )
+    # 兼容校准字段加入之前创建的表
+    cur.execute("ALTER TABLE seed ADD COLUMN IF NOT EXISTS exec_time REAL")
+    cur.execute("ALTER TABLE seed ADD COLUMN IF NOT EXISTS exec_timeout REAL")
+
+
+def _row_to_seed(row: tuple) -> Seed:
+    args = [Argument(**arg) for arg in json.loads(row[4])]
+    return Seed(
+        id=row[0],
+        func_id=row[1],
+        library_name=row[2],
+        func_name=row[3],
+        args=args,
+        function_call=row[5],
+        exec_time=row[6],
+        exec_timeout=row[7],
+    )
 
 
 def create_seed(seed: Seed) -> Optional[int]:
@@ -45,6 +64,17 @@ def create_seed(seed: Seed) -> Optional[int]:
         return row[0] if row is not None else None
 
 
+def update_seed_timing(seed: Seed) -> None:
+    """
+    保存 Seed 的校准结果（exec_time 与 exec_timeout）。
+    """
+    with get_db_cursor() as cur:
+        cur.execute(
+            "UPDATE seed SET exec_time = %s, exec_timeout = %s WHERE id = %s",
+            (seed.exec_time, seed.exec_timeout, seed.id),
+        )
+
+
 def create_seeds(seeds: list[Seed]) -> list[int]:
     res = [create_seed(seed) for seed in seeds]
     return res
@@ -60,16 +90,7 @@ def get_seed(seed_id: int) -> Optional[Seed]:
         if not row:
             return None
 
-        args = [Argument(**arg) for arg in json.loads(row[4])]
-
-        seed = Seed(
-            id=row[0],
-            func_id=row[1],
-            library_name=row[2],
-            func_name=row[3],
-            args=args,
-            function_call=row[5],
-        )
+        seed = _row_to_seed(row)
         return seed
 
 
@@ -80,16 +101,7 @@ def get_seed_by_function_name(function_name: str) -> Optional[Seed]:
         if not row:
             return None
 
-        args = [Argument(**arg) for arg in json.loads(row[4])]
-
-        seed = Seed(
-            id=row[0],
-            func_id=row[1],
-            library_name=row[2],
-            func_name=row[3],
-            args=args,
-            function_call=row[5],
-        )
+        seed = _row_to_seed(row)
         return seed
 
 
@@ -99,15 +111,7 @@ def get_seed_by_function_id(func_id: int) -> Optional[Seed]:
         row = cur.fetchone()
         if not row:
             return None
-        args = [Argument(**arg) for arg in json.loads(row[4])]
-        seed = Seed(
-            id=row[0],
-            func_id=row[1],
-            library_name=row[2],
-            func_name=row[3],
-            args=args,
-            function_call=row[5],
-        )
+        seed = _row_to_seed(row)
         return seed
 
 
@@ -138,16 +142,7 @@ def get_seeds(
         seeds = []
 
         for row in rows:
-            args = [Argument(**arg) for arg in json.loads(row[4])]
-
-            seed = Seed(
-                id=row[0],
-                func_id=row[1],
-                library_name=row[2],
-                func_name=row[3],
-                args=args,
-                function_call=row[5],
-            )
+            seed = _row_to_seed(row)
             seeds.append(seed)
 
         return seeds
@@ -180,14 +175,5 @@ def get_seeds_iter(
             row = cur.fetchone()
             if not row:
                 break
-            args = [Argument(**arg) for arg in json.loads(row[4])]
-
-            seed = Seed(
-                id=row[0],
-                func_id=row[1],
-                library_name=row[2],
-                func_name=row[3],
-                args=args,
-                function_call=row[5],
-            )
+            seed = _row_to_seed(row)
             yield seed
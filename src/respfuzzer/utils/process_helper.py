@@ -1,10 +1,12 @@
+import math
 import multiprocessing
 import os
+import resource
 import signal
-import time
-from asyncio.log import logger
+from multiprocessing.connection import wait
 
 import psutil
+from loguru import logger
 
 
 def kill_process_tree_linux(process: multiprocessing.Process, timeout: float = 1.0):
@@ -20,44 +22,59 @@ def kill_process_tree_linux(process: multiprocessing.Process, timeout: float = 1
     except OSError:
         return
 
-    os.killpg(pgid, signal.SIGKILL)
+    if pgid == os.getpgrp():
+        # 子进程尚未建立自己的进程组，不能把自身所在的进程组一起杀掉
+        os.kill(process.pid, signal.SIGKILL)
+    else:
+        os.killpg(pgid, signal.SIGKILL)
     try:
         process.join(timeout)
     except:
         pass
 
 
+def set_resource_limits(
+    pid: int = 0, cpu_seconds: float | None = None, memory_ratio: float = 0.8
+) -> None:
+    """
+    通过 setrlimit/prlimit 为进程设置资源上限，取代运行期对 cpu_percent()/memory_percent()
+    的轮询采样。超过上限的进程会被内核直接终止（SIGXCPU/SIGKILL）或分配失败。
+
+    Args:
+        pid: 目标进程 PID，0 表示当前进程。
+        cpu_seconds: CPU 时间上限（秒），None 表示不限制。
+        memory_ratio: 数据段（堆与匿名映射）上限占物理内存的比例。
+    """
+    limits = [
+        (resource.RLIMIT_DATA, int(psutil.virtual_memory().total * memory_ratio)),
+    ]
+    if cpu_seconds is not None:
+        limits.append((resource.RLIMIT_CPU, math.ceil(cpu_seconds)))
+    for res, limit in limits:
+        try:
+            resource.prlimit(pid, res, (limit, limit))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Failed to set resource limit {res} for process {pid}: {e}")
+
+
 def manage_process_with_timeout(
     process: multiprocessing.Process, timeout: float
 ) -> bool:
-    start_time = time.time()
+    """
+    启动进程并阻塞等待其结束，超过 `timeout` 秒则杀死整个进程组。
+    等待基于进程的 sentinel，耗时只取决于进程实际运行时间，而不是轮询间隔。
+
+    Returns:
+        bool: 进程在时限内正常结束且退出码为 0 时返回 True。
+    """
     process.start()
+    # CPU 时间上限为墙钟时限的 1.5 倍，对应原先 cpu_percent() > 150 的判定
+    set_resource_limits(process.pid, cpu_seconds=timeout * 1.5)
 
-    while process.is_alive() and (time.time() - start_time) < timeout:
-        time.sleep(0.1)
-        try:
-            p = psutil.Process(process.pid)
-            if p.cpu_percent() > 150 or p.memory_percent() > 80:
-                logger.warning(
-                    f"Process {process.pid} resource usage too high, killing..."
-                )
-                break
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            break
-        except Exception as e:
-            logger.error(f"Error monitoring process {process.pid}: {e}")
-            break
-
-    if process.is_alive():
+    if not wait([process.sentinel], timeout):
         kill_process_tree_linux(process)
         return False
 
     # 进程正常结束，需要 join 回收
-    try:
-        process.join(1)
-    except:
-        pass
-
-    if process.exitcode != 0:
-        return False
-    return True
+    process.join()
+    return process.exitcode == 0
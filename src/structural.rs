@@ -0,0 +1,316 @@
+//! src/structural.rs
+//! Native implementation of the structural mutators in `respfuzzer.lib.fuzz.mutator`.
+//! Every function consumes the chain RNG in exactly the same order as its Python
+//! counterpart, so a mutation is replayable from the same `set_random_state` seed
+//! whichever implementation produced it.
+
+use std::sync::atomic::{AtomicBool, Ordering};
+
+use pyo3::exceptions::PyOverflowError;
+use pyo3::prelude::*;
+use pyo3::sync::PyOnceLock;
+use pyo3::types::{
+    PyBool, PyBytes, PyComplex, PyDict, PyFrozenSet, PyList, PySet, PySlice, PyString, PyTuple,
+    PyType,
+};
+
+use crate::chain_rng::{ri, with_global};
+use crate::mutator::{mutate_bytes_value, mutate_float_value, mutate_int_value, mutate_str_value};
+
+const MAX_LEN: usize = 100000;
+
+static COPY: PyOnceLock<Py<PyAny>> = PyOnceLock::new();
+static DEEPCOPY: PyOnceLock<Py<PyAny>> = PyOnceLock::new();
+static MUTATE_INSTANCE: PyOnceLock<Py<PyAny>> = PyOnceLock::new();
+static NATIVE_DISPATCH: PyOnceLock<Py<PyAny>> = PyOnceLock::new();
+static NATIVE_CODES: PyOnceLock<Py<PyAny>> = PyOnceLock::new();
+static RESOLVE_MUTATOR: PyOnceLock<Py<PyAny>> = PyOnceLock::new();
+
+// Same as `COPY_ON_WRITE` in mutator.py
+static COPY_ON_WRITE: AtomicBool = AtomicBool::new(true);
+
+pub fn set_copy_on_write(enabled: bool) {
+    COPY_ON_WRITE.store(enabled, Ordering::Relaxed);
+}
+
+#[derive(Clone, Copy)]
+enum ValueType {
+    Bool,
+    Int,
+    Float,
+    Complex,
+    Str,
+    Bytes,
+    List,
+    Tuple,
+    Set,
+    FrozenSet,
+    Dict,
+    Instance,
+}
+
+impl ValueType {
+    fn from_code(code: u8) -> Option<ValueType> {
+        //! The codes in `_native_codes` of mutator.py
+        const TYPES: [ValueType; 12] = [
+            ValueType::Bool,
+            ValueType::Int,
+            ValueType::Float,
+            ValueType::Complex,
+            ValueType::Str,
+            ValueType::Bytes,
+            ValueType::List,
+            ValueType::Tuple,
+            ValueType::Set,
+            ValueType::FrozenSet,
+            ValueType::Dict,
+            ValueType::Instance,
+        ];
+        TYPES.get(code as usize).copied()
+    }
+}
+
+enum Handler<'py> {
+    Native(ValueType),
+    Python(Bound<'py, PyAny>),
+}
+
+fn handler_of<'py>(entry: Bound<'py, PyAny>) -> Handler<'py> {
+    match entry.extract::<u8>().ok().and_then(ValueType::from_code) {
+        Some(value_type) => Handler::Native(value_type),
+        None => Handler::Python(entry),
+    }
+}
+
+fn dispatch<'py>(cls: &Bound<'py, PyType>) -> PyResult<Handler<'py>> {
+    //! Look up the mutator of `cls` in `_native_dispatch` of mutator.py, resolving
+    //! it along the MRO with `resolve_mutator` on the first occurrence of `cls`
+    let py = cls.py();
+    let table = NATIVE_DISPATCH
+        .import(py, "respfuzzer.lib.fuzz.mutator", "_native_dispatch")?
+        .extract::<Bound<'py, PyDict>>()?;
+    if let Some(entry) = table.get_item(cls)? {
+        return Ok(handler_of(entry));
+    }
+    let mutator = RESOLVE_MUTATOR
+        .import(py, "respfuzzer.lib.fuzz.mutator", "resolve_mutator")?
+        .call1((cls,))?;
+    let codes = NATIVE_CODES
+        .import(py, "respfuzzer.lib.fuzz.mutator", "_native_codes")?
+        .extract::<Bound<'py, PyDict>>()?;
+    let entry = codes.get_item(&mutator)?.unwrap_or(mutator);
+    table.set_item(cls, &entry)?;
+    Ok(handler_of(entry))
+}
+
+fn randint(max: usize) -> PyResult<usize> {
+    //! Same as `randint(max)` called from Python, which takes an u32
+    let max = u32::try_from(max)
+        .map_err(|_| PyOverflowError::new_err("out of range integral type conversion attempted"))?;
+    Ok(ri(max) as usize)
+}
+
+fn copy_value<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    //! Same as `copy_value` in mutator.py
+    if COPY_ON_WRITE.load(Ordering::Relaxed) {
+        COPY.import(val.py(), "copy", "copy")?.call1((val,))
+    } else {
+        DEEPCOPY.import(val.py(), "copy", "deepcopy")?.call1((val,))
+    }
+}
+
+fn to_list<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    //! list(val)
+    val.py().get_type::<PyList>().call1((val,))
+}
+
+fn slice<'py>(
+    val: &Bound<'py, PyAny>,
+    start: Option<usize>,
+    stop: Option<usize>,
+) -> PyResult<Bound<'py, PyAny>> {
+    //! val[start:stop]
+    if val.is_exact_instance_of::<PyList>() {
+        let list = val.extract::<Bound<'py, PyList>>()?;
+        let len = list.len();
+        return Ok(list
+            .get_slice(start.unwrap_or(0).min(len), stop.unwrap_or(len).min(len))
+            .into_any());
+    }
+    let slice = val.py().get_type::<PySlice>().call1((start, stop))?;
+    val.get_item(slice)
+}
+
+pub fn mutate_auto<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    //! Automatically mutate a value based on its type
+    let py = val.py();
+    let cls = val.get_type();
+    if val.is_none() || cls.as_ptr() == py.get_type::<PyType>().as_ptr() {
+        return Ok(val.clone());
+    }
+    let value_type = match dispatch(&cls)? {
+        Handler::Native(value_type) => value_type,
+        Handler::Python(mutator) => return mutator.call1((val,)),
+    };
+    match value_type {
+        ValueType::Bool => Ok(PyBool::new(py, !val.is_truthy()?).to_owned().into_any()),
+        ValueType::Int => {
+            let value = val.extract::<i32>()?;
+            Ok(with_global(|rng| mutate_int_value(rng, value))
+                .into_pyobject(py)?
+                .into_any())
+        }
+        ValueType::Float => {
+            let value = val.extract::<f32>()?;
+            Ok(with_global(|rng| mutate_float_value(rng, value))
+                .into_pyobject(py)?
+                .into_any())
+        }
+        ValueType::Complex => mutate_complex(val),
+        ValueType::Str => {
+            let value = val.extract::<String>()?;
+            Ok(PyString::new(py, &with_global(|rng| mutate_str_value(rng, &value))).into_any())
+        }
+        ValueType::Bytes => {
+            let value = val.extract::<&[u8]>()?;
+            Ok(PyBytes::new(py, &with_global(|rng| mutate_bytes_value(rng, value))).into_any())
+        }
+        ValueType::List => mutate_list(val),
+        ValueType::Tuple => mutate_tuple(val),
+        ValueType::Set => mutate_set(val),
+        ValueType::FrozenSet => mutate_frozenset(val),
+        ValueType::Dict => mutate_dict(val),
+        ValueType::Instance => mutate_instance(val),
+    }
+}
+
+fn mutate_complex<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let real = val.getattr("real")?.extract::<f32>()?;
+    let imag = val.getattr("imag")?.extract::<f32>()?;
+    let (real, imag) = with_global(|rng| {
+        (mutate_float_value(rng, real), mutate_float_value(rng, imag))
+    });
+    Ok(PyComplex::from_doubles(val.py(), real as f64, imag as f64).into_any())
+}
+
+fn mutate_list_clip<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let a = val.len()?;
+    if a <= 1 {
+        return Ok(val.clone());
+    }
+    let mut b = randint(a)?;
+    let mut c = randint(a)?;
+    while b == c {
+        c = randint(a)?;
+    }
+    if b > c {
+        std::mem::swap(&mut b, &mut c);
+    }
+    slice(val, Some(b), Some(c))
+}
+
+fn mutate_list_dup<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let dup_times = 2 + randint(8)?;
+    let new_val = val.mul(dup_times)?;
+    slice(&new_val, None, Some(MAX_LEN))
+}
+
+fn mutate_list_expand<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let a = val.len()?;
+    if a == 0 {
+        return Ok(val.clone());
+    }
+    let index = randint(a - 1)?;
+    let new_t = mutate_auto(&val.get_item(index)?)?;
+    let new_val = copy_value(val)?;
+    new_val.call_method1("append", (new_t,))?;
+    Ok(new_val)
+}
+
+fn mutate_list_random_one<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let py = val.py();
+    let a = val.len()?;
+    if a == 0 {
+        return Ok(val.clone());
+    } else if a == 1 {
+        let new_val = mutate_auto(&val.get_item(0)?)?;
+        return Ok(PyList::new(py, [new_val])?.into_any());
+    }
+    let b = randint(a - 1)?;
+    let new_val = mutate_auto(&val.get_item(b)?)?;
+    slice(val, None, Some(b))?
+        .add(PyList::new(py, [new_val])?)?
+        .add(slice(val, Some(b + 1), None)?)
+}
+
+fn mutate_list<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    match randint(4)? {
+        0 => mutate_list_dup(val),
+        1 => mutate_list_random_one(val),
+        2 => mutate_list_expand(val),
+        _ => mutate_list_clip(val),
+    }
+}
+
+fn mutate_tuple<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let new_val = mutate_list(&to_list(val)?)?;
+    val.py().get_type::<PyTuple>().call1((new_val,))
+}
+
+fn mutate_set<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let list = to_list(val)?;
+    let new_val = match randint(2)? {
+        0 => mutate_list_random_one(&list)?,
+        _ => mutate_list_expand(&list)?,
+    };
+    val.py().get_type::<PySet>().call1((new_val,))
+}
+
+fn mutate_frozenset<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let py = val.py();
+    let new_val = mutate_set(&py.get_type::<PySet>().call1((val,))?)?;
+    py.get_type::<PyFrozenSet>().call1((new_val,))
+}
+
+fn mutate_dict<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    let new_val = copy_value(val)?;
+    let keys = to_list(&new_val.call_method0("keys")?)?;
+    let n = keys.len()?;
+    if n == 0 {
+        return Ok(val.clone());
+    }
+    let mt_key = keys.get_item(randint(n)?)?;
+    let new_member = mutate_auto(&new_val.get_item(&mt_key)?)?;
+    new_val.set_item(mt_key, new_member)?;
+    Ok(new_val)
+}
+
+fn mutate_instance<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    //! 任意对象的成员千差万别，交给 Python 实现的 `mutate_instance` 处理
+    MUTATE_INSTANCE
+        .import(val.py(), "respfuzzer.lib.fuzz.mutator", "mutate_instance")?
+        .call1((val,))
+}
+
+pub fn mutate_param_list<'py>(val: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>> {
+    //! Mutate a random non-empty subset of the parameters
+    let a = val.len()?;
+    if a <= 1 {
+        return Ok(val.clone());
+    }
+    let new_val = copy_value(val)?;
+    let mut mt_num = randint(a)? + 1;
+    let mut mt_idx: Vec<usize> = Vec::with_capacity(mt_num);
+    while mt_num > 0 {
+        let x = randint(a)?;
+        if !mt_idx.contains(&x) {
+            mt_idx.push(x);
+            mt_num -= 1;
+        }
+    }
+    for i in mt_idx {
+        let new_member = mutate_auto(&new_val.get_item(i)?)?;
+        new_val.set_item(i, new_member)?;
+    }
+    Ok(new_val)
+}
@@ -0,0 +1,98 @@
+import pytest
+
+from respfuzzer.lib.fuzz import array_mutator, mutator
+from respfuzzer.lib.fuzz.mutate import get_random_state, mutate_buffer, set_random_state
+
+np = pytest.importorskip("numpy")
+
+ARRAYS = [
+    np.arange(12, dtype=np.float32).reshape(3, 4),
+    np.arange(10, dtype=np.int64),
+    np.array([True, False, True]),
+    np.array(["a", "bc"]),
+    np.array([1, "x", None], dtype=object),
+    np.zeros((0, 3)),
+    np.array(5),
+    np.arange(3).astype("datetime64[D]"),
+]
+
+
+def test_mutate_buffer_in_place():
+    buf = np.arange(64, dtype=np.uint8)
+    changed = 0
+    for state in range(1, 100):
+        new_val = buf.copy()
+        set_random_state(state)
+        mutate_buffer(new_val)
+        changed += not np.array_equal(new_val, buf)
+    assert changed > 50
+    with pytest.raises(TypeError):
+        mutate_buffer(b"readonly")
+
+
+def test_array_types_are_dispatched():
+    assert mutator.resolve_mutator(np.ndarray) is array_mutator.mutate_ndarray
+    assert mutator.resolve_mutator(np.ma.MaskedArray) is array_mutator.mutate_ndarray
+    assert mutator.resolve_mutator(np.float64) is array_mutator.mutate_numpy_scalar
+
+
+@pytest.mark.parametrize("arr", ARRAYS, ids=lambda arr: str(arr.dtype))
+def test_mutate_ndarray_leaves_seed_intact(arr):
+    before = arr.copy()
+    for state in range(1, 200):
+        set_random_state(state)
+        new_val = array_mutator.mutate_ndarray(arr)
+        assert isinstance(new_val, np.ndarray)
+        assert new_val is arr or not np.shares_memory(new_val, arr)
+        np.testing.assert_array_equal(arr, before)
+
+
+def test_mutate_ndarray_is_replayable():
+    arr = np.linspace(0, 1, 32).reshape(4, 8)
+    for state in range(1, 100):
+        set_random_state(state)
+        first = array_mutator.mutate_ndarray(arr)
+        first_state = get_random_state()
+        set_random_state(state)
+        second = array_mutator.mutate_ndarray(arr)
+        assert get_random_state() == first_state
+        np.testing.assert_array_equal(first, second)
+        assert first.dtype == second.dtype and first.strides == second.strides
+
+
+def test_inject_special_values():
+    arr = np.ones(8)
+    found = False
+    for state in range(1, 50):
+        set_random_state(state)
+        found |= not np.isfinite(array_mutator.inject_special_values(arr)).all()
+    assert found
+    assert np.isfinite(arr).all()
+
+
+def test_mutate_object_array_elements():
+    arr = np.array([1, "x", 2.5], dtype=object)
+    changed = 0
+    for state in range(1, 50):
+        set_random_state(state)
+        changed += list(array_mutator.mutate_array_data(arr)) != [1, "x", 2.5]
+        set_random_state(state)
+        changed += list(array_mutator.inject_special_values(arr)) != [1, "x", 2.5]
+    assert changed > 50
+    assert list(arr) == [1, "x", 2.5]
+
+
+def test_mutate_numpy_scalar_keeps_width():
+    for state in range(1, 50):
+        set_random_state(state)
+        assert isinstance(mutator.mutate_auto(np.float32(1.5)), np.float32)
+
+
+def test_mutate_dataframe():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [0.5, 1.5, 2.5]})
+    before = df.copy()
+    for state in range(1, 50):
+        set_random_state(state)
+        assert isinstance(mutator.mutate_auto(df), pd.DataFrame)
+    pd.testing.assert_frame_equal(df, before)
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from respfuzzer.lib.fuzz.calibration import (
+    calibrate_seed,
+    derive_timing,
+    mutant_budget,
+    percentile,
+)
+from respfuzzer.models import Seed
+
+CONFIG = {
+    "execution_timeout": 1.0,
+    "calibration_runs": 3,
+    "timeout_multiplier": 5.0,
+    "timeout_floor": 0.1,
+}
+
+
+def make_seed() -> Seed:
+    return Seed(
+        id=1,
+        func_id=1,
+        library_name="json",
+        func_name="json.dumps",
+        args=[],
+        function_call="import json\njson.dumps(1)",
+    )
+
+
+def test_percentile():
+    samples = [0.5, 0.1, 0.3, 0.2, 0.4]
+    assert percentile(samples, 50) == 0.3
+    assert percentile(samples, 99) == 0.5
+    assert percentile(samples, 0) == 0.1
+
+
+def test_derive_timing_clamped():
+    assert derive_timing([0.001] * 5, CONFIG).exec_timeout == pytest.approx(0.1)
+    assert derive_timing([0.05] * 5, CONFIG).exec_timeout == pytest.approx(0.25)
+    assert derive_timing([0.5] * 5, CONFIG).exec_timeout == pytest.approx(1.0)
+
+
+def test_calibrate_seed():
+    seed = make_seed()
+    calls = []
+    timing = calibrate_seed(seed, lambda timeout: calls.append(timeout), CONFIG)
+    assert calls == [1.0] * 4  # one warm-up run and three timed runs
+    assert (seed.exec_time, seed.exec_timeout) == timing
+    assert timing.exec_timeout == pytest.approx(0.1)
+
+
+def test_calibrate_seed_stops_on_hang():
+    seed = make_seed()
+    calls = []
+
+    def run_once(timeout: float) -> None:
+        calls.append(timeout)
+        if len(calls) > 1:
+            time.sleep(timeout)
+
+    timing = calibrate_seed(seed, run_once, {**CONFIG, "execution_timeout": 0.05})
+    assert len(calls) == 2
+    assert timing.exec_timeout == pytest.approx(0.05)
+
+
+def test_mutant_budget():
+    seed = make_seed()
+    assert mutant_budget(seed, 100, CONFIG) == pytest.approx(2.0)
+    seed.exec_time, seed.exec_timeout = 0.01, 0.2
+    assert mutant_budget(seed, 100, CONFIG) == pytest.approx(0.4 + 100 * 0.01 * 5)
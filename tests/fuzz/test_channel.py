@@ -0,0 +1,116 @@
+from multiprocessing import Pipe
+
+from respfuzzer.lib.fuzz.channel import (
+    OP_EXECUTE,
+    OP_EXIT,
+    STATUS_OK,
+    STATUS_TIMEOUT,
+    ParentChannel,
+    WorkerChannel,
+)
+from respfuzzer.models import Seed
+
+
+def make_channels() -> tuple[ParentChannel, WorkerChannel]:
+    parent_conn, child_conn = Pipe()
+    return ParentChannel(parent_conn), WorkerChannel(child_conn)
+
+
+def test_program_defined_once():
+    parent, worker = make_channels()
+    seed = Seed(
+        id=7,
+        func_id=1,
+        library_name="json",
+        func_name="json.dumps",
+        args=[],
+        function_call="import json\njson.dumps(1)",
+    )
+    for _ in range(3):
+        parent.send_command(OP_EXECUTE, seed)
+        opcode, program = worker.recv_command()
+        assert opcode == OP_EXECUTE
+        assert program.id == 7
+        assert program.func_name == "json.dumps"
+        assert program.function_call == seed.function_call
+    assert len(worker.programs) == 1
+
+    parent.send_command(OP_EXIT)
+    assert worker.recv_command() == (OP_EXIT, None)
+
+
+def test_result_record():
+    parent, worker = make_channels()
+    worker.send_result(STATUS_OK, 10, 3)
+    result = parent.recv_result(1)
+    assert (result.status, result.exec_cnt, result.new_cov) == (STATUS_OK, 10, 3)
+    assert parent.recv_result(0.01).status == STATUS_TIMEOUT
+
+
+def test_result_stats():
+    parent, worker = make_channels()
+    worker.send_result(STATUS_OK, 5, 2, 0.25, {"ValueError": 3, "TypeError": 1})
+    result = parent.recv_result(1)
+    assert result.cpu_time == 0.25
+    assert dict(result.exceptions) == {"ValueError": 3, "TypeError": 1}
+    worker.send_result(STATUS_OK, 5, 2)
+    assert parent.recv_result(1).exceptions == ()
+
+
+def test_program_carries_exec_timeout():
+    parent, worker = make_channels()
+    seed = Seed(
+        id=7,
+        func_id=1,
+        library_name="json",
+        func_name="json.dumps",
+        args=[],
+        function_call="import json\njson.dumps(1)",
+    )
+    parent.send_command(OP_EXECUTE, seed)
+    assert worker.recv_command()[1].exec_timeout is None
+
+    seed.exec_timeout = 0.25
+    parent.send_command(OP_EXECUTE, seed)
+    assert worker.recv_command()[1].exec_timeout == 0.25
+
+
+def test_command_carries_random_stream():
+    parent, worker = make_channels()
+    seed = Seed(
+        id=7,
+        func_id=1,
+        library_name="json",
+        func_name="json.dumps",
+        args=[],
+        function_call="import json\njson.dumps(1)",
+    )
+    parent.send_command(OP_EXECUTE, seed, 2**64 - 1)
+    worker.recv_command()
+    assert worker.stream == 2**64 - 1
+    parent.send_command(OP_EXECUTE, seed)
+    worker.recv_command()
+    assert worker.stream == 0
+
+
+def test_evicted_program_is_defined_again():
+    parent_conn, child_conn = Pipe()
+    parent = ParentChannel(parent_conn, max_programs=2)
+    worker = WorkerChannel(child_conn, max_programs=2)
+    seeds = [
+        Seed(
+            id=i,
+            func_id=1,
+            library_name="json",
+            func_name="json.dumps",
+            args=[],
+            function_call=f"import json\njson.dumps({i})",
+        )
+        for i in range(3)
+    ]
+    for i in [0, 1, 0, 2, 1, 0, 2]:
+        parent.send_command(OP_EXECUTE, seeds[i])
+        opcode, program = worker.recv_command()
+        assert program.id == i
+        assert len(worker.programs) <= 2
+        assert list(worker.programs) == list(parent.known)
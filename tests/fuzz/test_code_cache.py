@@ -0,0 +1,32 @@
+import pytest
+
+from respfuzzer.lib.fuzz import code_cache
+from respfuzzer.lib.fuzz.code_cache import code_hash, compile_cached
+
+
+def test_code_hash_is_content_based():
+    assert code_hash("x = 1") == code_hash("x = 1")
+    assert code_hash("x = 1") != code_hash("x = 2")
+
+
+def test_compile_cached_reuses_code_object():
+    code = compile_cached("y = 1 + 1")
+    assert compile_cached("y = 1 + 1") is code
+    ns = {}
+    exec(code, ns)
+    assert ns["y"] == 2
+
+
+def test_compile_cached_syntax_error():
+    with pytest.raises(SyntaxError):
+        compile_cached("def (")
+
+
+def test_compile_cached_is_bounded(monkeypatch):
+    monkeypatch.setattr(code_cache, "CODE_CACHE_SIZE", 2)
+    monkeypatch.setattr(code_cache, "_code_cache", code_cache.OrderedDict())
+    first = compile_cached("a = 1")
+    compile_cached("b = 1")
+    assert compile_cached("a = 1") is first  # 最近使用过，不会被淘汰
+    compile_cached("c = 1")
+    assert list(code_cache._code_cache) == [code_hash("a = 1"), code_hash("c = 1")]
@@ -0,0 +1,62 @@
+from respfuzzer.lib.fuzz.corpus import Corpus, get_corpus
+from respfuzzer.lib.fuzz.mutate import set_random_state
+
+
+def test_add_deduplicates_entries():
+    corpus = Corpus()
+    corpus.set_current([1, "a"])
+    assert corpus.add([2, "a"], 3, 0.01)
+    assert not corpus.add([2, "a"], 5, 0.01)
+    assert not corpus.add([1, "a"], 1, 0.01)
+    assert len(corpus) == 2
+
+
+def test_entries_are_isolated_from_later_changes():
+    corpus = Corpus()
+    param_list = [[1, 2], {"k": "v"}]
+    corpus.add(param_list, 1, 0.01)
+    param_list[0].append(3)
+    entry = corpus.entries[0]
+    assert entry.params() == [[1, 2], {"k": "v"}]
+    assert entry.params() is not entry.params()
+
+
+def test_eviction_keeps_current_and_best_entries():
+    corpus = Corpus(max_entries=3)
+    corpus.set_current([0])
+    corpus.add([1], 1, 1.0)
+    corpus.add([2], 10, 1.0)
+    corpus.add([3], 5, 1.0)
+    assert [e.params() for e in corpus.entries] == [[0], [2], [3]]
+
+
+def test_pending_favored_entries_are_picked_first():
+    corpus = Corpus()
+    corpus.set_current([0])
+    corpus.add([1], 1, 1.0)
+    corpus.add([2], 100, 1.0)
+    assert [e.favored for e in corpus.entries] == [True, False, True]
+    set_random_state(4399)
+    picked = [corpus.next_parent().params() for _ in range(2)]
+    assert sorted(picked) == [[0], [2]]
+
+
+def test_next_parent_is_replayable():
+    def picks():
+        corpus = Corpus()
+        corpus.set_current([0])
+        for i in range(1, 10):
+            corpus.add([i], i, 0.1 * i)
+        set_random_state(4399)
+        return [corpus.next_parent().params()[0] for _ in range(50)]
+
+    first = picks()
+    assert picks() == first
+    assert len(set(first)) > 1
+
+
+def test_corpus_per_signature():
+    a = get_corpus("m.f", (1,), {"x": 2})
+    assert get_corpus("m.f", (3,), {"x": 4}) is a
+    assert len(a) == 2 and a.current.params() == [3, 4]
+    assert get_corpus("m.f", (1,), {"y": 2}) is not a
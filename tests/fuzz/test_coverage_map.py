@@ -0,0 +1,97 @@
+import ctypes
+import ctypes.util
+import os
+
+import numpy as np
+import pytest
+
+from respfuzzer.lib.fuzz.coverage_map import (
+    SharedBitmap,
+    SharedVirginMap,
+    popcount,
+    remove_segment,
+)
+
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+
+def make_segment(key: int) -> int:
+    shmid = libc.shmget(key, 1 << 16, IPC_CREAT | 0o600)
+    if shmid < 0:
+        pytest.skip("System V shared memory is not available")
+    return shmid
+
+
+@pytest.fixture
+def shm_keys():
+    keys = [0x52460000 + (os.getpid() % 0x8000) * 2 + i for i in range(2)]
+    shmids = [make_segment(key) for key in keys]
+    yield keys
+    for shmid in shmids:
+        libc.shmctl(shmid, IPC_RMID, None)
+
+
+def test_popcount():
+    words = np.array([0, 1, 3, 2**64 - 1], dtype=np.uint64)
+    assert popcount(words) == 67
+
+
+def test_shared_bitmap_is_zero_copy(shm_keys):
+    key = shm_keys[0]
+    with SharedBitmap(key) as writer, SharedBitmap(key, readonly=True) as reader:
+        assert len(reader.words) == (1 << 16) // 8
+        writer.words[100] = 0xF0
+        assert reader.words[100] == 0xF0
+        with pytest.raises(ValueError):
+            reader.words[0] = 1
+
+
+def test_shared_virgin_map_reports_new_edges_once(shm_keys):
+    trace_key, global_key = shm_keys
+    with SharedBitmap(trace_key) as trace:
+        virgin = SharedVirginMap(global_key)
+        other = SharedVirginMap(global_key)  # 另一个 worker
+        trace.words[1] = 0b1011
+        assert virgin.update(trace.words) == 3
+        assert other.update(trace.words) == 0
+        trace.words[1] |= 0b0100
+        trace.words[-1] = 1 << 63
+        assert other.update(trace.words) == 2
+        assert virgin.update(trace.words) == 0
+        assert virgin.count() == other.count() == 5
+        virgin.close()
+        other.close()
+
+
+def test_virgin_map_merges_read_only_trace(shm_keys):
+    # 被杀死的 worker 的位图以只读方式映射后合并
+    trace_key, global_key = shm_keys
+    with SharedBitmap(trace_key) as writer:
+        writer.words[:] = 0
+        writer.words[4000] = 0b110
+    with SharedBitmap(trace_key, readonly=True) as trace:
+        virgin = SharedVirginMap(global_key)
+        virgin.bitmap.words[:] = 0
+        assert virgin.update(trace.words) == 2
+        assert virgin.bitmap.words[4000] == 0b110
+        virgin.close()
+
+
+def test_missing_segment():
+    with pytest.raises(OSError):
+        SharedBitmap(0x7FFFFFF0)
+
+
+def test_remove_segment(shm_keys):
+    key = shm_keys[0]
+    bitmap = SharedBitmap(key)
+    assert remove_segment(key)
+    bitmap.words[0] = 1  # 已映射的进程仍可访问，直到最后一个进程分离
+    bitmap.close()
+    with pytest.raises(OSError):
+        SharedBitmap(key)
+    assert not remove_segment(key)
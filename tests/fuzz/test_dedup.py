@@ -0,0 +1,77 @@
+import pytest
+
+from respfuzzer.lib.fuzz import dedup as dedup_module
+from respfuzzer.lib.fuzz.dedup import (
+    BloomFilter,
+    Deduplicator,
+    get_deduplicator,
+    structural_hash,
+)
+
+
+def test_structural_hash_distinguishes_types():
+    values = [1, True, 1.0, 1j, "1", b"1", [1], (1,), {1}, frozenset([1]), {1: 1}]
+    hashes = [structural_hash(v) for v in values]
+    assert None not in hashes
+    assert len(set(hashes)) == len(values)
+    assert structural_hash(0.0) != structural_hash(-0.0)
+    assert structural_hash(float("nan")) == structural_hash(float("nan"))
+    assert structural_hash([1, {"a": (2, None)}]) == structural_hash(
+        [1, {"a": (2, None)}]
+    )
+
+
+def test_unhashable_values_are_never_duplicates():
+    assert structural_hash([1, object()]) is None
+    dedup = Deduplicator(1 << 10)
+    param_list = [object()]
+    assert not dedup.is_duplicate(param_list)
+    assert not dedup.is_duplicate(param_list)
+    assert dedup.checked == 0
+
+
+def test_structural_hash_of_arrays():
+    np = pytest.importorskip("numpy")
+    arr = np.arange(6, dtype=np.int32).reshape(2, 3)
+    assert structural_hash([arr]) == structural_hash([arr.copy()])
+    assert structural_hash([arr]) != structural_hash([arr.T.copy()])
+    assert structural_hash([arr]) != structural_hash([arr.astype(np.int64)])
+    assert structural_hash([np.array([None])]) is None
+
+
+def test_bloom_filter():
+    bf = BloomFilter(1 << 16)
+    assert not any(bf.add(h) for h in range(1000))
+    assert all(bf.add(h) for h in range(1000))
+    bf.clear()
+    assert not bf.add(0)
+
+
+def test_duplicate_rate():
+    dedup = Deduplicator(1 << 16)
+    dedup.add([True])
+    results = [dedup.is_duplicate(p) for p in ([True], [False], [False], [1])]
+    assert results == [True, False, True, False]
+    assert dedup.duplicate_rate() == 0.5
+
+
+@pytest.mark.parametrize("scope", ["seed", "campaign", "off"])
+def test_dedup_scope(monkeypatch, scope):
+    monkeypatch.setattr(dedup_module, "DEDUP_SCOPE", scope)
+    monkeypatch.setattr(dedup_module, "_deduplicator", None)
+    dedup = get_deduplicator()
+    if scope == "off":
+        assert dedup is None
+        return
+    dedup.add([1])
+    dedup = get_deduplicator()
+    assert dedup.is_duplicate([1]) == (scope == "campaign")
+
+
+def test_campaign_scope_is_keyed_by_function(monkeypatch):
+    monkeypatch.setattr(dedup_module, "DEDUP_SCOPE", "campaign")
+    monkeypatch.setattr(dedup_module, "_deduplicator", None)
+    get_deduplicator("json.dumps").add([1])
+    # 另一个函数的相同参数列表不算重复
+    assert not get_deduplicator("json.loads").is_duplicate([1])
+    assert get_deduplicator("json.dumps").is_duplicate([1])
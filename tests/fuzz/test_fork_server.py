@@ -0,0 +1,62 @@
+import os
+
+from respfuzzer.lib.fuzz.fork_server import ForkServer
+from respfuzzer.models import Seed
+
+
+def run_seed(seed: Seed) -> None:
+    os.setpgid(0, 0)
+    exec(seed.function_call)
+
+
+def make_seed(code: str) -> Seed:
+    return Seed(
+        func_id=0,
+        library_name="json",
+        func_name="json.dumps",
+        args=[],
+        function_call=code,
+    )
+
+
+def test_fork_server_run_success():
+    with ForkServer("json", run_seed) as server:
+        assert server.run(make_seed("import json\njson.dumps(1)"), 5)
+        assert server.run(make_seed("import json\njson.dumps(2)"), 5)
+
+
+def test_fork_server_run_failure():
+    with ForkServer("json", run_seed) as server:
+        assert not server.run(make_seed("raise ValueError('boom')"), 5)
+        # the server survives a failing child
+        assert server.run(make_seed("pass"), 5)
+
+
+def test_fork_server_run_timeout():
+    with ForkServer("json", run_seed) as server:
+        assert not server.run(make_seed("import time\ntime.sleep(10)"), 0.5)
+        assert server.run(make_seed("pass"), 5)
+
+
+def fail_seed(seed: Seed) -> None:
+    raise RuntimeError("target override")
+
+
+def test_fork_server_run_target_override():
+    with ForkServer("json", run_seed) as server:
+        assert not server.run(make_seed("pass"), 5, target=fail_seed)
+        assert server.run(make_seed("pass"), 5)
+
+
+def test_fork_server_hanging_preload(tmp_path, monkeypatch):
+    (tmp_path / "respfuzzer_hanging_module.py").write_text(
+        "import time\ntime.sleep(60)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    seed = make_seed("pass")
+    seed.func_name = "respfuzzer_hanging_module.f"
+    with ForkServer("json", run_seed) as server:
+        pid = server.process.pid
+        assert not server.run(seed, 0.5)
+        assert server.process.pid != pid
+        assert server.run(make_seed("pass"), 5)
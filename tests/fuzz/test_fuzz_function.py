@@ -2,12 +2,19 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from respfuzzer.lib.fuzz.dedup import Deduplicator
 from respfuzzer.lib.fuzz.fuzz_function import (
     convert_to_param_list,
     execute_once,
     fuzz_function,
+    generate_mutations,
     reconvert_param_list,
+    remutate_duplicate,
+    resume_mutations,
 )
+from respfuzzer.lib.fuzz.mutate import set_random_state
+from respfuzzer.lib.fuzz.mutator import mutate_param_list
+from respfuzzer.lib.fuzz.seeding import Resume, next_random_state, set_stream
 from respfuzzer.utils.redis_util import get_redis_client
 
 
@@ -67,3 +74,52 @@ def test_fuzz_function_with_args(
     kwargs = {"a": 4, "b": 5}
     fuzz_function(mock_function, *args, **kwargs)
     mock_logger.debug.assert_any_call("Start fuzz test_module.test_function")
+
+
+def test_generate_mutations_in_batches(monkeypatch):
+    monkeypatch.setattr("respfuzzer.lib.fuzz.fuzz_function.mutation_batch_size", 3)
+    param_list = [1, "a", [2.5, b"b"]]
+    set_random_state(4399)
+    mutations = list(generate_mutations(param_list, 10))
+    assert [i for i, _, _ in mutations] == list(range(1, 11))
+    for _, random_state, mt_param_list in mutations:
+        set_random_state(random_state)
+        assert repr(mutate_param_list(param_list)) == repr(mt_param_list)
+
+
+def test_resume_skips_hanging_mutation():
+    param_list = [1, "a", [2.5, b"b"]]
+    set_stream(4399)
+    set_random_state(next_random_state())
+    full = list(generate_mutations(param_list, 10))
+
+    # 第 4 次变异挂起：从它的随机状态恢复，跳到第 5 次
+    set_stream(4399, Resume(call=0, index=4, random_state=full[3][1]))
+    set_random_state(next_random_state())
+    resumed = list(resume_mutations("f", param_list, 10))
+    assert [(i, state) for i, state, _ in resumed] == [
+        (i, state) for i, state, _ in full[4:]
+    ]
+
+    set_stream(4399, Resume(call=1, index=4, random_state=0))
+    next_random_state()
+    assert list(resume_mutations("f", param_list, 10)) == []
+    set_stream(None)
+
+
+def test_duplicate_is_mutated_again(monkeypatch):
+    dedup = Deduplicator(1 << 16)
+    dedup.add([1])
+    retries = iter([[1], [1], [2]])
+    monkeypatch.setattr(
+        "respfuzzer.lib.fuzz.fuzz_function.mutate_param_list", lambda p: next(retries)
+    )
+    assert remutate_duplicate(dedup, [0], 7, [3]) == (7, [3])
+    _, mt_param_list = remutate_duplicate(dedup, [0], 7, [1])
+    assert mt_param_list == [2]
+    assert dedup.duplicates == 3
+
+    # 重试次数用完仍然重复时放弃该变异
+    monkeypatch.setattr("respfuzzer.lib.fuzz.fuzz_function.MAX_REMUTATIONS", 2)
+    retries = iter([[2], [3]])
+    assert remutate_duplicate(dedup, [0], 7, [1])[1] is None
@@ -0,0 +1,141 @@
+import os
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from respfuzzer.lib.fuzz import journal as journal_module
+from respfuzzer.lib.fuzz.journal import (
+    JOURNAL_EXEC_CNT,
+    JOURNAL_EXEC_RECORD,
+    Journal,
+    parent_note,
+    recover_journal,
+)
+
+FLAGS = JOURNAL_EXEC_RECORD | JOURNAL_EXEC_CNT
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "_journal_dir", tmp_path)
+    return tmp_path
+
+
+def test_flush_pipelines_records():
+    rc = MagicMock()
+    pipe = rc.pipeline.return_value
+    journal = Journal.create(os.getpid(), FLAGS, rc, capacity=4)
+    for i in range(1, 4):
+        journal.record(i, 100 + i)
+        journal.commit()
+    rc.pipeline.assert_not_called()
+
+    journal.flush()
+    pipe.hset.assert_has_calls(
+        [
+            call("exec_record", mapping={1: 101, 2: 102, 3: 103}),
+            call("random_state", str(os.getpid()), 103),
+        ]
+    )
+    pipe.hincrby.assert_called_once_with("fuzz", "exec_cnt", 3)
+    pipe.execute.assert_called_once()
+    journal.close(unlink=True)
+
+
+def test_flush_when_full():
+    rc = MagicMock()
+    journal = Journal.create(os.getpid(), FLAGS, rc, capacity=2)
+    for i in range(1, 4):
+        journal.record(i, i)
+        journal.commit()
+    assert rc.pipeline.call_count == 1
+    journal.close(unlink=True)
+
+
+def test_recover_in_flight_state(journal_dir):
+    rc = MagicMock()
+    pipe = rc.pipeline.return_value
+    pid = 12345
+    journal = Journal.create(pid, FLAGS, rc, capacity=8)
+    journal.record(1, 11)
+    journal.commit()
+    journal.record(2, 22)  # 执行第 2 次变异时进程被杀死
+    journal.mm.close()
+
+    assert recover_journal(pid, rc) == (1, 22, 2, 0, None)
+    pipe.hset.assert_any_call("exec_record", mapping={1: 11, 2: 22})
+    pipe.hincrby.assert_called_once_with("fuzz", "exec_cnt", 1)
+    assert not (journal_dir / f"{pid}.journal").exists()
+    assert recover_journal(pid, rc) is None
+
+
+def test_local_backend(journal_dir):
+    pid = 12346
+    journal = Journal.create(pid, FLAGS, None, capacity=2)
+    for i in range(1, 6):
+        journal.record(i, i * 10)
+        journal.commit()
+    journal.record(6, 60)
+    journal.mm.close()
+
+    assert recover_journal(pid, None) == (5, 60, 6, 0, None)
+    assert not (journal_dir / f"{pid}.journal").exists()
+
+
+def test_recover_call_index(journal_dir):
+    pid = 12347
+    journal = Journal.create(pid, FLAGS, None, capacity=4)
+    journal.record(1, 10)
+    journal.commit()
+    journal.reset(FLAGS, call=3)
+    journal.record(1, 30)
+    journal.mm.close()
+
+    assert recover_journal(pid, None) == (1, 30, 1, 3, None)  # 执行次数跨调用累计
+
+
+def test_exec_cnt_accumulates_over_calls(journal_dir, monkeypatch):
+    pid = os.getpid()
+    monkeypatch.setattr(journal_module, "_journal", None)
+    for call_index in range(3):
+        journal = journal_module.get_journal(FLAGS, None, call_index)
+        for i in range(1, 5):
+            journal.record(i, i)
+            journal.commit()
+    journal.record(5, 50)  # 第 3 次调用的第 5 次变异执行时进程被杀死
+    journal.mm.close()
+    monkeypatch.setattr(journal_module, "_journal", None)
+
+    assert recover_journal(pid, None) == (12, 50, 5, 2, None)
+    assert not (journal_dir / f"{pid}.journal").exists()
+
+
+def test_recover_corpus_parent(journal_dir):
+    pid = 12348
+    journal = Journal.create(pid, FLAGS, None, capacity=4)
+    journal.set_parent(b"parent")
+    journal.record(1, 10)
+    journal.commit()
+    journal.record(2, 20)  # 从语料库父条目变异出的输入执行时进程被杀死
+    journal.mm.close()
+
+    recovery = recover_journal(pid, None)
+    assert recovery == (1, 20, 2, 0, b"parent")
+    assert not (journal_dir / f"{pid}.parent").exists()
+    note = parent_note(recovery)
+    assert note == " from corpus parent /tmp/respfuzzer_replay_20_parent.pkl"
+    with open(note.split()[-1], "rb") as f:
+        assert f.read() == b"parent"
+    os.unlink(note.split()[-1])
+
+
+def test_new_call_mutates_original_arguments(journal_dir):
+    pid = 12349
+    journal = Journal.create(pid, FLAGS, None, capacity=4)
+    journal.set_parent(b"parent")
+    journal.reset(FLAGS, call=1)
+    journal.record(1, 10)
+    journal.mm.close()
+
+    recovery = recover_journal(pid, None)
+    assert recovery.parent is None and parent_note(recovery) == ""
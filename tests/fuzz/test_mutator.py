@@ -0,0 +1,262 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from respfuzzer.lib.fuzz import mutate, mutator
+from respfuzzer.lib.fuzz.mutate import ChainRng, get_random_state, set_random_state
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return f"Point({self.x!r}, {self.y!r})"
+
+
+VALUES = [
+    None,
+    True,
+    12345,
+    3.14,
+    1 + 2j,
+    "hello world",
+    b"\x00\x01\x02\x03",
+    [1, 2.5, "a", b"b"],
+    (1, [2, 3], {"k": 4}),
+    {1, 2, 3},
+    frozenset({"x", "y"}),
+    {"a": [1, 2], "b": (3.0, "c")},
+    OrderedDict(a=1, b=2),
+    Point(1, "p"),
+    int,
+]
+
+
+@pytest.fixture
+def python_mutator(monkeypatch):
+    monkeypatch.setattr(mutator, "mutate_auto", mutator.py_mutate_auto)
+    monkeypatch.setattr(mutator, "mutate_param_list", mutator.py_mutate_param_list)
+
+
+def run_both(func_name: str, value, state: int) -> tuple[str, str]:
+    set_random_state(state)
+    native = repr(getattr(mutate, func_name)(value))
+    native_state = get_random_state()
+    set_random_state(state)
+    python = repr(getattr(mutator, f"py_{func_name}")(value))
+    assert get_random_state() == native_state
+    return native, python
+
+
+@pytest.mark.parametrize("value", VALUES, ids=repr)
+def test_native_mutate_auto_replays_python(python_mutator, value):
+    for state in range(1, 200):
+        native, python = run_both("mutate_auto", value, state)
+        assert native == python
+
+
+def test_native_mutate_param_list_replays_python(python_mutator):
+    params = [v for v in VALUES if not isinstance(v, Point)]
+    for state in range(1, 200):
+        native, python = run_both("mutate_param_list", params, state)
+        assert native == python
+
+
+@pytest.mark.parametrize(
+    "func_name, value",
+    [
+        ("mutate_int", 12345),
+        ("mutate_float", 3.5),
+        ("mutate_str", "hello world"),
+        ("mutate_bytes", b"\x00\x01\x02\x03"),
+        ("mutate_param_list", [1, "a", [2.5, b"b"], {"k": 3}]),
+    ],
+)
+def test_batch_matches_sequential(func_name, value):
+    set_random_state(4399)
+    batch, states = getattr(mutate, f"{func_name}_batch")(value, 50)
+    end_state = get_random_state()
+    assert len(batch) == len(states) == 50
+    for mutated, state in zip(batch, states):
+        set_random_state(state)
+        assert repr(getattr(mutate, func_name)(value)) == repr(mutated)
+    assert get_random_state() == end_state
+
+
+def test_python_batch_replays_native(python_mutator):
+    params = [v for v in VALUES if not isinstance(v, Point)]
+    set_random_state(4399)
+    native, native_states = mutate.mutate_param_list_batch(params, 50)
+    set_random_state(4399)
+    python, python_states = mutator.py_mutate_param_list_batch(params, 50)
+    assert native_states == python_states
+    assert repr(native) == repr(python)
+
+
+@pytest.mark.parametrize(
+    "func_name, value",
+    [
+        ("mutate_int", 12345),
+        ("mutate_float", 3.5),
+        ("mutate_str", "hello world"),
+        ("mutate_bytes", b"\x00\x01\x02\x03"),
+    ],
+)
+def test_chain_rng_matches_global_stream(func_name, value):
+    rng = ChainRng(4399)
+    set_random_state(4399)
+    for _ in range(50):
+        assert getattr(rng, func_name)(value) == getattr(mutate, func_name)(value)
+        assert rng.state == get_random_state()
+
+
+def test_chain_rng_streams_are_independent():
+    set_random_state(1)
+    a, b = ChainRng(4399), ChainRng(4399)
+    xs = [a.randint(1000) for _ in range(100)]
+    b.mutate_str("interleaved")
+    b.state = 4399
+    assert [b.randint(1000) for _ in range(100)] == xs
+    assert get_random_state() == 1
+
+
+def test_chain_rng_threads_are_reproducible():
+    # 足够大的输入会在释放 GIL 的情况下变异
+    value = bytes(range(256)) * 64
+
+    def run(state: int) -> list[bytes]:
+        rng = ChainRng(state)
+        return [mutate.mutate_bytes(value, rng=rng) for _ in range(20)]
+
+    set_random_state(1)
+    with ThreadPoolExecutor(4) as pool:
+        concurrent = list(pool.map(run, range(1, 9)))
+    assert concurrent == [run(state) for state in range(1, 9)]
+    assert get_random_state() == 1
+
+
+def test_copy_on_write_leaves_seed_intact(python_mutator):
+    big = list(range(10000))
+    config = {"a": [1, 2], "b": {"c": 3}}
+    params = [big, config, 1.0, "s"]
+    shared = 0
+    for state in range(1, 50):
+        set_random_state(state)
+        mutated = mutator.py_mutate_param_list(params)
+        assert params == [list(range(10000)), {"a": [1, 2], "b": {"c": 3}}, 1.0, "s"]
+        shared += sum(new is old for new, old in zip(mutated, params))
+    assert shared > 0
+
+
+def test_copy_on_write_dict_shares_members(python_mutator):
+    config = {"a": [1, 2], "b": {"c": 3}, "d": "e"}
+    for state in range(1, 50):
+        set_random_state(state)
+        mutated = mutator.mutate_dict(config)
+        assert config == {"a": [1, 2], "b": {"c": 3}, "d": "e"}
+        assert sum(mutated[k] is config[k] for k in config) >= len(config) - 1
+
+
+def sort_in_place(data, config, name):
+    data.sort()
+    config.clear()
+
+
+def run_isolated(params, target, n=20):
+    isolator = mutator.ArgumentIsolator()
+    set_random_state(1)
+    batch, _ = mutator.py_mutate_param_list_batch(params, n)
+    executed = []
+    for mutated in batch:
+        exec_list, fingerprints = isolator.prepare(mutated)
+        target(*exec_list)
+        isolator.check(exec_list, fingerprints)
+        executed.append(exec_list)
+    return isolator, batch, executed
+
+
+def test_isolated_params_survive_in_place_callee(python_mutator):
+    data = [3, 1, 2]
+    config = {"k": [1]}
+    params = [data, config, "s"]
+    isolator, batch, _ = run_isolated(params, sort_in_place)
+    # 目标函数原地修改了它的参数，之后的变异仍然看到原始参数
+    assert params == [[3, 1, 2], {"k": [1]}, "s"]
+    assert params[0] is data and params[1] is config
+    assert isolator.dirty == {0, 1}
+    set_random_state(1)
+    assert mutator.py_mutate_param_list_batch(params, 20)[0] == batch
+
+
+def test_untouched_large_param_is_not_copied(python_mutator):
+    big = list(range(100000))
+    params = [big, {"k": 1}, 1.0]
+    isolator, batch, executed = run_isolated(params, lambda *args: None)
+    assert isolator.dirty == set()
+    probes = mutator.PROBE_EXECUTIONS
+    # 探测之后，未被变异的参数直接以原对象传入
+    assert any(mutated[0] is big for mutated in batch[probes:])
+    for mutated, exec_list in zip(batch[probes:], executed[probes:]):
+        assert all(a is b for a, b in zip(exec_list, mutated))
+
+
+class Tags(list):
+    pass
+
+
+class Meters(float):
+    pass
+
+
+def test_resolve_mutator_follows_mro():
+    assert mutator.resolve_mutator(bool) is mutator.mutate_bool
+    assert mutator.resolve_mutator(Tags) is mutator.mutate_list
+    assert mutator.resolve_mutator(OrderedDict) is mutator.mutate_dict
+    assert mutator.resolve_mutator(Point) is mutator.mutate_instance
+    assert mutator.resolve_mutator(bytearray) is mutator.mutate_instance
+    assert mutator._dispatch[Tags] is mutator.mutate_list
+
+
+@pytest.mark.parametrize("value", [Tags([1, "a"]), Meters(1.5)], ids=repr)
+def test_native_mutate_auto_replays_python_for_subclasses(python_mutator, value):
+    for state in range(1, 100):
+        native, python = run_both("mutate_auto", value, state)
+        assert native == python
+
+
+@pytest.fixture
+def point_mutator():
+    # 原生实现持有这些表的引用，只能原地恢复
+    registry = dict(mutator._registry)
+
+    @mutator.register_mutator(Point)
+    def mutate_point(old_val):
+        return Point(mutator.mutate_auto(old_val.x), old_val.y)
+
+    yield mutate_point
+    mutator._registry.clear()
+    mutator._registry.update(registry)
+    mutator._dispatch.clear()
+    mutator._native_dispatch.clear()
+
+
+def test_register_mutator(python_mutator, point_mutator):
+    assert mutator.resolve_mutator(Point) is point_mutator
+    for state in range(1, 100):
+        native, python = run_both("mutate_auto", [Point(1, "p"), 2], state)
+        assert native == python
+    set_random_state(1)
+    assert mutator.mutate_auto(Point(1, "p")).y == "p"
+
+
+def test_register_mutator_invalidates_cache(point_mutator):
+    class Pixel(Point):
+        pass
+
+    assert mutator.resolve_mutator(Pixel) is point_mutator
+    mutator.register_mutator(Pixel, mutator.mutate_instance)
+    assert Pixel not in mutator._dispatch
+    assert mutator.resolve_mutator(Pixel) is mutator.mutate_instance
@@ -0,0 +1,36 @@
+from respfuzzer.lib.fuzz.output_sink import NullWriter, RingBuffer
+
+
+def test_null_writer_discards():
+    w = NullWriter()
+    assert w.write("hello") == 5
+
+
+def test_ring_buffer_keeps_tail():
+    ring = RingBuffer(10)
+    for i in range(100):
+        ring.write(f"line{i}\n")
+    assert len(ring.getvalue()) == 10
+    assert ring.getvalue().endswith("line99\n")
+
+
+def test_ring_buffer_large_write():
+    ring = RingBuffer(4)
+    ring.write("ab")
+    ring.write("0123456789")
+    assert ring.getvalue() == "6789"
+
+
+def test_ring_buffer_partial_trim():
+    ring = RingBuffer(5)
+    ring.write("abc")
+    ring.write("def")
+    assert ring.getvalue() == "bcdef"
+
+
+def test_ring_buffer_clear():
+    ring = RingBuffer(5)
+    ring.write("abc")
+    ring.clear()
+    ring.write("de")
+    assert ring.getvalue() == "de"
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from respfuzzer.lib.fuzz import seeding
+from respfuzzer.lib.fuzz.seeding import (
+    GOLDEN_GAMMA,
+    MASTER_SEED_ENV,
+    Resume,
+    current_call,
+    derive_state,
+    next_random_state,
+    resume_point,
+    set_stream,
+    splitmix64,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_seeding(monkeypatch):
+    monkeypatch.setattr(seeding, "_master_seed", None)
+    monkeypatch.delenv(MASTER_SEED_ENV, raising=False)
+    yield
+    set_stream(None)
+
+
+def test_splitmix64_reference():
+    # 以 0 为种子的 SplitMix64 序列的第一个输出
+    assert splitmix64(GOLDEN_GAMMA) == 0xE220A8397B1DCDAF
+
+
+def test_derived_streams_are_unique():
+    states = {
+        derive_state(4399, seed_id, mutant, attempt)
+        for seed_id in range(20)
+        for mutant in range(10)
+        for attempt in range(10)
+    }
+    assert len(states) == 20 * 10 * 10
+    assert derive_state(4399, 1, 2) == derive_state(derive_state(4399, 1), 2)
+    assert derive_state(4399, 1, 2) != derive_state(4399, 2, 1)
+
+
+def test_next_random_state_follows_stream():
+    set_stream(12345)
+    first = [next_random_state() for _ in range(3)]
+    set_stream(12345)
+    assert [next_random_state() for _ in range(3)] == first
+    assert len(set(first)) == 3
+    assert first[0] == derive_state(12345, 0)
+
+
+def test_unset_stream_falls_back_to_pid(monkeypatch):
+    monkeypatch.setattr(seeding, "_master_seed", 42)
+    set_stream(0)
+    assert next_random_state() == derive_state(derive_state(42, os.getpid()), 0)
+
+
+def test_master_seed_from_config(monkeypatch):
+    monkeypatch.setattr(seeding, "get_config", lambda _: {"master_seed": 7})
+    assert seeding.master_seed() == 7
+
+
+def test_random_master_seed_is_shared_with_children(monkeypatch):
+    monkeypatch.setattr(seeding, "get_config", lambda _: {})
+    seed = seeding.master_seed()
+    assert seed and os.environ[MASTER_SEED_ENV] == str(seed)
+    monkeypatch.setattr(seeding, "_master_seed", None)
+    assert seeding.master_seed() == seed
+
+
+def test_resume_point_skips_earlier_calls():
+    resume = Resume(call=1, index=5, random_state=99)
+    set_stream(12345, resume)
+    next_random_state()
+    assert current_call() == 0 and resume_point() == resume
+    next_random_state()
+    assert resume_point() == resume
+    next_random_state()
+    assert resume_point() is None
+    set_stream(12345)
+    next_random_state()
+    assert resume_point() is None
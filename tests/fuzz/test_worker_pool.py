@@ -0,0 +1,194 @@
+import ctypes
+import ctypes.util
+import os
+import resource
+import signal
+
+import psutil
+import pytest
+
+pytest.importorskip("dcov")
+
+from respfuzzer.lib.fuzz.channel import (
+    OP_EXECUTE,
+    OP_EXIT,
+    STATUS_CRASH,
+    STATUS_EXCEPTION,
+    STATUS_OK,
+    STATUS_TIMEOUT,
+    WorkerChannel,
+)
+from respfuzzer.lib.fuzz.coverage_map import SharedBitmap, SharedVirginMap
+from respfuzzer.lib.fuzz.worker_pool import WorkerPool
+from respfuzzer.models import Seed
+
+SHM_KEY_START = 0x52470000 + (os.getpid() % 0x8000) * 4
+
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+
+def get_segment(key: int) -> int:
+    shmid = libc.shmget(key, 0, 0)
+    if shmid < 0:
+        shmid = libc.shmget(key, 1 << 16, IPC_CREAT | 0o600)
+    if shmid < 0:
+        pytest.skip("System V shared memory is not available")
+    return shmid
+
+
+def run_programs(conn, shm_key: int) -> None:
+    os.setpgid(0, 0)
+    channel = WorkerChannel(conn)
+    while True:
+        try:
+            opcode, program = channel.recv_command()
+        except EOFError:
+            break
+        if opcode == OP_EXIT:
+            break
+        try:
+            exec(program.function_call)
+            channel.send_result(STATUS_OK, 1)
+        except Exception:
+            channel.send_result(STATUS_EXCEPTION, 1)
+
+
+def make_seed(code: str) -> Seed:
+    return Seed(
+        func_id=0,
+        library_name="json",
+        func_name="json.dumps",
+        args=[],
+        function_call=code,
+    )
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(2, run_programs, shm_key_start=SHM_KEY_START)
+    yield pool
+    pool.shutdown()
+
+
+def test_worker_lease_and_return(pool):
+    with pool.worker() as w:
+        assert w not in pool.idle
+        assert len(pool.idle) == 1
+        assert w.execute(OP_EXECUTE, make_seed("x = 1"), 5).status == STATUS_OK
+        result = w.execute(OP_EXECUTE, make_seed("raise ValueError()"), 5)
+        assert result.status == STATUS_EXCEPTION
+        pid = w.pid
+    assert len(pool.idle) == 2
+    # 正常归还的 worker 常驻，不会被重启
+    with pool.worker() as w2:
+        with pool.worker() as w3:
+            assert pid in (w2.pid, w3.pid)
+
+
+def test_worker_replaced_after_sigkill(pool):
+    with pool.worker() as w:
+        pid = w.pid
+        os.kill(pid, signal.SIGKILL)
+        w.process.join(5)
+    assert w.pid != pid and w.process.is_alive()
+    with pool.worker() as w:
+        pid = w.pid
+        kill_self = make_seed("import os, signal\nos.kill(os.getpid(), signal.SIGKILL)")
+        assert w.execute(OP_EXECUTE, kill_self, 5).status == STATUS_CRASH
+        assert w.pid != pid
+        assert w.execute(OP_EXECUTE, make_seed("pass"), 5).status == STATUS_OK
+
+
+def test_worker_restarted_after_timeout(pool):
+    with pool.worker() as w:
+        pid = w.pid
+        hang = make_seed("import time\ntime.sleep(10)")
+        assert w.execute(OP_EXECUTE, hang, 0.5).status == STATUS_TIMEOUT
+        assert w.pid != pid
+        assert w.execute(OP_EXECUTE, make_seed("pass"), 5).status == STATUS_OK
+
+
+def test_worker_restarted_over_rss_limit():
+    pool = WorkerPool(1, run_programs, shm_key_start=SHM_KEY_START, max_rss_mb=1)
+    try:
+        with pool.worker() as w:
+            pid = w.pid
+        assert w.pid != pid and w.process.is_alive()
+    finally:
+        pool.shutdown()
+
+
+def test_merge_coverage_of_killed_worker(pool):
+    # 被杀死的 worker 没有机会把最后一个输入的覆盖写入全局位图，由父进程合并
+    global_key = SHM_KEY_START + 3
+    global_shmid = get_segment(global_key)
+    w = pool.workers[0]
+    get_segment(w.shm_key)
+    try:
+        if pool.virgin is not None:
+            pool.virgin.close()
+        pool.virgin = SharedVirginMap(global_key)
+        pool.virgin.bitmap.words[:] = 0
+        with SharedBitmap(w.shm_key) as trace:
+            trace.words[:] = 0
+            trace.words[2] = 0b111
+            assert pool.merge_coverage(w) == 3
+            assert pool.merge_coverage(w) == 3
+    finally:
+        libc.shmctl(global_shmid, IPC_RMID, None)
+
+
+def test_worker_memory_limit_is_split():
+    pool = WorkerPool(2, run_programs, shm_key_start=SHM_KEY_START, memory_ratio=0.5)
+    try:
+        share = int(psutil.virtual_memory().total * 0.25)
+        for w in pool.workers:
+            assert resource.prlimit(w.pid, resource.RLIMIT_DATA)[0] == share
+    finally:
+        pool.shutdown()
+
+
+def test_killed_worker_coverage_is_merged_before_restart(pool):
+    global_key = SHM_KEY_START + 3
+    global_shmid = get_segment(global_key)
+    try:
+        if pool.virgin is not None:
+            pool.virgin.close()
+        pool.virgin = SharedVirginMap(global_key)
+        pool.virgin.bitmap.words[:] = 0
+        with pool.worker() as w:
+            get_segment(w.shm_key)
+            # worker 触发新的边之后、报告覆盖之前被杀死
+            touch_and_die = make_seed(
+                "import os, signal\n"
+                "from respfuzzer.lib.fuzz.coverage_map import SharedBitmap\n"
+                "with SharedBitmap(shm_key) as trace:\n"
+                "    trace.words[:] = 0\n"
+                "    trace.words[5] = 0b1011\n"
+                "os.kill(os.getpid(), signal.SIGKILL)"
+            )
+            assert w.execute(OP_EXECUTE, touch_and_die, 5).status == STATUS_CRASH
+        assert pool.virgin.bitmap.words[5] == 0b1011
+        assert pool.coverage == 3
+    finally:
+        libc.shmctl(global_shmid, IPC_RMID, None)
+
+
+def test_zygotes_use_their_own_bitmaps():
+    pool = WorkerPool(
+        2,
+        run_programs,
+        shm_key_start=SHM_KEY_START,
+        zygote_preload={"json": [], "base64": []},
+    )
+    try:
+        with pool.worker("json"), pool.worker("base64"):
+            pass
+        keys = {z.shm_key for z in pool.zygotes.values()}
+        assert keys == {SHM_KEY_START + 2, SHM_KEY_START + 3}
+    finally:
+        pool.shutdown()
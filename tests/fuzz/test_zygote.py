@@ -0,0 +1,138 @@
+import ctypes
+import ctypes.util
+import os
+import time
+
+import pytest
+
+pytest.importorskip("dcov")
+
+from respfuzzer.lib.fuzz.channel import (
+    OP_EXECUTE,
+    OP_EXIT,
+    STATUS_EXCEPTION,
+    STATUS_OK,
+    ParentChannel,
+    WorkerChannel,
+)
+from respfuzzer.lib.fuzz.zygote import Zygote
+from respfuzzer.models import Seed
+
+SHM_KEY = 0x52480000 + os.getpid() % 0x8000
+ZYGOTE_KEY = 0x52490000 + os.getpid() % 0x8000
+
+IPC_CREAT = 0o1000
+
+libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def run_programs(conn, shm_key: int) -> None:
+    channel = WorkerChannel(conn)
+    while True:
+        try:
+            opcode, program = channel.recv_command()
+        except EOFError:
+            break
+        if opcode == OP_EXIT:
+            break
+        try:
+            exec(program.function_call)
+            channel.send_result(STATUS_OK, 1)
+        except Exception:
+            channel.send_result(STATUS_EXCEPTION, 1)
+
+
+def make_seed(code: str) -> Seed:
+    return Seed(
+        func_id=0,
+        library_name="json",
+        func_name="json.dumps",
+        args=[],
+        function_call=code,
+    )
+
+
+@pytest.fixture
+def zygote():
+    zygote = Zygote("json", ["json.decoder"], run_programs)
+    zygote.start()
+    yield zygote
+    zygote.stop()
+
+
+def test_spawn_and_reap(zygote):
+    process, conn = zygote.spawn(SHM_KEY)
+    channel = ParentChannel(conn)
+    assert process.pid != zygote.process.pid and process.is_alive()
+    # worker 继承了 zygote 预先导入并冻结的对象
+    preloaded = "import gc, sys\nassert 'json.decoder' in sys.modules\nassert gc.get_freeze_count() > 0"
+    channel.send_command(OP_EXECUTE, make_seed(preloaded))
+    assert channel.recv_result(5).status == STATUS_OK
+    assert os.getpgid(process.pid) == process.pid
+
+    channel.send_command(OP_EXIT)
+    process.join(5)
+    assert not process.is_alive()
+    # 退出的 worker 由 zygote 回收，不会留下僵尸进程
+    deadline = time.monotonic() + 5
+    while os.path.exists(f"/proc/{process.pid}") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not os.path.exists(f"/proc/{process.pid}")
+    process.close()
+    channel.close()
+
+
+def test_worker_knows_owner(zygote):
+    process, conn = zygote.spawn(SHM_KEY)
+    channel = ParentChannel(conn)
+    try:
+        # worker 的父进程是 zygote，但它监视的是 worker 池所在的进程
+        check = (
+            "import os\n"
+            "from respfuzzer.lib.fuzz.zygote import owner_pid\n"
+            f"assert os.getppid() != {os.getpid()}\n"
+            f"assert owner_pid() == {os.getpid()}"
+        )
+        channel.send_command(OP_EXECUTE, make_seed(check))
+        assert channel.recv_result(5).status == STATUS_OK
+    finally:
+        process.kill()
+        process.close()
+        channel.close()
+
+
+def test_worker_outlives_zygote(zygote):
+    process, conn = zygote.spawn(SHM_KEY)
+    channel = ParentChannel(conn)
+    zygote.process.kill()
+    zygote.process.join()
+    try:
+        channel.send_command(OP_EXECUTE, make_seed("import json\njson.dumps(1)"))
+        assert channel.recv_result(5).status == STATUS_OK
+        assert process.is_alive()
+        # 之后的 spawn 会重新启动 zygote
+        second, second_conn = zygote.spawn(SHM_KEY + 1)
+        assert second.is_alive()
+        second.kill()
+        second.close()
+        second_conn.close()
+    finally:
+        process.kill()
+        process.close()
+        channel.close()
+
+
+def test_zygote_removes_its_bitmap():
+    # 模拟 dcov 为 zygote 创建的位图
+    if libc.shmget(ZYGOTE_KEY, 1 << 16, IPC_CREAT | 0o600) < 0:
+        pytest.skip("System V shared memory is not available")
+    zygote = Zygote("json", [], run_programs, shm_key=ZYGOTE_KEY)
+    zygote.start()
+    try:
+        process, conn = zygote.spawn(SHM_KEY)  # 此时 zygote 已经完成预导入
+        process.kill()
+        process.close()
+        conn.close()
+        assert libc.shmget(ZYGOTE_KEY, 0, 0) < 0
+    finally:
+        zygote.stop()
@@ -0,0 +1,36 @@
+import os
+import time
+from multiprocessing import Process
+
+from respfuzzer.utils.process_helper import manage_process_with_timeout
+
+
+def finish_quickly():
+    os.setpgid(0, 0)
+
+
+def exit_with_error():
+    os.setpgid(0, 0)
+    raise SystemExit(2)
+
+
+def hang():
+    os.setpgid(0, 0)
+    time.sleep(10)
+
+
+def test_manage_process_returns_on_exit():
+    t0 = time.time()
+    assert manage_process_with_timeout(Process(target=finish_quickly), 5)
+    # waiting is driven by the process sentinel, not by a polling interval
+    assert time.time() - t0 < 1
+
+
+def test_manage_process_nonzero_exitcode():
+    assert not manage_process_with_timeout(Process(target=exit_with_error), 5)
+
+
+def test_manage_process_timeout():
+    t0 = time.time()
+    assert not manage_process_with_timeout(Process(target=hang), 0.5)
+    assert time.time() - t0 < 2